@@ -1,10 +1,41 @@
 import argparse
+import os
 import pprint
+import sys
 
+from minipar.bytecode import Compiler, disassemble
+from minipar.closure import ClosureExecutor
+from minipar.distributed import DEFAULT_ADDRESS, RemotePool, serve_worker
+from minipar.eventloop import AsyncExecutor
 from minipar.executor import Executor
 from minipar.lexer import Lexer
+from minipar.memo import Memoizer
+from minipar.network import MAX_CLIENTS, POOL_SIZE, Network
+from minipar.optimizer import Optimizer
+from minipar.parallel import ProcessPool, ThreadPool
 from minipar.parser import Parser
+from minipar.resolver import Resolver
+from minipar.schedule import Scheduler
 from minipar.semantic import SemanticAnalyzer
+from minipar.tiering import TieredExecutor
+from minipar.transpiler import PythonExecutor, Transpiler
+from minipar.vm import VirtualMachine
+
+# Motores de execução disponíveis
+ENGINES = {
+    "tree": Executor,
+    "closure": ClosureExecutor,
+    "vm": VirtualMachine,
+    "python": PythonExecutor,
+    "tiered": TieredExecutor,
+    "async": AsyncExecutor,
+}
+
+# Motores que executam os ramos de par em processos
+PROCESS_ENGINES = {"tree", "tiered"}
+
+# Motores que executam os ramos de par no conjunto de threads
+POOL_ENGINES = {"tree", "tiered", "closure", "vm"}
 
 
 def main():
@@ -16,9 +47,162 @@ def main():
     parser.add_argument(
         "-ast", action="store_true", help="get Abstract Syntax Tree (AST)"
     )
-    parser.add_argument("name", type=str, help="program read from script file")
+    parser.add_argument(
+        "-opt-ast", action="store_true", help="get optimized AST"
+    )
+    parser.add_argument(
+        "-no-opt", action="store_true", help="disable AST optimizations"
+    )
+    parser.add_argument(
+        "-dis", action="store_true", help="disassemble the compiled bytecode"
+    )
+    parser.add_argument(
+        "-py", action="store_true", help="get generated Python source"
+    )
+    parser.add_argument(
+        "-engine",
+        choices=ENGINES.keys(),
+        default="tree",
+        help="execution engine (default: tree)",
+    )
+    parser.add_argument(
+        "-memo", action="store_true", help="memoize pure functions"
+    )
+    parser.add_argument(
+        "-memo-size",
+        type=int,
+        default=128,
+        help="cached results per function (default: 128)",
+    )
+    parser.add_argument(
+        "-memo-stats",
+        action="store_true",
+        help="print memoization hits and misses to stderr",
+    )
+    parser.add_argument(
+        "-tier-threshold",
+        type=int,
+        default=100,
+        help="calls plus loop iterations before a function is "
+        "recompiled by the tiered engine (default: 100)",
+    )
+    parser.add_argument(
+        "-tier-log",
+        action="store_true",
+        help="print tiering decisions to stderr",
+    )
+    parser.add_argument(
+        "-par-backend",
+        choices=("thread", "process", "remote"),
+        default="thread",
+        help="run par branches in threads, in a process pool or in "
+        "remote workers connected over sockets (default: thread)",
+    )
+    parser.add_argument(
+        "-par-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="threads, processes or remote workers kept in the par pool "
+        "(default: CPU count)",
+    )
+    parser.add_argument(
+        "-par-bound",
+        action="store_true",
+        help="run at most -par-workers par branches at a time "
+        "(branches must not wait on each other)",
+    )
+    parser.add_argument(
+        "-par-chunk",
+        type=int,
+        default=1,
+        help="smallest chunk of par for iterations handed to a worker "
+        "(default: 1)",
+    )
+    parser.add_argument(
+        "-par-grain",
+        type=float,
+        default=0.001,
+        help="seconds a par branch must take to run in its own thread; "
+        "shorter branches run inline (default: 0.001, 0 always runs "
+        "branches in parallel)",
+    )
+    parser.add_argument(
+        "-par-log",
+        action="store_true",
+        help="print each par decision and branch time to stderr",
+    )
+    parser.add_argument(
+        "-par-stats",
+        action="store_true",
+        help="print par decisions and par for load balancing metrics "
+        "to stderr",
+    )
+    parser.add_argument(
+        "-chan-clients",
+        type=int,
+        default=MAX_CLIENTS,
+        help="clients an s_channel server serves at the same time; "
+        f"further connections wait (default: {MAX_CLIENTS})",
+    )
+    parser.add_argument(
+        "-chan-accept",
+        type=int,
+        default=0,
+        help="connections an s_channel server accepts before closing "
+        "(default: 0, keep accepting)",
+    )
+    parser.add_argument(
+        "-chan-handlers",
+        type=int,
+        default=0,
+        help="threads running s_channel handlers apart from the "
+        "connection readers, replying in message order (default: 0, "
+        "handle each message on its connection thread)",
+    )
+    parser.add_argument(
+        "-chan-pool",
+        type=int,
+        default=POOL_SIZE,
+        help="idle c_channel connections kept per server for reuse "
+        f"(default: {POOL_SIZE}, 0 closes them)",
+    )
+    parser.add_argument(
+        "-par-listen",
+        default=DEFAULT_ADDRESS,
+        metavar="ADDRESS",
+        help="host:port or unix:path where remote par workers connect, "
+        "authenticated with the key in MINIPAR_AUTHKEY "
+        f"(default: {DEFAULT_ADDRESS})",
+    )
+    parser.add_argument(
+        "-par-spawn",
+        action="store_true",
+        help="start the remote par workers as local processes",
+    )
+    parser.add_argument(
+        "-par-worker",
+        metavar="ADDRESS",
+        help="run as a remote par worker connected to ADDRESS, "
+        "authenticated with the key in MINIPAR_AUTHKEY",
+    )
+    parser.add_argument(
+        "name", type=str, nargs="?", help="program read from script file"
+    )
 
     args = parser.parse_args()
+    if args.par_worker:
+        serve_worker(args.par_worker)
+        return
+    if args.name is None:
+        parser.error("the following arguments are required: name")
+    if (
+        args.par_backend in ("process", "remote")
+        and args.engine not in PROCESS_ENGINES
+    ):
+        parser.error(
+            f"-par-backend {args.par_backend} requires the tree or tiered "
+            "engine"
+        )
 
     with open(args.name, "r") as f:
         data = f.read()
@@ -27,21 +211,68 @@ def main():
     if args.tok:
         for token in lexer.scan():
             print(f"{token} | line: {lexer.line}")
-    elif args.ast:
-        parser = Parser(lexer)
-        semantic = SemanticAnalyzer()
-        ast = parser.start()
-        semantic.visit(ast)
+        return
+
+    # Frontend
+    parser = Parser(lexer)
+    semantic = SemanticAnalyzer()
+    ast = parser.start()
+    semantic.visit(ast)
+    if args.ast:
+        pprint.pprint(ast)
+        return
+    if not args.no_opt:
+        ast = Optimizer(semantic.function_table).optimize(ast)
+
+    if args.opt_ast:
         pprint.pprint(ast)
+    elif args.dis:
+        resolution = Resolver().resolve(ast)
+        print(disassemble(Compiler(resolution).compile_module(ast)))
+    elif args.py:
+        print(Transpiler().transpile(ast), end="")
     else:
-        # Frontend
-        parser = Parser(lexer)
-        semantic = SemanticAnalyzer()
-        ast = parser.start()
-        semantic.visit(ast)
         # Execução
-        executor = Executor()
-        executor.run(ast)
+        memo = Memoizer(args.memo_size) if args.memo else None
+        scheduler = Scheduler(
+            args.par_workers,
+            max(args.par_chunk, 1),
+            args.par_grain,
+            args.par_log,
+        )
+        network = Network(
+            max(args.chan_clients, 1),
+            max(args.chan_accept, 0),
+            max(args.chan_pool, 0),
+            max(args.chan_handlers, 0),
+        )
+        options = {"memo": memo, "scheduler": scheduler, "network": network}
+        if args.engine == "tiered":
+            options.update(threshold=args.tier_threshold, log=args.tier_log)
+        if args.par_backend == "process":
+            options["processes"] = ProcessPool(ast, args.par_workers)
+        elif args.par_backend == "remote":
+            options["processes"] = RemotePool(
+                ast,
+                args.par_workers,
+                address=args.par_listen,
+                spawn=args.par_spawn,
+            )
+        elif args.engine in POOL_ENGINES:
+            options["threads"] = ThreadPool(args.par_workers, args.par_bound)
+        executor = ENGINES[args.engine](**options)
+        try:
+            executor.run(ast)
+        finally:
+            if executor.processes is not None:
+                executor.processes.close()
+            if executor.threads is not None:
+                executor.threads.close()
+            network.close()
+        if memo and args.memo_stats:
+            print(memo.report(), file=sys.stderr)
+        if args.par_stats and (scheduler.stats or scheduler.blocks):
+            print(scheduler.report(), file=sys.stderr)
 
 
 if __name__ == "__main__":
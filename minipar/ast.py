@@ -5,7 +5,9 @@ O módulo da AST conta com uma estrutura de classes responsável
 por representa o conjunto de declarações e expressões da linguagem
 """
 
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
 
 from minipar.token import Token
 
@@ -59,7 +61,7 @@ type Parameters = dict[
 
 @dataclass
 class Constant(Expression):
-    pass
+    value: Any = field(default=None, repr=False)  # valor decodificado
 
 
 @dataclass
@@ -91,6 +93,35 @@ class Arithmetic(Expression):
     right: Expression
 
 
+##### SPECIALIZED EXPRESSIONS #####
+# nós gerados pela análise semântica a partir dos tipos dos operandos
+
+
+@dataclass
+class And(Logical):
+    pass
+
+
+@dataclass
+class Or(Logical):
+    pass
+
+
+@dataclass
+class TypedRelational(Relational):
+    op: Callable[[Any, Any], bool] = field(default=None, repr=False)
+
+
+@dataclass
+class NumberArithmetic(Arithmetic):
+    op: Callable[[Any, Any], Any] = field(default=None, repr=False)
+
+
+@dataclass
+class StringConcat(Arithmetic):
+    pass
+
+
 @dataclass
 class Unary(Expression):
     expr: Expression
@@ -103,6 +134,20 @@ class Call(Expression):
     oper: str | None
 
 
+@dataclass
+class ParReduce(Expression):
+    # ramos de um par cujos resultados são combinados pela redução
+    # `token.value`
+    body: Body
+    cost: float = field(default=float("inf"), repr=False)  # ramo mais caro
+
+
+@dataclass
+class ChannelCall(Call):
+    # método de um canal declarado com chan (`oper` é o nome do método)
+    pass
+
+
 ##### STATEMENTS #####
 
 
@@ -138,6 +183,7 @@ class FuncDef(Statement):
     return_type: str
     params: Parameters
     body: Body
+    pure: bool = field(default=False, repr=False)  # sem efeitos colaterais
 
 
 @dataclass
@@ -153,9 +199,26 @@ class While(Statement):
     body: Body
 
 
+@dataclass
+class CountingWhile(While):
+    # laço com contador reconhecido pelo otimizador de laços: a última
+    # instrução do corpo soma `step` ao contador comparado na condição
+    step: int | float = field(default=1, repr=False)
+
+
 @dataclass
 class Par(Statement):
     body: Body
+    cost: float = field(default=float("inf"), repr=False)  # ramo mais caro
+
+
+@dataclass
+class ParFor(Statement):
+    # iterações de start até end (exclusivo) distribuídas entre workers
+    var: ID
+    start: Expression
+    end: Expression
+    body: Body
 
 
 @dataclass
@@ -195,3 +258,10 @@ class SChannel(Channel):
 @dataclass
 class CChannel(Channel):
     pass
+
+
+@dataclass
+class Chan(Statement):
+    # canal tipado em memória, com até `capacity` valores pendentes
+    var: ID
+    capacity: Expression
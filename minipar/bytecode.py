@@ -0,0 +1,531 @@
+"""
+Módulo de Bytecode
+
+O módulo de bytecode conta com o compilador que transforma a AST,
+já verificada pela análise semântica, em uma sequência linear de
+instruções para a máquina virtual de pilha, além de um desmontador
+para inspeção do código gerado
+"""
+
+import operator
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from minipar import ast
+from minipar.dependencies import DependencyAnalyzer
+from minipar.optimizer import decode_constant
+from minipar.resolver import Resolution
+from minipar.schedule import par_label
+from minipar.token import CONNECTION_METHODS, DEFAULT_FUNCTION_NAMES
+
+
+class Op(IntEnum):
+    """
+    Códigos de operação da máquina virtual
+    """
+
+    LOAD_CONST = 1
+    LOAD_FAST = 2
+    STORE_FAST = 3
+    LOAD_DEREF = 4
+    STORE_DEREF = 5
+    STORE_DEFAULT = 6
+    BINARY_SUBSCR = 7
+    BINARY_OP = 8
+    LOGICAL_OR = 9
+    UNARY_NOT = 10
+    UNARY_NEG = 11
+    POP_TOP = 12
+    JUMP = 13
+    POP_JUMP_IF_FALSE = 14
+    POP_JUMP_IF_TRUE = 15
+    JUMP_IF_FALSE_OR_POP = 16
+    CALL_BUILTIN = 17
+    CALL_METHOD = 18
+    CALL_FUNCTION = 19
+    RETURN_VALUE = 20
+    PAR = 21
+    CONNECT = 22
+    SERVE = 23
+    TAIL_CALL = 24
+    PAR_FOR = 25
+    MAKE_CHANNEL = 26
+    CALL_CHANNEL = 27
+    SEQ_LEVEL = 28
+    PAR_REDUCE = 29
+
+
+# Operadores binários com verificação de operandos vazios
+BINARY_OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+OPERATOR_SYMBOLS = {func: symbol for symbol, func in BINARY_OPERATORS.items()}
+
+# Funções padrão chamadas diretamente, sem referência a uma conexão
+DEFAULT_CALLS = set(DEFAULT_FUNCTION_NAMES) - CONNECTION_METHODS
+
+# Instruções que recebem um endereço de destino como argumento
+JUMP_OPS = {
+    Op.JUMP,
+    Op.POP_JUMP_IF_FALSE,
+    Op.POP_JUMP_IF_TRUE,
+    Op.JUMP_IF_FALSE_OR_POP,
+}
+
+# Instruções que acessam variáveis
+VARIABLE_OPS = {
+    Op.LOAD_FAST,
+    Op.STORE_FAST,
+    Op.LOAD_DEREF,
+    Op.STORE_DEREF,
+    Op.STORE_DEFAULT,
+}
+
+type Instruction = tuple[Op, Any]
+
+
+@dataclass
+class Code:
+    """
+    Classe que representa um trecho de código compilado
+
+    Attributes:
+        name (str): nome do módulo ou da função
+        instructions (list): sequência de instruções (opcode, argumento)
+        params (list): nomes dos parâmetros, em ordem
+        size (int): tamanho do frame usado pelo código
+        node (FuncDef | None): declaração da função de origem
+        names (dict): nome da variável de cada endereço, para inspeção
+        children (list): códigos de funções e ramos paralelos aninhados
+    """
+
+    name: str
+    instructions: list[Instruction] = field(default_factory=list)
+    params: list[str] = field(default_factory=list)
+    size: int = 1
+    node: ast.FuncDef | None = None
+    names: dict[Any, str] = field(default_factory=dict)
+    children: list["Code"] = field(default_factory=list)
+
+
+@dataclass
+class Loop:
+    """
+    Contexto de compilação de um laço
+
+    Attributes:
+        breaks (list): posições de saltos de break a corrigir
+        continues (list): posições de saltos de continue a corrigir
+    """
+
+    breaks: list[int] = field(default_factory=list)
+    continues: list[int] = field(default_factory=list)
+
+
+class Compiler:
+    """
+    Classe que compila a AST para bytecode
+
+    Args:
+        resolution (Resolution): endereços calculados pelo Resolver
+
+    Attributes:
+        code (Code): código em compilação
+        loops (list): pilha de laços em compilação
+        functions (dict): código de cada função, por declaração
+        dependencies (DependencyAnalyzer | None): escalonador dos blocos
+            seq, criado no primeiro uso
+    """
+
+    def __init__(self, resolution: Resolution):
+        self.resolution = resolution
+        self.code: Code = Code("<module>")
+        self.loops: list[Loop] = []
+        self.functions: dict[int, Code] = {}
+        self.dependencies: DependencyAnalyzer | None = None
+
+    def compile_module(self, node: ast.Module) -> Code:
+        """
+        Compila o programa completo
+
+        Returns:
+            Code: código do módulo
+        """
+        self.code.size = self.resolution.frame_size(node)
+        self.compile_block(node.stmts)
+        self.emit(Op.LOAD_CONST, None)
+        self.emit(Op.RETURN_VALUE)
+        return self.code
+
+    def function(self, node: ast.FuncDef) -> Code:
+        """
+        Retorna o código de uma função, compilando-a apenas uma vez
+
+        Returns:
+            Code: código da função
+        """
+        code = self.functions.get(id(node))
+        if code is not None:
+            return code
+
+        code = Code(
+            node.name,
+            params=list(node.params),
+            size=self.resolution.frame_size(node),
+            node=node,
+        )
+        # registra antes de compilar o corpo por causa da recursão
+        self.functions[id(node)] = code
+        saved = (self.code, self.loops)
+        self.code, self.loops = code, []
+
+        # valores padrão são avaliados a cada chamada, como no Executor,
+        # e só ocupam as posições não preenchidas pelos argumentos
+        for slot, (name, (_, default)) in enumerate(node.params.items(), 1):
+            if default:
+                self.compile(default)
+                self.emit(Op.STORE_DEFAULT, slot)
+            code.names[slot] = name
+        self.compile_block(node.body)
+        self.emit(Op.LOAD_CONST, None)
+        self.emit(Op.RETURN_VALUE)
+
+        self.code, self.loops = saved
+        return code
+
+    def emit(self, op: Op, arg: Any = None) -> int:
+        self.code.instructions.append((op, arg))
+        return len(self.code.instructions) - 1
+
+    def label(self) -> int:
+        return len(self.code.instructions)
+
+    def patch(self, position: int, target: int | None = None):
+        """
+        Corrige o destino de um salto emitido anteriormente
+        """
+        op, _ = self.code.instructions[position]
+        if target is None:
+            target = self.label()
+        self.code.instructions[position] = (op, target)
+
+    def compile(self, node: ast.Node):
+        meth_name: str = f"compile_{type(node).__name__}"
+        compiler = getattr(self, meth_name, None)
+
+        if compiler:
+            compiler(node)
+        else:
+            self.emit(Op.LOAD_CONST, None)
+
+    def compile_block(self, block: ast.Body | None):
+        for stmt in block or []:
+            self.compile(stmt)
+            if isinstance(stmt, ast.Expression):
+                self.emit(Op.POP_TOP)
+
+    def variable(self, node: ast.ID, fast: Op, deref: Op):
+        depth, slot = self.resolution.address(node)
+        if depth == 0:
+            self.emit(fast, slot)
+            self.code.names[slot] = node.token.value
+        else:
+            self.emit(deref, (depth, slot))
+            self.code.names[(depth, slot)] = node.token.value
+
+    ###### COMPILE STATEMENTS #####
+
+    def compile_Assign(self, node: ast.Assign):
+        self.compile(node.right)
+        self.variable(node.left, Op.STORE_FAST, Op.STORE_DEREF)  # type: ignore
+
+    def compile_Return(self, node: ast.Return):
+        self.compile(node.expr)
+        op, arg = self.code.instructions[-1]
+        if isinstance(node.expr, ast.Call) and op == Op.CALL_FUNCTION:
+            # chamada em posição de cauda reaproveita o frame atual
+            self.code.instructions[-1] = (Op.TAIL_CALL, arg)
+        else:
+            self.emit(Op.RETURN_VALUE)
+
+    def compile_Break(self, _: ast.Break):
+        self.loops[-1].breaks.append(self.emit(Op.JUMP))
+
+    def compile_Continue(self, _: ast.Continue):
+        self.loops[-1].continues.append(self.emit(Op.JUMP))
+
+    def compile_FuncDef(self, node: ast.FuncDef):
+        # funções são ligadas estaticamente às chamadas
+        self.code.children.append(self.function(node))
+
+    def compile_If(self, node: ast.If):
+        self.compile(node.condition)
+        jump_else = self.emit(Op.POP_JUMP_IF_FALSE)
+        self.compile_block(node.body)
+        if node.else_stmt:
+            jump_end = self.emit(Op.JUMP)
+            self.patch(jump_else)
+            self.compile_block(node.else_stmt)
+            self.patch(jump_end)
+        else:
+            self.patch(jump_else)
+
+    def compile_While(self, node: ast.While):
+        self.compile(node.condition)
+        jump_end = self.emit(Op.POP_JUMP_IF_FALSE)
+
+        loop = Loop()
+        self.loops.append(loop)
+        start = self.label()
+        self.compile_block(node.body)
+        self.loops.pop()
+
+        # após a primeira iteração, a condição é avaliada no escopo do laço
+        condition = self.label()
+        self.compile(self.resolution.loop_condition(node))
+        self.emit(Op.POP_JUMP_IF_TRUE, start)
+
+        for position in loop.breaks:
+            self.patch(position)
+        for position in loop.continues:
+            self.patch(position, condition)
+        self.patch(jump_end)
+
+    compile_CountingWhile = compile_While
+
+    def compile_Par(self, node: ast.Par):
+        branches = self.branches(node)
+        self.emit(Op.PAR, (branches, par_label(node), node.cost))
+
+    def compile_ParReduce(self, node: ast.ParReduce):
+        branches = self.branches(node)
+        self.emit(
+            Op.PAR_REDUCE,
+            (branches, par_label(node), node.cost, node.token.value),
+        )
+
+    def branches(self, node: ast.Par | ast.ParReduce) -> tuple[Code, ...]:
+        """
+        Compila as chamadas dos ramos de um par; cada ramo retorna o
+        valor da sua chamada
+        """
+        branches = []
+        for call in node.body:
+            # cada ramo usa o layout do frame do código atual
+            saved = self.code
+            self.code = Code("<par>", size=saved.size, names=saved.names)
+            self.compile(call)
+            self.emit(Op.RETURN_VALUE)
+            branches.append(self.code)
+            self.code = saved
+            self.code.children.append(branches[-1])
+        return tuple(branches)
+
+    def compile_ParFor(self, node: ast.ParFor):
+        self.compile(node.start)
+        self.compile(node.end)
+        _, slot = self.resolution.address(node.var)
+
+        # o corpo usa o layout do frame do código atual
+        saved = self.code
+        self.code = Code("<par for>", size=saved.size, names=saved.names)
+        self.code.names[slot] = node.var.token.value
+        self.compile_block(node.body)
+        self.emit(Op.LOAD_CONST, None)
+        self.emit(Op.RETURN_VALUE)
+        body, self.code = self.code, saved
+        self.code.children.append(body)
+        self.emit(Op.PAR_FOR, (body, slot, node.var.token.value))
+
+    def compile_Seq(self, node: ast.Seq):
+        if self.dependencies is None:
+            self.dependencies = DependencyAnalyzer(self.resolution.functions())
+        plan = self.dependencies.schedule(node.body)
+        if plan is None:
+            return self.compile_block(node.body)
+
+        for level in plan:
+            if len(level) == 1:
+                self.compile_block(level)
+                continue
+            statements = []
+            for stmt in level:
+                # as instruções de um nível usam o frame do código atual
+                saved = self.code
+                self.code = Code("<seq>", size=saved.size, names=saved.names)
+                self.compile_block([stmt])
+                self.emit(Op.LOAD_CONST, None)
+                self.emit(Op.RETURN_VALUE)
+                statements.append(self.code)
+                self.code = saved
+                self.code.children.append(statements[-1])
+            self.emit(Op.SEQ_LEVEL, tuple(statements))
+
+    def compile_Chan(self, node: ast.Chan):
+        self.compile(node.capacity)
+        self.emit(Op.MAKE_CHANNEL, node.var.token.value)
+        self.variable(node.var, Op.STORE_FAST, Op.STORE_DEREF)
+
+    def compile_CChannel(self, node: ast.CChannel):
+        self.emit(Op.CONNECT, (node.name, node.localhost, int(node.port)))
+
+    def compile_SChannel(self, node: ast.SChannel):
+        function, depth = self.resolution.callee(node)  # type: ignore
+        self.compile(node.description)
+        self.emit(
+            Op.SERVE,
+            (node.localhost, int(node.port), self.function(function), depth),
+        )
+
+    ###### COMPILE EXPRESSIONS #####
+
+    def compile_Constant(self, node: ast.Constant):
+        self.emit(Op.LOAD_CONST, decode_constant(node))
+
+    def compile_ID(self, node: ast.ID):
+        self.variable(node, Op.LOAD_FAST, Op.LOAD_DEREF)
+
+    def compile_Access(self, node: ast.Access):
+        self.compile_ID(node.id)
+        self.compile(node.expr)
+        self.emit(Op.BINARY_SUBSCR)
+
+    def compile_Logical(self, node: ast.Logical):
+        self.compile(node.left)
+        match node.token.value:
+            case "&&":
+                jump = self.emit(Op.JUMP_IF_FALSE_OR_POP)
+                self.compile(node.right)
+                self.patch(jump)
+            case _:
+                self.compile(node.right)
+                self.emit(Op.LOGICAL_OR)
+
+    compile_And = compile_Or = compile_Logical
+
+    def compile_binary(self, node: ast.Relational | ast.Arithmetic):
+        self.compile(node.left)
+        self.compile(node.right)
+        self.emit(Op.BINARY_OP, BINARY_OPERATORS[node.token.value])
+
+    compile_Relational = compile_binary
+    compile_Arithmetic = compile_binary
+    compile_TypedRelational = compile_binary
+    compile_NumberArithmetic = compile_StringConcat = compile_binary
+
+    def compile_Unary(self, node: ast.Unary):
+        self.compile(node.expr)
+        if node.token.value == "!":
+            self.emit(Op.UNARY_NOT)
+        else:
+            self.emit(Op.UNARY_NEG)
+
+    def compile_ChannelCall(self, node: ast.ChannelCall):
+        self.compile(node.id)  # type: ignore
+        for arg in node.args:
+            self.compile(arg)
+        self.emit(Op.CALL_CHANNEL, (node.oper, len(node.args)))
+
+    def compile_Call(self, node: ast.Call):
+        func_name = node.oper if node.oper else node.token.value
+
+        for arg in node.args:
+            self.compile(arg)
+
+        argc = len(node.args)
+        if func_name in CONNECTION_METHODS:
+            self.emit(Op.CALL_METHOD, (node.token.value, func_name, argc))
+        elif func_name in DEFAULT_CALLS:
+            self.emit(Op.CALL_BUILTIN, (func_name, argc))
+        elif callee := self.resolution.callee(node):
+            function, depth = callee
+            self.emit(Op.CALL_FUNCTION, (self.function(function), depth, argc))
+        else:
+            # método desconhecido não produz valor
+            for _ in node.args:
+                self.emit(Op.POP_TOP)
+            self.emit(Op.LOAD_CONST, None)
+
+
+def format_arg(code: Code, op: Op, arg: Any) -> str:
+    """
+    Formata o argumento de uma instrução para o desmontador
+    """
+    match op:
+        case _ if arg is None and op not in JUMP_OPS:
+            return "None" if op == Op.LOAD_CONST else ""
+        case _ if op in VARIABLE_OPS:
+            return f"{arg} ({code.names.get(arg, '?')})"
+        case Op.BINARY_OP:
+            return OPERATOR_SYMBOLS.get(arg, str(arg))
+        case Op.LOAD_CONST:
+            return repr(arg)
+        case Op.CALL_BUILTIN:
+            name, argc = arg
+            return f"{name} ({argc} args)"
+        case Op.CALL_FUNCTION | Op.TAIL_CALL:
+            function, depth, argc = arg
+            return f"{function.name} (depth {depth}, {argc} args)"
+        case Op.CALL_METHOD:
+            conn, name, argc = arg
+            return f"{conn}.{name} ({argc} args)"
+        case Op.CALL_CHANNEL:
+            name, argc = arg
+            return f"{name} ({argc} args)"
+        case Op.PAR:
+            return f"({len(arg[0])} branches)"
+        case Op.SEQ_LEVEL:
+            return f"({len(arg)} statements)"
+        case Op.PAR_REDUCE:
+            return f"{arg[3]} ({len(arg[0])} branches)"
+        case Op.PAR_FOR:
+            _, slot, name = arg
+            return f"{slot} ({name})"
+        case Op.CONNECT:
+            name, host, port = arg
+            return f"{name} {host}:{port}"
+        case Op.SERVE:
+            host, port, function, depth = arg
+            return f"{function.name} {host}:{port} (depth {depth})"
+        case _ if op in JUMP_OPS:
+            return f"to {arg}"
+        case _:
+            return str(arg)
+
+
+def disassemble(code: Code) -> str:
+    """
+    Gera uma listagem legível do bytecode e dos códigos aninhados
+
+    Returns:
+        str: listagem das instruções
+    """
+    params = ", ".join(code.params)
+    title = code.name if code.node is None else f"{code.name}({params})"
+    lines = [f"Disassembly of {title} (frame size {code.size}):"]
+    targets = {arg for op, arg in code.instructions if op in JUMP_OPS}
+
+    for index, (op, arg) in enumerate(code.instructions):
+        marker = ">>" if index in targets else "  "
+        lines.append(
+            f"{marker} {index:4} {op.name:<22} "
+            f"{format_arg(code, op, arg)}".rstrip()
+        )
+
+    for child in code.children:
+        lines.append("")
+        lines.append(disassemble(child))
+
+    return "\n".join(lines)
@@ -0,0 +1,84 @@
+"""
+Módulo de Canais
+
+O módulo de canais implementa os canais tipados declarados com `chan`,
+usados para a comunicação entre os ramos paralelos de um mesmo
+processo. Cada canal é uma fila limitada: `put` bloqueia enquanto o
+canal está cheio (backpressure) e `get` bloqueia enquanto está vazio,
+sem sockets nem codificação dos valores
+"""
+
+import queue
+from dataclasses import dataclass, field
+from typing import Any
+
+from minipar import error as err
+
+# Marcador de canal vazio, usado nas leituras sem bloqueio
+EMPTY = object()
+
+
+@dataclass(eq=False)
+class Channel:
+    """
+    Canal tipado com capacidade limitada
+
+    Attributes:
+        name (str): nome do canal no programa
+        capacity (int): quantidade máxima de valores no canal
+        items (Queue): valores enviados e ainda não recebidos
+    """
+
+    name: str
+    capacity: int
+    items: queue.Queue = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if isinstance(self.capacity, float) and self.capacity.is_integer():
+            self.capacity = int(self.capacity)
+        if not isinstance(self.capacity, int) or self.capacity < 1:
+            raise err.RunTimeError(
+                f"capacidade do canal {self.name} precisa ser um inteiro "
+                "positivo"
+            )
+        self.items = queue.Queue(self.capacity)
+
+    def put(self, value: Any):
+        """
+        Envia um valor, esperando enquanto o canal está cheio
+        """
+        self.items.put(value)
+
+    def get(self) -> Any:
+        """
+        Recebe um valor, esperando enquanto o canal está vazio
+        """
+        return self.items.get()
+
+    def try_put(self, value: Any) -> bool:
+        """
+        Envia um valor se houver espaço, sem esperar
+
+        Returns:
+            bool: se o valor foi enviado
+        """
+        try:
+            self.items.put_nowait(value)
+        except queue.Full:
+            return False
+        return True
+
+    def try_get(self, default: Any) -> Any:
+        """
+        Recebe um valor se houver algum, sem esperar
+
+        Returns:
+            Any: valor recebido, ou `default` se o canal estiver vazio
+        """
+        try:
+            return self.items.get_nowait()
+        except queue.Empty:
+            return default
+
+    def size(self) -> int:
+        return self.items.qsize()
@@ -0,0 +1,679 @@
+"""
+Módulo de Compilação para Closures
+
+O módulo de compilação para closures transforma a AST, uma única vez,
+em uma árvore de funções Python pré-ligadas. Operadores são resolvidos
+para as funções do módulo `operator` e os filhos de cada nó já estão
+compilados, evitando o despacho por nome do Executor a cada avaliação.
+As variáveis são acessadas por endereço léxico em frames baseados em
+listas, calculados pelo Resolver
+"""
+
+import operator
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any
+
+from minipar import ast
+from minipar.channels import Channel
+from minipar.dependencies import DependencyAnalyzer
+from minipar.executor import NUMBER_TYPES, Executor, combine, commands
+from minipar.memo import MISSING
+from minipar.optimizer import decode_constant
+from minipar.resolver import STATIC_LINK, Resolution, Resolver, copy_frames
+from minipar.schedule import par_label
+from minipar.token import CONNECTION_METHODS
+
+type Frame = list[Any]
+type Closure = Callable[[Frame], Any]
+
+# Operadores binários resolvidos em tempo de compilação
+BINARY_OPERATORS: dict[str, Callable[[Any, Any], Any]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+BREAK = commands.BREAK
+CONTINUE = commands.CONTINUE
+
+
+def nothing(_: Frame):
+    return None
+
+
+@dataclass
+class CompiledFunction:
+    """
+    Classe que representa uma função do usuário já compilada
+
+    Attributes:
+        node (FuncDef): declaração original da função
+        size (int): tamanho do frame da função
+        defaults (list): posição e closure de cada valor padrão
+        body (Closure): corpo compilado da função
+    """
+
+    node: ast.FuncDef
+    size: int
+    defaults: list[tuple[int, Closure]] = field(default_factory=list)
+    body: Closure = nothing
+
+    def invoke(self, parent: Frame, values: list) -> Any:
+        """
+        Executa a função em um novo frame ligado ao frame pai
+        """
+        return result(self.body(self.frame(parent, values)))
+
+    def frame(self, parent: Frame, values: list) -> Frame:
+        frame = [None] * self.size
+        frame[STATIC_LINK] = parent
+        for slot, default in self.defaults:
+            frame[slot] = default(frame)
+        count = min(len(values), len(self.node.params))
+        frame[1 : count + 1] = values[:count]
+        return frame
+
+
+@dataclass
+class TailInvoke:
+    """
+    Chamada em posição de cauda, retornada pelo corpo de uma função no
+    lugar da tupla (valor,) para que a função chamada execute no laço de
+    result, sem uma nova recursão
+
+    Attributes:
+        function (CompiledFunction): função chamada
+        parent (Frame): frame pai da função chamada
+        values (list): valores dos argumentos, já avaliados
+    """
+
+    function: CompiledFunction
+    parent: Frame
+    values: list
+
+
+def result(signal: Any) -> Any:
+    """
+    Retorna o valor do sinal do corpo de uma função, executando no mesmo
+    laço as chamadas em posição de cauda
+    """
+    while type(signal) is TailInvoke:
+        function = signal.function
+        signal = function.body(function.frame(signal.parent, signal.values))
+    if signal is not None:
+        return signal[0]
+
+
+@dataclass
+class ClosureCompiler:
+    """
+    Classe que compila nós da AST em closures
+
+    Cada closure recebe o frame atual. As closures de instruções
+    retornam None, BREAK, CONTINUE ou uma tupla (valor,) quando um
+    return é executado. As closures de expressões retornam o valor da
+    expressão.
+
+    Attributes:
+        executor (ClosureExecutor): executor das funções padrão e canais
+        resolution (Resolution): endereços calculados pelo Resolver
+        functions (dict): cache de funções compiladas por declaração
+        dependencies (DependencyAnalyzer | None): escalonador dos blocos
+            seq, criado no primeiro uso
+    """
+
+    executor: "ClosureExecutor"
+    resolution: Resolution
+    functions: dict[int, CompiledFunction] = field(default_factory=dict)
+    dependencies: DependencyAnalyzer | None = None
+
+    def compile(self, node: ast.Node) -> Closure:
+        meth_name: str = f"compile_{type(node).__name__}"
+        compiler = getattr(self, meth_name, None)
+
+        if compiler:
+            return compiler(node)
+        return nothing
+
+    def compile_stmt(self, node: ast.Node) -> Closure:
+        """
+        Compila um nó usado como instrução, descartando o valor
+        de expressões
+        """
+        if isinstance(node, ast.Expression):
+            expr = self.compile(node)
+
+            def statement(frame: Frame):
+                expr(frame)
+
+            return statement
+        return self.compile(node)
+
+    def compile_block(self, block: ast.Body | None) -> Closure:
+        stmts = tuple(
+            self.compile_stmt(stmt)
+            for stmt in block or []
+            if not isinstance(stmt, ast.FuncDef)
+        )
+
+        if not stmts:
+            return nothing
+        if len(stmts) == 1:
+            return stmts[0]
+
+        def run_block(frame: Frame):
+            for stmt in stmts:
+                signal = stmt(frame)
+                if signal is not None:
+                    return signal
+
+        return run_block
+
+    def function(self, node: ast.FuncDef) -> CompiledFunction:
+        """
+        Retorna a versão compilada de uma função, compilando-a
+        apenas uma vez
+        """
+        compiled = self.functions.get(id(node))
+        if compiled is None:
+            compiled = CompiledFunction(node, self.resolution.frame_size(node))
+            # registra antes de compilar o corpo por causa da recursão
+            self.functions[id(node)] = compiled
+            for slot, (_, default) in enumerate(node.params.values(), 1):
+                if default:
+                    compiled.defaults.append((slot, self.compile(default)))
+            compiled.body = self.compile_block(node.body)
+        return compiled
+
+    def parent(self, depth: int) -> Closure:
+        """
+        Gera a closure que sobe `depth` elos estáticos a partir do frame
+        """
+        if depth == 0:
+            return lambda frame: frame
+        if depth == 1:
+            return lambda frame: frame[STATIC_LINK]
+
+        def walk(frame: Frame):
+            for _ in range(depth):
+                frame = frame[STATIC_LINK]
+            return frame
+
+        return walk
+
+    ###### COMPILE STATEMENTS #####
+
+    def compile_Module(self, node: ast.Module) -> Closure:
+        return self.compile_block(node.stmts)
+
+    def compile_Assign(self, node: ast.Assign) -> Closure:
+        right = self.compile(node.right)
+        depth, slot = self.resolution.address(node.left)  # type: ignore
+
+        match depth:
+            case 0:
+
+                def store(frame: Frame):
+                    frame[slot] = right(frame)
+
+            case 1:
+
+                def store(frame: Frame):
+                    frame[STATIC_LINK][slot] = right(frame)
+
+            case _:
+                parent = self.parent(depth)
+
+                def store(frame: Frame):
+                    parent(frame)[slot] = right(frame)
+
+        return store
+
+    def compile_Return(self, node: ast.Return) -> Closure:
+        tail = self.compile_tail(node.expr)
+        if tail is not None:
+            return tail
+        expr = self.compile(node.expr)
+
+        def ret(frame: Frame):
+            return (expr(frame),)
+
+        return ret
+
+    def compile_tail(self, node: ast.Expression) -> Closure | None:
+        """
+        Compila o return de uma chamada a uma função do usuário, que
+        devolve a chamada a result no lugar de executá-la; chamadas
+        memoizadas seguem pelo caminho comum, que consulta o cache
+
+        Returns:
+            Closure | None: closure do return, ou None se o valor
+                retornado não é uma chamada em posição de cauda
+        """
+        ex = self.executor
+        if not isinstance(node, ast.Call) or node.oper:
+            return None
+        if node.token.value in ex.default_functions:
+            return None
+        callee = self.resolution.callee(node)
+        if callee is None:
+            return None
+        function, depth = callee
+        if ex.memo is not None and function.pure:
+            return None
+
+        compiled = self.function(function)
+        parent = self.parent(depth)
+        args = tuple(self.compile(arg) for arg in node.args)
+
+        def tail(frame: Frame):
+            values = [arg(frame) for arg in args]
+            return TailInvoke(compiled, parent(frame), values)
+
+        return tail
+
+    def compile_Break(self, _: ast.Break) -> Closure:
+        return lambda _: BREAK
+
+    def compile_Continue(self, _: ast.Continue) -> Closure:
+        return lambda _: CONTINUE
+
+    def compile_If(self, node: ast.If) -> Closure:
+        condition = self.compile(node.condition)
+        body = self.compile_block(node.body)
+        else_body = self.compile_block(node.else_stmt)
+
+        def run_if(frame: Frame):
+            if condition(frame):
+                return body(frame)
+            return else_body(frame)
+
+        return run_if
+
+    def compile_While(self, node: ast.While) -> Closure:
+        condition = self.compile(node.condition)
+        loop_condition = self.compile(self.resolution.loop_condition(node))
+        body = self.compile_block(node.body)
+
+        def run_while(frame: Frame):
+            if not condition(frame):
+                return
+            while True:
+                signal = body(frame)
+                if signal is not None:
+                    if signal is BREAK:
+                        return
+                    if signal is not CONTINUE:
+                        return signal
+                if not loop_condition(frame):
+                    return
+
+        return run_while
+
+    def compile_CountingWhile(self, node: ast.CountingWhile) -> Closure:
+        condition: ast.TypedRelational = node.condition  # type: ignore
+        depth, slot = self.resolution.address(condition.left)
+        if depth != 0:
+            return self.compile_While(node)
+
+        op, step = condition.op, node.step
+        limit = self.compile(condition.right)
+        body = self.compile_block(node.body[:-1])
+        run_generic = self.compile_While(node)
+
+        def run_counter(frame: Frame):
+            counter, bound = frame[slot], limit(frame)
+            if not isinstance(counter, NUMBER_TYPES) or not isinstance(
+                bound, NUMBER_TYPES
+            ):
+                return run_generic(frame)
+            while op(counter, bound):
+                signal = body(frame)
+                if signal is not None:
+                    if signal is BREAK:
+                        return
+                    return signal
+                counter += step
+                frame[slot] = counter
+
+        return run_counter
+
+    def compile_Par(self, node: ast.Par) -> Closure:
+        ex = self.executor
+        branches = tuple(self.compile_stmt(call) for call in node.body)
+        key, label, cost = id(node), par_label(node), node.cost
+
+        def run_par(frame: Frame):
+            ex.scheduler.run_par(
+                key,
+                label,
+                cost,
+                [partial(branch, copy_frames(frame)) for branch in branches],
+                ex.run_branches,
+            )
+
+        return run_par
+
+    def compile_ParReduce(self, node: ast.ParReduce) -> Closure:
+        ex = self.executor
+        branches = tuple(self.compile(call) for call in node.body)
+        reduction = node.token.value
+        key, label, cost = id(node), par_label(node), node.cost
+
+        def run_par_reduce(frame: Frame):
+            results = ex.scheduler.run_par(
+                key,
+                label,
+                cost,
+                [partial(branch, copy_frames(frame)) for branch in branches],
+                ex.run_branches,
+            )
+            return combine(reduction, results)
+
+        return run_par_reduce
+
+    def compile_ParFor(self, node: ast.ParFor) -> Closure:
+        ex = self.executor
+        start = self.compile(node.start)
+        end = self.compile(node.end)
+        _, slot = self.resolution.address(node.var)
+        body = self.compile_block(node.body)
+        key, name = id(node), node.var.token.value
+
+        def run_par_for(frame: Frame):
+            def worker():
+                def iteration(index: int):
+                    copied = copy_frames(frame)
+                    copied[slot] = index
+                    body(copied)
+
+                return iteration
+
+            ex.scheduler.run(
+                key, name, start(frame), end(frame), worker, ex.run_branches
+            )
+
+        return run_par_for
+
+    def compile_Seq(self, node: ast.Seq) -> Closure:
+        if self.dependencies is None:
+            self.dependencies = DependencyAnalyzer(self.resolution.functions())
+        plan = self.dependencies.schedule(node.body)
+        if plan is None:
+            return self.compile_block(node.body)
+
+        ex = self.executor
+        levels = tuple(
+            tuple(self.compile_stmt(stmt) for stmt in level) for level in plan
+        )
+
+        def run_seq(frame: Frame):
+            # as instruções de um nível compartilham o frame atual
+            for level in levels:
+                if len(level) == 1:
+                    level[0](frame)
+                else:
+                    ex.run_branches([partial(stmt, frame) for stmt in level])
+
+        return run_seq
+
+    def compile_Chan(self, node: ast.Chan) -> Closure:
+        capacity = self.compile(node.capacity)
+        # declarações ficam sempre no frame atual
+        _, slot = self.resolution.address(node.var)
+        name = node.var.token.value
+
+        def declare(frame: Frame):
+            frame[slot] = Channel(name, capacity(frame))
+
+        return declare
+
+    def compile_CChannel(self, node: ast.CChannel) -> Closure:
+        ex = self.executor
+        name, host, port = node.name, node.localhost, int(node.port)
+        return lambda _: ex.connect(name, host, port)
+
+    def compile_SChannel(self, node: ast.SChannel) -> Closure:
+        ex = self.executor
+        host, port = node.localhost, int(node.port)
+        description = self.compile(node.description)
+        function, depth = self.resolution.callee(node)  # type: ignore
+        compiled = self.function(function)
+        parent = self.parent(depth)
+
+        def serve(frame: Frame):
+            scope = parent(frame)
+            ex.serve(
+                host,
+                port,
+                description(frame),
+                lambda data: compiled.invoke(scope, [data]),
+            )
+
+        return serve
+
+    ###### COMPILE EXPRESSIONS #####
+
+    def compile_Constant(self, node: ast.Constant) -> Closure:
+        value = decode_constant(node)
+        return lambda _: value
+
+    def compile_ID(self, node: ast.ID) -> Closure:
+        depth, slot = self.resolution.address(node)
+
+        match depth:
+            case 0:
+                return lambda frame: frame[slot]
+            case 1:
+                return lambda frame: frame[STATIC_LINK][slot]
+            case _:
+                parent = self.parent(depth)
+                return lambda frame: parent(frame)[slot]
+
+    def compile_Access(self, node: ast.Access) -> Closure:
+        index = self.compile(node.expr)
+        var = self.compile_ID(node.id)
+
+        def access(frame: Frame):
+            i = index(frame)
+            return var(frame)[i]
+
+        return access
+
+    def compile_Logical(self, node: ast.Logical) -> Closure:
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+
+        match node.token.value:
+            case "&&":
+
+                def logical_and(frame: Frame):
+                    value = left(frame)
+                    if value:
+                        return right(frame)
+                    return value
+
+                return logical_and
+            case "||":
+
+                def logical_or(frame: Frame):
+                    value = left(frame)
+                    other = right(frame)
+                    return value or other
+
+                return logical_or
+            case _:
+                return nothing
+
+    compile_And = compile_Or = compile_Logical
+
+    def compile_binary(self, node: ast.Relational | ast.Arithmetic) -> Closure:
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        op = BINARY_OPERATORS.get(node.token.value)
+
+        if op is None:
+            return nothing
+
+        def binary(frame: Frame):
+            lvalue = left(frame)
+            rvalue = right(frame)
+            if lvalue is None or rvalue is None:
+                return
+            return op(lvalue, rvalue)
+
+        return binary
+
+    compile_Relational = compile_binary
+    compile_Arithmetic = compile_binary
+
+    def compile_typed(
+        self, node: ast.TypedRelational | ast.NumberArithmetic
+    ) -> Closure:
+        # tipos garantidos pela análise semântica dispensam o match sobre
+        # o operador, mas uma função sem return ainda produz None
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        op = node.op if hasattr(node, "op") else operator.add
+
+        def typed(frame: Frame):
+            lvalue = left(frame)
+            rvalue = right(frame)
+            if lvalue is None or rvalue is None:
+                return
+            return op(lvalue, rvalue)
+
+        return typed
+
+    compile_TypedRelational = compile_typed
+    compile_NumberArithmetic = compile_StringConcat = compile_typed
+
+    def compile_Unary(self, node: ast.Unary) -> Closure:
+        expr = self.compile(node.expr)
+
+        match node.token.value:
+            case "!":
+
+                def negation(frame: Frame):
+                    value = expr(frame)
+                    if value is None:
+                        return
+                    return not value
+
+                return negation
+            case "-":
+
+                def minus(frame: Frame):
+                    value = expr(frame)
+                    if value is None:
+                        return
+                    return value * (-1)
+
+                return minus
+            case _:
+                return nothing
+
+    def compile_ChannelCall(self, node: ast.ChannelCall) -> Closure:
+        channel = self.compile(node.id)  # type: ignore
+        method = getattr(Channel, str(node.oper))
+        args = tuple(self.compile(arg) for arg in node.args)
+        return lambda frame: method(
+            channel(frame), *[arg(frame) for arg in args]
+        )
+
+    def compile_Call(self, node: ast.Call) -> Closure:
+        ex = self.executor
+        func_name = node.oper if node.oper else node.token.value
+        args = tuple(self.compile(arg) for arg in node.args)
+
+        if func_name in CONNECTION_METHODS:
+            builtin = ex.default_functions[func_name]
+            conn_name = node.token.value
+            return lambda frame: builtin(
+                conn_name, *[arg(frame) for arg in args]
+            )
+
+        builtin = ex.default_functions.get(func_name)
+        if builtin:
+            match args:
+                case ():
+                    return lambda _: builtin()
+                case (arg,):
+                    return lambda frame: builtin(arg(frame))
+                case _:
+                    return lambda frame: builtin(*[arg(frame) for arg in args])
+
+        callee = self.resolution.callee(node)
+        if callee is None:
+            return nothing
+
+        function, depth = callee
+        compiled = self.function(function)
+        parent = self.parent(depth)
+
+        if ex.memo is not None and function.pure:
+            memo, name = ex.memo, function.name
+
+            def memo_call(frame: Frame):
+                values = [arg(frame) for arg in args]
+                key = memo.key(values)
+                value = memo.lookup(name, key)
+                if value is MISSING:
+                    value = compiled.invoke(parent(frame), values)
+                    memo.store(name, key, value)
+                return value
+
+            return memo_call
+
+        if compiled.defaults or len(args) != len(function.params):
+
+            def call(frame: Frame):
+                values = [arg(frame) for arg in args]
+                return compiled.invoke(parent(frame), values)
+
+            return call
+
+        # chamada sem valores padrão: monta o frame diretamente
+        padding = [None] * (compiled.size - len(args) - 1)
+
+        def fast_call(frame: Frame):
+            new = [parent(frame)]
+            for arg in args:
+                new.append(arg(frame))
+            new += padding
+            signal = compiled.body(new)
+            if type(signal) is tuple:
+                return signal[0]
+            return result(signal)
+
+        return fast_call
+
+
+@dataclass
+class ClosureExecutor(Executor):
+    """
+    Executor que compila a AST para closures antes de executá-la
+
+    Reutiliza as funções padrão e os canais do Executor; as variáveis
+    ficam em frames endereçados pelo Resolver no lugar da VarTable
+    """
+
+    def run(self, node: ast.Module):
+        resolution = Resolver().resolve(node)
+        program = ClosureCompiler(self, resolution).compile(node)
+        frame = [None] * resolution.frame_size(node)
+        program(frame)
+
+    def execute(self, node: ast.Node):
+        module = node if isinstance(node, ast.Module) else ast.Module([node])
+        return self.run(module)
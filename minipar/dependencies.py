@@ -0,0 +1,275 @@
+"""
+Módulo de Análise de Dependências
+
+O módulo de análise de dependências calcula, para cada instrução de um
+bloco seq, os conjuntos de leitura e escrita: variáveis, canais e os
+recursos usados pelas funções padrão (console e rede). As instruções
+são agrupadas em níveis; as de um mesmo nível não dependem umas das
+outras e podem executar em paralelo, e cada nível só começa quando o
+anterior termina, preservando a ordem das instruções dependentes
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from minipar import ast
+from minipar.loops import statements
+from minipar.resolver import walk
+from minipar.token import DEFAULT_FUNCTION_NAMES
+
+# Recursos externos, tratados como variáveis escritas por quem os usa
+CONSOLE = "<console>"
+NETWORK = "<network>"
+
+# Recurso usado por cada função padrão com efeitos visíveis
+RESOURCE_FUNCTIONS = {
+    "print": CONSOLE,
+    "input": CONSOLE,
+    "send": NETWORK,
+    "send_async": NETWORK,
+    "receive": NETWORK,
+    "send_all": NETWORK,
+    "close": NETWORK,
+}
+
+
+@dataclass
+class Access:
+    """
+    Conjuntos de leitura e escrita de uma instrução ou função
+
+    Attributes:
+        reads (set): nomes lidos
+        writes (set): nomes escritos, declarados ou recursos usados
+        barrier (bool): se a instrução não pode trocar de ordem com
+            nenhuma outra (blocos par, canais socket, funções
+            desconhecidas)
+    """
+
+    reads: set[str] = field(default_factory=set)
+    writes: set[str] = field(default_factory=set)
+    barrier: bool = False
+
+    def conflicts(self, other: "Access") -> bool:
+        """
+        Verifica se duas instruções dependem uma da outra
+        """
+        return (
+            self.barrier
+            or other.barrier
+            or not self.writes.isdisjoint(other.reads)
+            or not self.writes.isdisjoint(other.writes)
+            or not self.reads.isdisjoint(other.writes)
+        )
+
+    def update(self, other: "Access"):
+        self.reads |= other.reads
+        self.writes |= other.writes
+        self.barrier |= other.barrier
+
+
+@dataclass
+class DependencyAnalyzer:
+    """
+    Classe que escalona as instruções dos blocos seq
+
+    As funções do usuário são resumidas pelos nomes externos que leem e
+    escrevem, somados aos das funções que chamam. Funções aninhadas com o
+    mesmo nome têm os resumos unidos, mantendo a análise conservadora
+
+    Attributes:
+        roots (list): funções do programa; as aninhadas são encontradas
+            nos corpos
+        functions (dict): declarações de cada nome de função
+        summaries (dict | None): resumo de cada função, calculado no
+            primeiro uso
+    """
+
+    roots: Iterable[ast.FuncDef]
+    functions: dict[str, list[ast.FuncDef]] = field(default_factory=dict)
+    summaries: dict[str, Access] | None = None
+
+    def __post_init__(self):
+        for root in self.roots:
+            for node in [root, *statements(root.body)]:
+                if isinstance(node, ast.FuncDef):
+                    declarations = self.functions.setdefault(node.name, [])
+                    if all(node is not seen for seen in declarations):
+                        declarations.append(node)
+
+    def schedule(self, block: ast.Body | None) -> list[ast.Body] | None:
+        """
+        Agrupa as instruções de um bloco em níveis independentes
+
+        Returns:
+            list | None: instruções de cada nível, em ordem, ou None se
+                o bloco deve ser executado em sequência
+        """
+        if not block or len(block) < 2:
+            return None
+        # desvios de fluxo e declarações de funções mantêm a sequência
+        if any(
+            isinstance(
+                stmt, (ast.Return, ast.Break, ast.Continue, ast.FuncDef)
+            )
+            for stmt in statements(block)
+        ):
+            return None
+
+        accesses = [self.access(stmt) for stmt in block]
+        levels: list[int] = []
+        for index, access in enumerate(accesses):
+            level = 0
+            for previous in range(index):
+                if accesses[previous].conflicts(access):
+                    level = max(level, levels[previous] + 1)
+            levels.append(level)
+
+        if max(levels) + 1 == len(block):
+            return None
+        plan: list[ast.Body] = [[] for _ in range(max(levels) + 1)]
+        for stmt, level in zip(block, levels):
+            plan[level].append(stmt)
+        return plan
+
+    def access(self, stmt: ast.Node) -> Access:
+        """
+        Calcula os conjuntos de leitura e escrita de uma instrução,
+        incluindo os efeitos das funções chamadas
+        """
+        access = Access()
+        self.statement(stmt, access, None)
+        return access
+
+    ###### COLETA ######
+
+    def statement(
+        self, stmt: ast.Node, access: Access, calls: set[str] | None
+    ):
+        """
+        Coleta os acessos de uma instrução. Com `calls`, as funções do
+        usuário chamadas são apenas registradas; sem ele, seus resumos
+        são somados aos acessos
+        """
+        match stmt:
+            case ast.Assign():
+                self.expression(stmt.right, access, calls)
+                access.writes.add(stmt.left.token.value)
+            case ast.Chan():
+                self.expression(stmt.capacity, access, calls)
+                access.writes.add(stmt.var.token.value)
+            case ast.If():
+                self.expression(stmt.condition, access, calls)
+                self.block(stmt.body, access, calls)
+                self.block(stmt.else_stmt, access, calls)
+            case ast.While():
+                self.expression(stmt.condition, access, calls)
+                self.block(stmt.body, access, calls)
+            case ast.Seq():
+                self.block(stmt.body, access, calls)
+            case ast.Return():
+                self.expression(stmt.expr, access, calls)
+            case ast.Break() | ast.Continue() | ast.FuncDef():
+                pass
+            case ast.Expression():
+                self.expression(stmt, access, calls)
+            case _:
+                # blocos par, par for e canais socket
+                access.barrier = True
+
+    def block(
+        self, block: ast.Body | None, access: Access, calls: set[str] | None
+    ):
+        for stmt in block or []:
+            self.statement(stmt, access, calls)
+
+    def expression(
+        self, expr: ast.Expression, access: Access, calls: set[str] | None
+    ):
+        for node in walk(expr):
+            match node:
+                case ast.ID():
+                    access.reads.add(node.token.value)
+                case ast.ChannelCall():
+                    # put e get alteram a fila do canal
+                    access.writes.add(node.token.value)
+                case ast.Call() if node.oper:
+                    access.reads.add(node.token.value)
+                    access.writes.add(NETWORK)
+                case ast.Call():
+                    name = node.token.value
+                    if name in RESOURCE_FUNCTIONS:
+                        access.writes.add(RESOURCE_FUNCTIONS[name])
+                    elif name in DEFAULT_FUNCTION_NAMES:
+                        pass
+                    elif calls is not None:
+                        calls.add(name)
+                    else:
+                        access.update(self.summary(name))
+
+    ###### FUNÇÕES ######
+
+    def summary(self, name: str) -> Access:
+        """
+        Retorna o resumo de uma função; funções desconhecidas são
+        barreiras
+        """
+        if self.summaries is None:
+            self.summaries = self.summarize()
+        return self.summaries.get(name) or Access(barrier=True)
+
+    def summarize(self) -> dict[str, Access]:
+        summaries: dict[str, Access] = {}
+        callees: dict[str, set[str]] = {}
+        for name, declarations in self.functions.items():
+            summary = summaries[name] = Access()
+            calls = callees[name] = set()
+            for function in declarations:
+                access = Access()
+                for _, default in function.params.values():
+                    if default is not None:
+                        self.expression(default, access, calls)
+                self.block(function.body, access, calls)
+
+                # parâmetros e declarações internas não são visíveis fora
+                local = set(function.params) | declared_names(function.body)
+                summary.reads |= access.reads - local
+                summary.writes |= access.writes - local
+                summary.barrier |= access.barrier
+
+        # soma, até estabilizar, os resumos das funções chamadas
+        changed = True
+        while changed:
+            changed = False
+            for name, summary in summaries.items():
+                for callee in callees[name]:
+                    other = summaries.get(callee) or Access(barrier=True)
+                    before = (
+                        len(summary.reads),
+                        len(summary.writes),
+                        summary.barrier,
+                    )
+                    summary.update(other)
+                    after = (
+                        len(summary.reads),
+                        len(summary.writes),
+                        summary.barrier,
+                    )
+                    changed |= before != after
+        return summaries
+
+
+def declared_names(block: ast.Body | None) -> set[str]:
+    """
+    Coleta os nomes declarados em um bloco e nos blocos aninhados
+    """
+    names: set[str] = set()
+    for stmt in statements(block):
+        match stmt:
+            case ast.Assign(left=ast.ID(decl=True) as var):
+                names.add(var.token.value)
+            case ast.Chan():
+                names.add(stmt.var.token.value)
+            case ast.ParFor():
+                names.add(stmt.var.token.value)
+    return names
@@ -0,0 +1,447 @@
+"""
+Módulo de Execução Distribuída
+
+O módulo de execução distribuída executa os ramos dos blocos par em
+workers `minipar` que se conectam ao coordenador por TCP ou por sockets
+Unix. O programa é enviado uma única vez a cada worker, e as variáveis
+que os ramos de um bloco par usam, uma vez por bloco a cada worker que
+executa algum deles; cada ramo é enviado como uma mensagem curta com o
+índice da sua chamada e o identificador do bloco, e o valor retornado
+volta na resposta. Como os
+workers podem estar em outras máquinas, o paralelismo dos blocos par
+não fica limitado aos núcleos do coordenador.
+
+Antes de qualquer mensagem serializada, coordenador e worker provam um
+ao outro que conhecem a chave compartilhada em MINIPAR_AUTHKEY,
+respondendo a um desafio com o HMAC de um valor aleatório; com
+`-par-spawn` sem chave definida, o coordenador gera uma chave e a passa
+aos workers locais pelo ambiente
+"""
+
+import hashlib
+import hmac
+import itertools
+import os
+import pickle
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import Future, wait
+from dataclasses import dataclass, field
+from typing import Any
+
+from minipar import ast
+from minipar import error as err
+from minipar.framing import (
+    recv_exact,
+    recv_frame,
+    recv_message,
+    send_frame,
+    send_message,
+)
+from minipar.parallel import ProcessPool, initialize, run_branch
+from minipar.symtable import VarTable
+
+# Endereço padrão em que o coordenador espera pelos workers
+DEFAULT_ADDRESS = "127.0.0.1:7070"
+
+# Segundos que o coordenador espera pelos workers e que um worker tenta
+# se conectar ao coordenador
+CONNECT_TIMEOUT = 30.0
+
+# Segundos entre as tentativas de conexão de um worker
+RETRY_INTERVAL = 0.1
+
+# Variável de ambiente com a chave compartilhada por coordenador e workers
+AUTHKEY_VARIABLE = "MINIPAR_AUTHKEY"
+
+# Tamanho dos desafios da autenticação, em bytes
+CHALLENGE_SIZE = 32
+
+
+def parse_address(address: str) -> tuple[socket.AddressFamily, Any]:
+    """
+    Converte um endereço `host:porta` ou `unix:/caminho` para a família
+    e o endereço do socket
+    """
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address.removeprefix("unix:")
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise err.RunTimeError(f"endereço {address} inválido")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def format_address(family: socket.AddressFamily, address: Any) -> str:
+    if family == socket.AF_UNIX:
+        return f"unix:{address}"
+    host, port = address[:2]
+    return f"{host}:{port}"
+
+
+###### AUTENTICAÇÃO ######
+
+
+def authkey() -> bytes | None:
+    """
+    Retorna a chave compartilhada definida no ambiente, se existe
+    """
+    key = os.environ.get(AUTHKEY_VARIABLE)
+    return key.encode("utf-8") if key else None
+
+
+def challenge(sock: socket.socket, key: bytes):
+    """
+    Desafia o outro lado da conexão a provar que conhece a chave
+    """
+    nonce = secrets.token_bytes(CHALLENGE_SIZE)
+    sock.sendall(nonce)
+    answer = recv_exact(sock, CHALLENGE_SIZE)
+    expected = hmac.new(key, nonce, hashlib.sha256).digest()
+    if answer is None or not hmac.compare_digest(answer, expected):
+        raise err.RunTimeError("falha na autenticação da conexão")
+
+
+def respond(sock: socket.socket, key: bytes):
+    """
+    Responde ao desafio do outro lado da conexão
+    """
+    nonce = recv_exact(sock, CHALLENGE_SIZE)
+    if nonce is None:
+        raise err.RunTimeError("falha na autenticação da conexão")
+    sock.sendall(hmac.new(key, nonce, hashlib.sha256).digest())
+
+
+###### WORKER ######
+
+
+def serve_worker(address: str):
+    """
+    Executa um worker: conecta ao coordenador, recebe o programa e
+    executa os ramos enviados até o fim da conexão. Cada ramo executa
+    em uma thread própria, pois ramos podem esperar uns pelos outros.
+    As variáveis de um bloco ficam guardadas até o coordenador
+    liberá-las, ao fim do bloco
+    """
+    key = authkey()
+    if key is None:
+        raise err.RunTimeError(
+            "defina a chave compartilhada com o coordenador em "
+            f"{AUTHKEY_VARIABLE}"
+        )
+    family, target = parse_address(address)
+    deadline = time.monotonic() + CONNECT_TIMEOUT
+    while True:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.connect(target)
+            break
+        except OSError:
+            sock.close()
+            # o coordenador pode ainda não estar esperando
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(RETRY_INTERVAL)
+    if family != socket.AF_UNIX:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    # nada é desserializado antes de o coordenador provar a chave
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        respond(sock, key)
+        challenge(sock, key)
+    except OSError:
+        # o coordenador fecha a conexão quando a resposta não confere
+        raise err.RunTimeError("falha na autenticação da conexão") from None
+    sock.settimeout(None)
+
+    program = recv_frame(sock)
+    if program is None:
+        return
+    initialize(pickle.loads(program))
+    lock = threading.Lock()
+    blocks: dict[int, bytes] = {}
+
+    def run(request: int, index: int, variables: bytes):
+        try:
+            reply = (request, True, run_branch(index, variables))
+        except Exception as error:
+            traceback.print_exc()
+            reply = (request, False, str(error))
+        with lock:
+            send_message(sock, reply)
+
+    with sock:
+        while (message := recv_message(sock)) is not None:
+            match message:
+                case ("block", block, variables):
+                    blocks[block] = variables
+                case ("run", request, index, block):
+                    threading.Thread(
+                        target=run,
+                        args=(request, index, blocks[block]),
+                        daemon=True,
+                    ).start()
+                case ("release", block):
+                    blocks.pop(block, None)
+
+
+###### COORDENADOR ######
+
+
+@dataclass
+class RemoteWorker:
+    """
+    Conexão do coordenador com um worker
+
+    Attributes:
+        sock (socket): conexão com o worker
+        name (str): endereço do worker, para as mensagens de erro
+        pending (dict): resultado esperado de cada ramo enviado
+        alive (bool): se a conexão continua aberta
+        blocks (set): blocos par cujas variáveis o worker guarda
+    """
+
+    sock: socket.socket
+    name: str
+    pending: dict[int, Future] = field(default_factory=dict)
+    alive: bool = True
+    blocks: set[int] = field(default_factory=set)
+
+    def __post_init__(self):
+        self.lock = threading.Lock()
+        threading.Thread(target=self.receive, daemon=True).start()
+
+    def submit(self, request: int, index: int, block: int, variables: bytes):
+        """
+        Envia um ramo ao worker, precedido das variáveis do bloco se é o
+        primeiro ramo do bloco que o worker recebe
+
+        Returns:
+            Future: valor retornado pelo ramo
+        """
+        future: Future = Future()
+        with self.lock:
+            if not self.alive:
+                raise err.RunTimeError(f"worker {self.name} desconectado")
+            if block not in self.blocks:
+                send_message(self.sock, ("block", block, variables))
+                self.blocks.add(block)
+            self.pending[request] = future
+            send_message(self.sock, ("run", request, index, block))
+        return future
+
+    def release(self, block: int):
+        """
+        Libera as variáveis de um bloco que terminou
+        """
+        with self.lock:
+            if block not in self.blocks:
+                return
+            self.blocks.discard(block)
+            if self.alive:
+                try:
+                    send_message(self.sock, ("release", block))
+                except OSError:
+                    pass
+
+    def receive(self):
+        try:
+            while (reply := recv_message(self.sock)) is not None:
+                request, ok, value = reply
+                with self.lock:
+                    future = self.pending.pop(request)
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(
+                        err.RunTimeError(
+                            f"ramo remoto no worker {self.name} falhou: {value}"
+                        )
+                    )
+        except OSError:
+            pass
+        # ramos ainda sem resposta falham com a conexão
+        with self.lock:
+            self.alive = False
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            future.set_exception(
+                err.RunTimeError(f"worker {self.name} desconectado")
+            )
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+@dataclass
+class RemotePool(ProcessPool):
+    """
+    Conjunto de workers remotos que executa os ramos dos blocos par
+
+    O coordenador começa a esperar pelos workers na primeira execução
+    de um bloco par; cada ramo vai para o worker com menos ramos em
+    andamento
+
+    Attributes:
+        address (str): endereço em que o coordenador espera os workers
+        spawn (bool): se os workers são iniciados como processos locais
+        authkey (bytes | None): chave compartilhada com os workers
+        connections (list): workers conectados
+        listener (socket | None): socket que aceita os workers
+        spawned (list): processos de workers iniciados localmente
+    """
+
+    address: str = DEFAULT_ADDRESS
+    spawn: bool = False
+    authkey: bytes | None = None
+    connections: list[RemoteWorker] = field(default_factory=list)
+    listener: socket.socket | None = None
+    spawned: list[subprocess.Popen] = field(default_factory=list)
+
+    def __post_init__(self):
+        super().__post_init__()
+        self.requests = itertools.count()
+        self.blocks = itertools.count()
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        Espera a conexão dos workers e envia o programa a cada um
+        """
+        key = self.authkey or authkey()
+        if key is None and self.spawn:
+            key = secrets.token_hex(CHALLENGE_SIZE).encode("utf-8")
+        if key is None:
+            raise err.RunTimeError(
+                "defina a chave compartilhada com os workers em "
+                f"{AUTHKEY_VARIABLE}"
+            )
+        self.authkey = key
+        family, target = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(target):
+            os.unlink(target)
+        self.listener = socket.socket(family, socket.SOCK_STREAM)
+        if family != socket.AF_UNIX:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(target)
+        self.listener.listen(self.workers)
+        # com a porta 0, os workers locais recebem a porta escolhida
+        address = format_address(family, self.listener.getsockname())
+
+        if self.spawn:
+            # a chave vai pelo ambiente, e não pela linha de comando
+            env = {**os.environ, AUTHKEY_VARIABLE: key.decode("utf-8")}
+            for _ in range(self.workers):
+                self.spawned.append(
+                    subprocess.Popen(
+                        [
+                            sys.executable,
+                            "-m",
+                            "minipar",
+                            "-par-worker",
+                            address,
+                        ],
+                        env=env,
+                    )
+                )
+
+        # o programa é serializado uma única vez para todos os workers
+        program = pickle.dumps(self.module, pickle.HIGHEST_PROTOCOL)
+        self.listener.settimeout(CONNECT_TIMEOUT)
+        while len(self.connections) < self.workers:
+            try:
+                sock, peer = self.listener.accept()
+            except TimeoutError:
+                raise err.RunTimeError(
+                    f"apenas {len(self.connections)} de {self.workers} "
+                    f"workers se conectaram em {address}"
+                ) from None
+            name = format_address(family, peer) if peer else address
+            sock.settimeout(CONNECT_TIMEOUT)
+            try:
+                # quem não prova a chave não recebe o programa
+                challenge(sock, key)
+                respond(sock, key)
+            except (OSError, err.RunTimeError) as error:
+                print(f"worker {name} recusado: {error}", file=sys.stderr)
+                sock.close()
+                continue
+            sock.settimeout(None)
+            if family != socket.AF_UNIX:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            send_frame(sock, program)
+            self.connections.append(RemoteWorker(sock, name))
+
+    def run(self, calls: list[ast.Call], var_table: VarTable) -> list[Any]:
+        """
+        Envia os ramos de um bloco par aos workers e espera todos
+        terminarem
+
+        Returns:
+            list: valor retornado por cada ramo
+        """
+        with self.lock:
+            if self.listener is None:
+                self.start()
+
+        # as variáveis são serializadas uma única vez por bloco
+        variables = pickle.dumps(
+            self.variables(calls, var_table), pickle.HIGHEST_PROTOCOL
+        )
+        block = next(self.blocks)
+        # a saída do coordenador vem antes da saída dos ramos
+        sys.stdout.flush()
+        try:
+            futures = [
+                self.submit(self.indexes[id(call)], block, variables)
+                for call in calls
+            ]
+            # o erro de um ramo é relançado depois que todos terminaram
+            wait(futures)
+            return [future.result() for future in futures]
+        finally:
+            for worker in self.connections:
+                worker.release(block)
+
+    def submit(self, index: int, block: int, variables: bytes) -> Future:
+        while True:
+            alive = [worker for worker in self.connections if worker.alive]
+            if not alive:
+                raise err.RunTimeError("nenhum worker remoto conectado")
+            worker = min(alive, key=lambda worker: len(worker.pending))
+            try:
+                return worker.submit(
+                    next(self.requests), index, block, variables
+                )
+            except (OSError, err.RunTimeError):
+                # o worker caiu: o ramo vai para outro
+                worker.alive = False
+
+    def close(self):
+        """
+        Encerra as conexões com os workers e os workers locais
+        """
+        for worker in self.connections:
+            worker.close()
+        self.connections.clear()
+        if self.listener is not None:
+            family, target = parse_address(self.address)
+            self.listener.close()
+            self.listener = None
+            if family == socket.AF_UNIX and os.path.exists(target):
+                os.unlink(target)
+        for process in self.spawned:
+            try:
+                process.wait(CONNECT_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self.spawned.clear()
@@ -0,0 +1,485 @@
+"""
+Módulo de Execução Assíncrona
+
+O módulo de execução assíncrona executa o programa em um laço de
+eventos do asyncio: os ramos de um bloco par e os workers de um par
+for são tarefas, a E/S dos canais não bloqueia a thread e `sleep` cede
+o laço às demais tarefas. Os canais clientes usam as conexões do
+módulo de rede em threads auxiliares, reaproveitando o mesmo conjunto
+de conexões dos demais motores.
+
+Apenas as instruções e expressões que podem bloquear (chamadas a
+`sleep`, `input`, métodos de conexão, canais, blocos par e funções que
+os usam) são executadas como corrotinas; o restante do programa passa
+pelos métodos síncronos do Executor
+"""
+
+import asyncio
+import socket
+import traceback
+from dataclasses import dataclass, field, replace
+from time import perf_counter
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from minipar import ast
+from minipar.channels import EMPTY, Channel
+from minipar.executor import Executor, TailCall, combine, commands
+from minipar.framing import frame, read_frame
+from minipar.loops import statements
+from minipar.schedule import integer, raise_first
+from minipar.symtable import VarTable
+from minipar.token import CONNECTION_METHODS
+
+# Funções padrão que bloqueiam a thread na execução síncrona
+BLOCKING_FUNCTIONS = {"sleep", "input"}
+
+
+async def gather_branches(tasks: list) -> list[Any]:
+    """
+    Espera as tarefas dos ramos de um par ou de um nível de um seq e
+    retorna o valor de cada uma; o erro do primeiro ramo que falhou é
+    relançado depois que todos terminaram
+    """
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    raise_first(
+        [
+            result if isinstance(result, Exception) else None
+            for result in results
+        ]
+    )
+    return results
+
+
+@dataclass
+class AsyncExecutor(Executor):
+    """
+    Executor que roda o programa em um laço de eventos do asyncio
+
+    Attributes:
+        blocking_functions (set): funções do usuário que podem bloquear
+        blocking_nodes (dict): cache da classificação de cada nó
+        conditions (WeakKeyDictionary): condição de cada canal, em que
+            esperam as tarefas enquanto ele está cheio ou vazio
+    """
+
+    blocking_functions: set[str] = field(default_factory=set)
+    blocking_nodes: dict[int, bool] = field(default_factory=dict)
+    conditions: WeakKeyDictionary[Channel, asyncio.Condition] = field(
+        default_factory=WeakKeyDictionary
+    )
+
+    def run(self, node: ast.Module):
+        self.classify(node)
+        asyncio.run(self.run_block(node.stmts or []))
+
+    def branch(self, var_table, function_table) -> Executor:
+        return type(self)(
+            var_table,
+            function_table,
+            memo=self.memo,
+            scheduler=self.scheduler,
+            network=self.network,
+            blocking_functions=self.blocking_functions,
+            blocking_nodes=self.blocking_nodes,
+            conditions=self.conditions,
+        )
+
+    ###### CLASSIFICAÇÃO ######
+
+    def classify(self, module: ast.Module):
+        """
+        Marca as funções que podem bloquear: as que usam E/S, canais ou
+        par, e as que chamam outras funções que bloqueiam
+        """
+        functions: dict[str, ast.FuncDef] = {}
+        for stmt in statements(module.stmts):
+            if isinstance(stmt, ast.FuncDef):
+                functions.setdefault(stmt.name, stmt)
+
+        # adiciona, até estabilizar, as funções que passam a bloquear
+        changed = True
+        while changed:
+            changed = False
+            for name, function in functions.items():
+                if name in self.blocking_functions:
+                    continue
+                if any(self.blocks(stmt) for stmt in function.body):
+                    self.blocking_functions.add(name)
+                    self.blocking_nodes.clear()
+                    changed = True
+
+    def blocks(self, node: ast.Node | None) -> bool:
+        """
+        Verifica, com cache, se um nó pode bloquear a thread
+        """
+        if node is None:
+            return False
+        key = id(node)
+        blocking = self.blocking_nodes.get(key)
+        if blocking is None:
+            blocking = self.blocking_nodes[key] = self.check(node)
+        return blocking
+
+    def blocks_any(self, block: ast.Body) -> bool:
+        """
+        Verifica, com cache, se alguma instrução de um bloco pode bloquear
+        """
+        key = id(block)
+        blocking = self.blocking_nodes.get(key)
+        if blocking is None:
+            blocking = self.blocking_nodes[key] = any(map(self.blocks, block))
+        return blocking
+
+    def check(self, node: ast.Node) -> bool:
+        match node:
+            case ast.Par() | ast.ParReduce() | ast.ParFor():
+                return True
+            case ast.SChannel() | ast.CChannel():
+                return True
+            case ast.Call() if node.oper:
+                return True
+            case ast.Call():
+                name = node.token.value
+                if name in self.default_functions:
+                    blocking = name in BLOCKING_FUNCTIONS
+                else:
+                    blocking = name in self.blocking_functions
+                return blocking or any(map(self.blocks, node.args))
+            case ast.Assign():
+                return self.blocks(node.right)
+            case ast.Return():
+                return self.blocks(node.expr)
+            case ast.If():
+                return (
+                    self.blocks(node.condition)
+                    or any(map(self.blocks, node.body or []))
+                    or any(map(self.blocks, node.else_stmt or []))
+                )
+            case ast.While():
+                return self.blocks(node.condition) or any(
+                    map(self.blocks, node.body)
+                )
+            case ast.Seq():
+                return any(map(self.blocks, node.body or []))
+            case ast.Logical() | ast.Relational() | ast.Arithmetic():
+                return self.blocks(node.left) or self.blocks(node.right)
+            case ast.Unary():
+                return self.blocks(node.expr)
+            case ast.Access():
+                return self.blocks(node.expr)
+            case _:
+                return False
+
+    ###### INSTRUÇÕES ######
+
+    async def run_block(self, block: ast.Body):
+        """
+        Executa um bloco, com os mesmos sinais de Executor.exec_block
+        """
+        if not self.blocks_any(block):
+            return self.exec_block(block)
+
+        for instruction in block:
+            if not self.blocks(instruction):
+                ret = self.exec_block([instruction])
+                if isinstance(instruction, ast.Return):
+                    return ret
+            elif isinstance(instruction, ast.Return):
+                return await self.evaluate(instruction.expr)
+            else:
+                meth_name = f"run_{type(instruction).__name__}"
+                ret = await getattr(self, meth_name)(instruction)
+            if ret is not None:
+                return ret
+        return None
+
+    async def run_Assign(self, node: ast.Assign):
+        value = await self.evaluate(node.right)
+        self.exec_Assign(replace(node, right=self.value(value)))
+
+    async def run_Call(self, node: ast.Call):
+        await self.evaluate(node)
+
+    run_ChannelCall = run_Call
+
+    async def run_If(self, node: ast.If):
+        condition = await self.evaluate(node.condition)
+        block = node.body if condition else node.else_stmt
+        if not block:
+            return None
+        if not self.needs_scope(block):
+            return await self.run_block(block)
+        self.enter_scope()
+        ret = await self.run_block(block)
+        self.exit_scope()
+        return ret
+
+    async def run_While(self, node: ast.While):
+        condition = await self.evaluate(node.condition)
+        scoped = self.needs_scope(node.body)
+        if scoped:
+            self.enter_scope()
+        while condition:
+            ret = await self.run_block(node.body)
+            if ret == commands.BREAK:
+                break
+            elif ret is not None and ret != commands.CONTINUE:
+                if scoped:
+                    self.exit_scope()
+                return ret
+            condition = await self.evaluate(node.condition)
+        if scoped:
+            self.exit_scope()
+
+    run_CountingWhile = run_While
+
+    async def run_Seq(self, node: ast.Seq):
+        plan = self.seq_plan(node)
+        scoped = self.needs_scope(node.body)
+        if scoped:
+            self.enter_scope()
+        if plan is None:
+            ret = await self.run_block(node.body or [])
+        else:
+            ret = None
+            # os ramos escrevem na mesma cadeia de tabelas
+            self.var_table.own()
+            for level in plan:
+                tasks = [
+                    self.branch(self.var_table, self.function_table).run_block(
+                        [instruction]
+                    )
+                    for instruction in level
+                ]
+                await gather_branches(tasks)
+        if scoped:
+            self.exit_scope()
+        return ret
+
+    async def run_Par(self, node: ast.Par):
+        await self.par_results_async(node.body)
+
+    async def par_results_async(self, calls: ast.Body) -> list[Any]:
+        """
+        Executa os ramos de um par como tarefas e retorna o valor de cada
+        um; o erro do primeiro ramo que falhou é relançado depois que
+        todos terminaram
+        """
+        tasks = []
+        for instruction in calls:
+            executor = self.branch(
+                self.var_table.snapshot(), dict(self.function_table)
+            )
+            tasks.append(asyncio.create_task(executor.evaluate(instruction)))
+        return await gather_branches(tasks)
+
+    async def run_ParFor(self, node: ast.ParFor):
+        name = node.var.token.value
+        start = integer(await self.evaluate(node.start), name)
+        end = integer(await self.evaluate(node.end), name)
+        if end <= start:
+            return
+        indexes = iter(range(start, end))
+        functions = dict(self.function_table)
+        count = min(self.scheduler.workers, end - start)
+        done = [0] * count
+        busy = [0.0] * count
+
+        async def worker(position: int):
+            executor = self.branch(self.var_table, functions)
+            # os workers retiram os índices do mesmo iterador e cedem o
+            # laço a cada iteração, então cada índice é um bloco
+            for index in indexes:
+                executor.var_table = VarTable(
+                    {name: index}, self.var_table.snapshot()
+                )
+                began = perf_counter()
+                await executor.run_block(node.body)
+                busy[position] += perf_counter() - began
+                done[position] += 1
+                await asyncio.sleep(0)
+
+        await gather_branches([worker(position) for position in range(count)])
+        # mesmas métricas do Scheduler.run, exibidas por -par-stats
+        self.scheduler.record(id(node), name, done, busy, sum(done))
+
+    async def run_CChannel(self, node: ast.CChannel):
+        # a conexão vem do conjunto do módulo de rede, como no Executor
+        await asyncio.to_thread(
+            self.connect, node.name, node.localhost, int(node.port)
+        )
+
+    async def run_SChannel(self, node: ast.SChannel):
+        function: ast.FuncDef = self.function_table[node.func_name]
+        description = await self.evaluate(node.description)
+        limit = self.network.accept_limit
+        slots = asyncio.Semaphore(self.network.max_clients)
+        clients: set[asyncio.Task] = set()
+        accepted = 0
+        self.var_table.own()
+
+        async def serve(
+            reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        ):
+            nonlocal accepted
+            accepted += 1
+            if limit and accepted >= limit:
+                server.close()
+            clients.add(asyncio.current_task())  # type: ignore
+            # como no Executor, cada cliente tem um executor próprio e
+            # compartilha as variáveis com os demais
+            executor = self.branch(self.var_table, self.function_table)
+            async with slots:
+                try:
+                    writer.write(frame(description.encode("utf-8")))
+                    await writer.drain()
+                    while (payload := await read_frame(reader)) is not None:
+                        data = payload.decode("utf-8")
+                        print(f"received: {data}")
+                        ret = await executor.call_async(function, [data])
+                        writer.write(frame(str(ret).encode("utf-8")))
+                        await writer.drain()
+                except OSError:
+                    pass
+                except Exception:
+                    traceback.print_exc()
+                finally:
+                    writer.close()
+
+        server = await asyncio.start_server(
+            serve, node.localhost, int(node.port), backlog=socket.SOMAXCONN
+        )
+        async with server:
+            if not limit:
+                await server.serve_forever()
+            await server.wait_closed()
+        await asyncio.gather(*clients, return_exceptions=True)
+
+    ###### EXPRESSÕES ######
+
+    async def evaluate(self, node: ast.Expression) -> Any:
+        """
+        Avalia uma expressão, aguardando apenas as partes que bloqueiam
+        """
+        if not self.blocks(node):
+            return self.execute(node)
+
+        match node:
+            case ast.Call():
+                return await self.evaluate_call(node)
+            case ast.ParReduce():
+                results = await self.par_results_async(node.body)
+                return combine(node.token.value, results)
+            case ast.Logical() if node.token.value == "&&":
+                left = await self.evaluate(node.left)
+                return await self.evaluate(node.right) if left else left
+            case ast.Logical() | ast.Relational() | ast.Arithmetic():
+                left = await self.evaluate(node.left)
+                right = await self.evaluate(node.right)
+                return self.execute(
+                    replace(
+                        node, left=self.value(left), right=self.value(right)
+                    )
+                )
+            case ast.Unary() | ast.Access():
+                expr = await self.evaluate(node.expr)
+                return self.execute(replace(node, expr=self.value(expr)))
+            case _:
+                return self.execute(node)
+
+    async def evaluate_call(self, node: ast.Call):
+        args = [await self.evaluate(arg) for arg in node.args]
+        name = node.token.value
+
+        if isinstance(node, ast.ChannelCall):
+            channel: Channel = self.execute(node.id)  # type: ignore
+            return await self.channel_call(channel, str(node.oper), args)
+        if node.oper in CONNECTION_METHODS:
+            # a E/S da conexão espera em outra thread, liberando o laço
+            return await asyncio.to_thread(
+                self.default_functions[node.oper], name, *args
+            )
+        if node.oper:
+            return None
+
+        match name:
+            case "sleep":
+                await asyncio.sleep(*args)
+                return None
+            case "input":
+                return await asyncio.to_thread(input, *args)
+            case _ if name in self.default_functions:
+                return self.default_functions[name](*args)
+
+        function = self.function_table.get(name)
+        if function is None:
+            return None
+        return await self.call_async(function, args)
+
+    async def channel_call(self, channel: Channel, method: str, args: list):
+        """
+        Executa um método de canal sem bloquear o laço de eventos: todos
+        os métodos executam sob a condição do canal, put e get esperam
+        nela enquanto ele está cheio ou vazio, e cada valor enviado ou
+        recebido acorda as tarefas que esperam
+        """
+        condition = self.conditions.get(channel)
+        if condition is None:
+            condition = self.conditions[channel] = asyncio.Condition()
+        async with condition:
+            match method:
+                case "put":
+                    while not channel.try_put(args[0]):
+                        await condition.wait()
+                    value = None
+                case "get":
+                    while (value := channel.try_get(EMPTY)) is EMPTY:
+                        await condition.wait()
+                case "try_put":
+                    value = channel.try_put(args[0])
+                    if not value:
+                        return value
+                case "try_get":
+                    value = channel.try_get(EMPTY)
+                    if value is EMPTY:
+                        return args[0]
+                case _:
+                    return getattr(channel, method)(*args)
+            condition.notify_all()
+        return value
+
+    async def call_async(self, function: ast.FuncDef, args: list[Any]):
+        """
+        Executa uma função do usuário no laço de eventos; funções que não
+        bloqueiam seguem pelo Executor
+        """
+        if function.name not in self.blocking_functions:
+            return self.call(function, args)
+
+        saved = self.var_table
+        scope = self.definition_scope(function)
+        try:
+
+            while True:
+                self.var_table = VarTable(prev=scope)
+
+                for param in function.params.items():
+                    name, (_, default) = param
+                    if default:
+                        value = await self.evaluate(default)
+                        self.var_table.table[name] = value
+
+                for param, value in zip(function.params.keys(), args):
+                    self.var_table.table[param] = value
+
+                ret = await self.run_block(function.body)
+                if not isinstance(ret, TailCall):
+                    return ret
+                function, args, scope = ret.function, ret.args, ret.scope
+                if function.name not in self.blocking_functions:
+                    self.var_table = scope
+                    return self.call(function, args)
+
+        finally:
+            self.var_table = saved
@@ -1,15 +1,40 @@
-import socket
 import threading
 from abc import ABC, abstractmethod
-from copy import deepcopy
-from dataclasses import dataclass, field
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
 from enum import Enum
+from functools import partial
 from time import sleep
+from typing import TYPE_CHECKING, Any
 
 from minipar import ast
 from minipar import error as err
+from minipar.channels import Channel
+from minipar.dependencies import DependencyAnalyzer
+from minipar.memo import MISSING, Memoizer
+from minipar.network import ClientConnection, Network
+from minipar.optimizer import declares
+from minipar.schedule import Scheduler, par_label, raise_first
 from minipar.symtable import VarTable
-from minipar.token import Token
+from minipar.token import CONNECTION_METHODS
+
+if TYPE_CHECKING:
+    from minipar.parallel import ProcessPool, ThreadPool
+
+# Tipos aceitos pelo caminho rápido dos laços com contador
+NUMBER_TYPES = (int, float)
+
+# Chamadas do usuário aninhadas que executam na pilha do Python; as mais
+# profundas seguem pela pilha explícita de Executor.trampoline
+DIRECT_CALLS = 32
+
+# Funções que combinam os resultados dos ramos de um par
+REDUCE_FUNCTIONS: dict[str, Callable[[list[Any]], Any]] = {
+    "sum": sum,
+    "min": min,
+    "max": max,
+    "concat": "".join,
+}
 
 
 class commands(Enum):
@@ -18,6 +43,47 @@ class commands(Enum):
     RETURN = "RETURN"
 
 
+@dataclass
+class TailCall:
+    """
+    Chamada em posição de cauda, retornada por exec_Return para que
+    exec_Call execute a função chamada no lugar da atual
+
+    Attributes:
+        function (FuncDef): função chamada
+        args (list): valores dos argumentos, já avaliados
+        scope (VarTable): escopo em que a função chamada foi declarada,
+            ao qual o escopo da chamada é ligado, como em uma chamada
+            comum
+    """
+
+    function: ast.FuncDef
+    args: list[Any]
+    scope: VarTable
+
+
+@dataclass
+class Resolved(ast.Expression):
+    """
+    Valor já calculado de uma subexpressão, usado para reaproveitar a
+    avaliação síncrona do nó que a contém
+    """
+
+    value: Any = None
+
+
+def combine(reduction: str, results: list[Any]) -> Any:
+    """
+    Combina os resultados dos ramos de um par com uma redução; apenas os
+    valores retornados voltam dos ramos
+    """
+    if any(result is MISSING or result is None for result in results):
+        raise err.RunTimeError(
+            f"ramo do par {reduction} terminou sem resultado"
+        )
+    return REDUCE_FUNCTIONS[reduction](results)
+
+
 class IExecutor(ABC):
 
     @abstractmethod
@@ -42,7 +108,16 @@ class Executor(IExecutor):
 
     var_table: VarTable = field(default_factory=VarTable)
     function_table: dict[str, ast.FuncDef] = field(default_factory=dict)
-    connection_table: dict[str, socket.socket] = field(default_factory=dict)
+    connection_table: dict[str, ClientConnection] = field(default_factory=dict)
+    block_scopes: dict[int, bool] = field(default_factory=dict)
+    seq_plans: dict[int, list[ast.Body] | None] = field(default_factory=dict)
+    memo: Memoizer | None = None
+    processes: "ProcessPool | None" = None
+    threads: "ThreadPool | None" = None
+    scheduler: Scheduler = field(default_factory=Scheduler)
+    network: Network = field(default_factory=Network)
+    call_nodes: dict[int, bool] = field(default_factory=dict)
+    depth: int = 0
 
     def __post_init__(self):
         self.default_functions = {
@@ -53,6 +128,9 @@ class Executor(IExecutor):
             "to_bool": bool,
             "sleep": sleep,
             "send": self.send,
+            "send_async": self.send_async,
+            "receive": self.receive,
+            "send_all": self.send_all,
             "close": self.close,
             "len": len,
             "isalpha": self.isalpha,
@@ -80,6 +158,19 @@ class Executor(IExecutor):
             # print("SAINDO DE UM ESCOPO")
             self.var_table = self.var_table.prev
 
+    def needs_scope(self, block: ast.Body | None) -> bool:
+        """
+        Verifica, com cache, se um bloco precisa de um escopo próprio
+        """
+        if not block:
+            return False
+        key = id(block)
+        needed = self.block_scopes.get(key)
+        if needed is None:
+            needed = declares(block)
+            self.block_scopes[key] = needed
+        return needed
+
     ###### EXECUTE STATEMENTS #####
     def exec_Assign(self, node: ast.Assign):
         right_value = self.execute(node.right)
@@ -87,14 +178,35 @@ class Executor(IExecutor):
         decl = getattr(node.left, "decl")
         vt = self.var_table.find(var_name)
         if decl or not vt:
-            self.var_table.table[var_name] = right_value
+            vt = self.var_table
+        if vt.shared:
+            # tabela compartilhada com um ramo paralelo: copy-on-write
+            vt.write(var_name, right_value)
         else:
             vt.table[var_name] = right_value
 
         return var_name
 
     def exec_Return(self, node: ast.Return):
-        return self.execute(node.expr)
+        expr: ast.Call = node.expr  # type: ignore
+        function = self.tail_callee(expr)
+        if function is not None:
+            # chamada em posição de cauda: call_function reaproveita o
+            # próprio laço no lugar de uma nova recursão
+            args = [self.execute(arg) for arg in expr.args]
+            return TailCall(function, args, self.definition_scope(function))
+        return self.execute(expr)
+
+    def tail_callee(self, expr: ast.Expression) -> ast.FuncDef | None:
+        """
+        Retorna a função do usuário chamada por um return, ou None se o
+        valor retornado não é uma chamada a uma função do usuário
+        """
+        if not isinstance(expr, ast.Call) or expr.oper:
+            return None
+        if expr.token.value in self.default_functions:
+            return None
+        return self.function_table.get(expr.token.value)
 
     def exec_Break(self, _: ast.Break):
         return commands.BREAK
@@ -105,6 +217,9 @@ class Executor(IExecutor):
     def exec_FuncDef(self, node: ast.FuncDef):
         if node.name not in self.function_table:
             self.function_table[node.name] = node
+        if self.function_table[node.name] is node:
+            # o escopo da declaração é o escopo externo das chamadas
+            self.var_table.functions |= {node.name}
 
     def exec_block(self, block: ast.Body):
         ret = None
@@ -113,6 +228,11 @@ class Executor(IExecutor):
                 self.exec_Assign(instruction)
             elif isinstance(instruction, ast.Return):
                 return self.execute(instruction)
+            elif isinstance(instruction, ast.ChannelCall):
+                self.exec_ChannelCall(instruction)
+            elif isinstance(instruction, ast.Call):
+                # valor de uma chamada usada como instrução é descartado
+                self.exec_Call(instruction)
             else:
                 ret = self.execute(instruction)
             if ret is not None or ret in (commands.BREAK, commands.CONTINUE):
@@ -122,85 +242,277 @@ class Executor(IExecutor):
 
     def exec_If(self, node: ast.If):
         condition = self.execute(node.condition)
-        ret = None
+        block = node.body if condition else node.else_stmt
+        if not block:
+            return None
+        if not self.needs_scope(block):
+            return self.exec_block(block)
         self.enter_scope()
-        if condition:
-            ret = self.exec_block(node.body)
-        elif node.else_stmt:
-            ret = self.exec_block(node.else_stmt)
+        ret = self.exec_block(block)
         self.exit_scope()
         return ret
 
     def exec_While(self, node: ast.While):
         condition = self.execute(node.condition)
-        self.enter_scope()
+        # blocos sem declarações dispensam um escopo próprio
+        scoped = self.needs_scope(node.body)
+        if scoped:
+            self.enter_scope()
+        ret = None
+        iterations = 0
         while condition:
-            ret = self.exec_block(node.body)
+            iterations += 1
+            signal = self.exec_block(node.body)
+            if signal == commands.BREAK:
+                break
+            elif signal is not None and signal != commands.CONTINUE:
+                ret = signal
+                break
             condition = self.execute(node.condition)
-            if ret == commands.BREAK:
+        if scoped:
+            self.exit_scope()
+        self.back_edges(iterations)
+        return ret
+
+    def exec_CountingWhile(self, node: ast.CountingWhile):
+        condition: ast.TypedRelational = node.condition  # type: ignore
+        name = condition.left.token.value
+        scope = self.var_table.find(name)
+        counter = scope.table[name] if scope else None
+        limit = self.execute(condition.right)
+        if not isinstance(counter, NUMBER_TYPES) or not isinstance(
+            limit, NUMBER_TYPES
+        ):
+            return self.exec_While(node)
+
+        # o contador é atualizado direto na tabela em que foi declarado,
+        # sem reavaliar a condição e o incremento pela AST
+        body, op, step = node.body[:-1], condition.op, node.step
+        scope.write(name, counter)  # garante uma tabela própria
+        table = scope.table
+        scoped = self.needs_scope(node.body)
+        if scoped:
+            self.enter_scope()
+        ret = None
+        start = counter
+        while op(counter, limit):
+            signal = self.exec_block(body)
+            if signal == commands.BREAK:
                 break
-            elif ret == commands.CONTINUE:
-                continue
-            else:
-                if ret:
-                    return ret
-        self.exit_scope()
+            elif signal is not None:
+                ret = signal
+                break
+            counter += step
+            table[name] = counter
+        if scoped:
+            self.exit_scope()
+        # as iterações saem do próprio contador, sem custo no laço
+        self.back_edges(round((counter - start) / step) if step else 0)
+        return ret
 
-    def exec_Par(self, node: ast.Par):
-        threads = []
+    def back_edges(self, iterations: int):
+        """
+        Recebe a quantidade de iterações de um laço que terminou, para
+        executores que perfilam a execução; o Executor as ignora
+        """
 
-        for instruction in node.body:
-            thread_var_table = deepcopy(self.var_table)
-            thread_func_table = deepcopy(self.function_table)
-            new_executor = Executor(thread_var_table, thread_func_table)
-            t = threading.Thread(
-                target=new_executor.execute, args=(instruction,)
+    def exec_Par(self, node: ast.Par):
+        self.par_results(node)
+
+    def exec_ParReduce(self, node: ast.ParReduce):
+        return combine(node.token.value, self.par_results(node))
+
+    def par_results(self, node: ast.Par | ast.ParReduce) -> list[Any]:
+        """
+        Executa as chamadas dos ramos de um par e retorna o valor de cada
+        uma
+        """
+        calls = node.body
+        if (
+            self.processes is not None
+            and not self.connection_table
+            and self.processes.accepts(calls, self.var_table)
+        ):
+            # conexões abertas e canais não podem ser enviados a outro
+            # processo
+            return self.processes.run(calls, self.var_table)  # type: ignore
+
+        branches = []
+        for instruction in calls:
+            # os ramos compartilham as definições de funções e enxergam as
+            # variáveis por cópias feitas apenas quando são alteradas
+            new_executor = self.branch(
+                self.var_table.snapshot(), dict(self.function_table)
             )
+            branches.append(partial(new_executor.execute, instruction))
+        return self.scheduler.run_par(
+            id(node), par_label(node), node.cost, branches, self.run_branches
+        )
+
+    def exec_ParFor(self, node: ast.ParFor):
+        start = self.execute(node.start)
+        end = self.execute(node.end)
+        name = node.var.token.value
+        functions = dict(self.function_table)
+
+        def worker():
+            executor = self.branch(self.var_table, functions)
+
+            def iteration(index: int):
+                # cada iteração enxerga as variáveis de antes do laço e
+                # altera apenas cópias próprias
+                executor.var_table = VarTable(
+                    {name: index}, self.var_table.snapshot()
+                )
+                executor.exec_block(node.body)
+
+            return iteration
+
+        self.scheduler.run(
+            id(node), name, start, end, worker, self.run_branches
+        )
+
+    def run_branches(self, branches: list[Callable[[], Any]]):
+        """
+        Executa os ramos de um bloco par ou de um nível de um bloco seq,
+        no conjunto de threads quando ele existe, e espera todos
+        terminarem; o erro do primeiro ramo que falhou é relançado
+        """
+        if self.threads is not None:
+            return self.threads.run(branches)
+
+        errors: list[Exception | None] = [None] * len(branches)
+
+        def run(index: int, branch: Callable[[], Any]):
+            try:
+                branch()
+            except Exception as error:
+                errors[index] = error
+
+        threads = []
+        for index, branch in enumerate(branches):
+            t = threading.Thread(target=run, args=(index, branch))
             threads.append(t)
             t.start()
 
         for t in threads:
             t.join()
+        raise_first(errors)
+
+    def branch(
+        self, var_table: VarTable, function_table: dict[str, ast.FuncDef]
+    ) -> "Executor":
+        """
+        Cria o executor de um ramo paralelo, com as mesmas opções
+        """
+        return type(self)(
+            var_table,
+            function_table,
+            memo=self.memo,
+            threads=self.threads,
+            scheduler=self.scheduler,
+            network=self.network,
+        )
+
+    def seq_plan(self, node: ast.Seq) -> list[ast.Body] | None:
+        """
+        Retorna, com cache, os níveis de instruções independentes de um
+        bloco seq, ou None se ele deve ser executado em sequência
+        """
+        key = id(node)
+        if key not in self.seq_plans:
+            analyzer = DependencyAnalyzer(self.function_table.values())
+            self.seq_plans[key] = analyzer.schedule(node.body)
+        return self.seq_plans[key]
+
+    def exec_Seq(self, node: ast.Seq):
+        plan = self.seq_plan(node)
+        scoped = self.needs_scope(node.body)
+        if scoped:
+            self.enter_scope()
+        if plan is None:
+            ret = self.exec_block(node.body or [])
+        else:
+            ret = None
+            # os ramos escrevem na mesma cadeia de tabelas
+            self.var_table.own()
+            for level in plan:
+                if len(level) == 1:
+                    self.exec_block(level)
+                    continue
+                self.run_branches(
+                    [
+                        partial(
+                            self.branch(
+                                self.var_table, self.function_table
+                            ).exec_block,
+                            [instruction],
+                        )
+                        for instruction in level
+                    ]
+                )
+        if scoped:
+            self.exit_scope()
+        return ret
 
-    def exec_Seq(self, _: ast.Seq):
-        pass
+    def exec_Chan(self, node: ast.Chan):
+        name = node.var.token.value
+        channel = Channel(name, self.execute(node.capacity))
+        if self.var_table.shared:
+            self.var_table.write(name, channel)
+        else:
+            self.var_table.table[name] = channel
 
     def exec_CChannel(self, node: ast.CChannel):
-        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        client.connect((node.localhost, int(node.port)))
-        print(client.recv(2040).decode())
-        self.connection_table[node.name] = client
+        self.connect(node.name, node.localhost, int(node.port))
 
     def exec_SChannel(self, node: ast.SChannel):
-        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        server.bind((node.localhost, int(node.port)))
-        server.listen(10)
-        conn, _ = server.accept()
-        description = self.execute(node.description)
-        if description:
-            conn.send(description.encode("utf-8"))
-
         function: ast.FuncDef = self.function_table[node.func_name]
-        while True:
-            data = conn.recv(2048).decode()
-            print(f"received: {data}")
-            if not data:
-                conn.close()
-                break
-
-            call = ast.Call(
-                type=function.return_type,
-                token=Token("ID", function.name),
-                args=[
-                    ast.Constant(type="STRING", token=Token("STRING", data))
-                ],
-                id=None,
-                oper=None,
-            )
 
-            ret = self.exec_Call(call)
+        # como nos blocos seq, os clientes atendidos ao mesmo tempo
+        # compartilham as variáveis; cada thread do servidor cria uma
+        # única vez o seu executor, e cada mensagem apenas liga o
+        # argumento ao parâmetro da função já resolvida
+        self.var_table.own()
+        executors = threading.local()
+
+        def handler(data: str):
+            executor = getattr(executors, "executor", None)
+            if executor is None:
+                executor = executors.executor = self.branch(
+                    self.var_table, self.function_table
+                )
+            return executor.call(function, [data])
 
-            conn.send(str(ret).encode("utf-8"))
+        description = self.execute(node.description)
+        self.serve(node.localhost, int(node.port), description, handler)
+
+    ######  CHANNELS ######
+
+    def connect(self, name: str, host: str, port: int):
+        """
+        Abre a conexão de um canal cliente e exibe a descrição do servidor
+        """
+        previous = self.connection_table.pop(name, None)
+        if previous is not None:
+            # o canal redeclarado devolve a conexão anterior ao conjunto
+            self.network.release(previous)
+        connection = self.network.connect(host, port)
+        print(connection.description)
+        self.connection_table[name] = connection
+
+    def serve(
+        self,
+        host: str,
+        port: int,
+        description: str,
+        handler: Callable[[str], Any],
+    ):
+        """
+        Atende os clientes do canal servidor, respondendo cada mensagem
+        com o retorno do handler
+        """
+        self.network.serve(host, port, description, handler)
 
     ######  PERSONALIZED FUNCTIONS ######
 
@@ -217,27 +529,44 @@ class Executor(IExecutor):
         return str(value).isnumeric()
 
     def send(self, conn_name: str, data: str):
-        client = self.connection_table[conn_name]
+        return self.network.request(self.client(conn_name), data)
+
+    def send_async(self, conn_name: str, data: str):
+        return self.network.submit(self.client(conn_name), [data])[0]
 
-        client.send(data.encode("utf-8"))
+    def receive(self, conn_name: str, handle: int | float):
+        return self.network.wait(self.client(conn_name), handle)
 
-        return client.recv(2048).decode("utf-8")
+    def send_all(self, conn_name: str, messages: str, separator: str):
+        if not separator:
+            raise err.RunTimeError("send_all espera um separador não vazio")
+        replies = self.network.pipeline(
+            self.client(conn_name), messages.split(separator)
+        )
+        return separator.join(replies)
 
     def close(self, conn_name: str):
-        client = self.connection_table[conn_name]
+        self.network.release(self.client(conn_name))
+        del self.connection_table[conn_name]
 
-        client.close()
+    def client(self, conn_name: str) -> ClientConnection:
+        client = self.connection_table.get(conn_name)
+        if client is None:
+            raise err.RunTimeError(f"conexão {conn_name} fechada")
+        return client
 
     ###### EXECUTE EXPRESSIONS #####
 
     def exec_Constant(self, node: ast.Constant):
+        if node.value is not None:
+            return node.value
         match node.type:
             case "STRING":
                 return node.token.value
             case "NUMBER":
                 return eval(node.token.value)
             case "BOOL":
-                return bool(node.token.value)
+                return node.token.value == "true"
             case _:
                 return node.token.value
 
@@ -317,6 +646,38 @@ class Executor(IExecutor):
             case _:
                 return
 
+    ###### SPECIALIZED EXPRESSIONS #####
+    # tipos garantidos pela análise semântica dispensam o match sobre o
+    # operador; resta apenas a verificação de valores vazios, pois uma
+    # função que termina sem return produz None
+
+    def exec_And(self, node: ast.And):
+        left = self.execute(node.left)
+        if left:
+            return self.execute(node.right)
+        return left
+
+    def exec_Or(self, node: ast.Or):
+        left = self.execute(node.left)
+        right = self.execute(node.right)
+        return left or right
+
+    def exec_TypedRelational(self, node: ast.TypedRelational):
+        left = self.execute(node.left)
+        right = self.execute(node.right)
+        if left is None or right is None:
+            return
+        return node.op(left, right)
+
+    exec_NumberArithmetic = exec_TypedRelational
+
+    def exec_StringConcat(self, node: ast.StringConcat):
+        left = self.execute(node.left)
+        right = self.execute(node.right)
+        if left is None or right is None:
+            return
+        return left + right
+
     def exec_Unary(self, node: ast.Unary):
         expr = self.execute(node.expr)
 
@@ -335,35 +696,324 @@ class Executor(IExecutor):
 
         func_name = node.oper if node.oper else node.token.value
 
-        if func_name not in {"close", "send"}:
+        if func_name not in CONNECTION_METHODS:
             if self.default_functions.get(func_name):
                 args = [self.execute(arg) for arg in node.args]
                 return self.default_functions[func_name](*args)
         else:
             conn_name = node.token.value
-            if func_name == "send":
-                args = [self.execute(arg) for arg in node.args]
-                return self.default_functions[func_name](conn_name, *args)
-            else:
-                return self.default_functions[func_name](conn_name)
+            args = [self.execute(arg) for arg in node.args]
+            return self.default_functions[func_name](conn_name, *args)
 
         function: ast.FuncDef | None = self.function_table.get(str(func_name))
 
         if not function:
             return
 
-        self.enter_scope()
+        # argumentos são avaliados no escopo de quem chama
+        args = [self.execute(arg) for arg in node.args]
+        return self.call(function, args)
+
+    def exec_ChannelCall(self, node: ast.ChannelCall):
+        channel: Channel = self.exec_ID(node.id)  # type: ignore
+        args = [self.execute(arg) for arg in node.args]
+        return getattr(channel, str(node.oper))(*args)
+
+    def definition_scope(self, function: ast.FuncDef) -> VarTable:
+        """
+        Retorna o escopo em que uma função foi declarada: as variáveis
+        livres da função são buscadas a partir dele, e não a partir de
+        quem chama (escopo léxico, como nos demais motores)
+        """
+        st = self.var_table
+        while st.prev is not None and function.name not in st.functions:
+            st = st.prev
+        return st
+
+    def call(self, function: ast.FuncDef, args: list[Any]):
+        """
+        Chama uma função do usuário, consultando o cache de memoização
+        quando a função é pura
+        """
+        if self.memo is None or not function.pure:
+            return self.call_function(function, args)
+
+        key = self.memo.key(args)
+        value = self.memo.lookup(function.name, key)
+        if value is MISSING:
+            value = self.call_function(function, args)
+            self.memo.store(function.name, key, value)
+        return value
+
+    def call_function(self, function: ast.FuncDef, args: list[Any]):
+        """
+        Executa uma função do usuário com argumentos já avaliados,
+        seguindo as chamadas em posição de cauda no mesmo laço
+        """
+        if self.depth >= DIRECT_CALLS:
+            # a partir daqui a pilha do Python não cresce mais: a chamada
+            # e as que ela fizer seguem pela pilha explícita
+            return self.trampoline(function, args)
+
+        # a cadeia de escopos é restaurada ao fim da chamada, mesmo que
+        # algum bloco interno não tenha fechado o próprio escopo
+        saved = self.var_table
+        scope = self.definition_scope(function)
+        self.depth += 1
+        try:
+            while True:
+                self.var_table = VarTable(prev=scope)
+
+                for param in function.params.items():
+                    name, (_, default) = param
+                    if default:
+                        self.var_table.table[name] = self.execute(default)
 
-        for param in function.params.items():
-            name, (_, default) = param
-            if default:
-                self.var_table.table[name] = self.execute(default)
+                for param, value in zip(function.params.keys(), args):
+                    self.var_table.table[param] = value
+
+                ret = self.exec_block(function.body)
+                if not isinstance(ret, TailCall):
+                    return ret
+                function, args, scope = ret.function, ret.args, ret.scope
+
+        finally:
+            self.var_table = saved
+            self.depth -= 1
+
+    ###### CHAMADAS PROFUNDAS #####
+    # as chamadas além de DIRECT_CALLS executam como geradores em uma
+    # pilha explícita: apenas as instruções e expressões que chamam
+    # funções do usuário passam pelos métodos steps_*, que pedem cada
+    # chamada com yield; o restante segue pelos métodos exec_*
+
+    def trampoline(self, function: ast.FuncDef, args: list[Any]):
+        """
+        Executa uma chamada sem aumentar a pilha do Python com as
+        chamadas que ela fizer: cada chamada pedida por um gerador
+        empilha o gerador da função chamada, e o valor retornado é
+        enviado de volta a quem pediu
+        """
+        stack = [self.steps_call(function, args)]
+        value = None
+        while True:
+            try:
+                request = stack[-1].send(value)
+            except StopIteration as stop:
+                stack.pop()
+                if not stack:
+                    return stop.value
+                value = stop.value
+                continue
+            except BaseException:
+                # os geradores restantes restauram os próprios escopos
+                for steps in reversed(stack[:-1]):
+                    steps.close()
+                raise
+            stack.append(self.steps_call(*request))
+            value = None
+
+    def calls(self, node: ast.Node | None) -> bool:
+        """
+        Verifica, com cache, se um nó chama funções do usuário na
+        própria pilha; os ramos de par e seq executam em outros
+        executores e não contam
+        """
+        if node is None:
+            return False
+        key = id(node)
+        found = self.call_nodes.get(key)
+        if found is None:
+            found = self.call_nodes[key] = self.find_calls(node)
+        return found
+
+    def find_calls(self, node: ast.Node) -> bool:
+        match node:
+            case ast.Call():
+                if not node.oper and node.token.value not in (
+                    self.default_functions
+                ):
+                    return True
+                return any(map(self.calls, node.args))
+            case ast.Assign():
+                return self.calls(node.right)
+            case ast.Return():
+                return self.calls(node.expr)
+            case ast.If():
+                return (
+                    self.calls(node.condition)
+                    or any(map(self.calls, node.body or []))
+                    or any(map(self.calls, node.else_stmt or []))
+                )
+            case ast.While():
+                return self.calls(node.condition) or any(
+                    map(self.calls, node.body)
+                )
+            case ast.Logical() | ast.Relational() | ast.Arithmetic():
+                return self.calls(node.left) or self.calls(node.right)
+            case ast.Unary() | ast.Access():
+                return self.calls(node.expr)
+            case _:
+                return False
+
+    def steps_call(self, function: ast.FuncDef, args: list[Any]):
+        """
+        Versão de Executor.call para a pilha explícita
+        """
+        if self.memo is None or not function.pure:
+            return (yield from self.steps_function(function, args))
+
+        key = self.memo.key(args)
+        value = self.memo.lookup(function.name, key)
+        if value is MISSING:
+            value = yield from self.steps_function(function, args)
+            self.memo.store(function.name, key, value)
+        return value
+
+    def steps_function(self, function: ast.FuncDef, args: list[Any]):
+        """
+        Versão de Executor.call_function para a pilha explícita
+        """
+        saved = self.var_table
+        scope = self.definition_scope(function)
+        try:
+            while True:
+                self.var_table = VarTable(prev=scope)
 
-        for param, arg in zip(function.params.items(), node.args):
-            name, _ = param
-            value = self.execute(arg)
-            self.var_table.table[name] = value
+                for param in function.params.items():
+                    name, (_, default) = param
+                    if default:
+                        self.var_table.table[name] = yield from self.steps(
+                            default
+                        )
 
-        ret = self.exec_block(function.body)
+                for param, value in zip(function.params.keys(), args):
+                    self.var_table.table[param] = value
+
+                ret = yield from self.steps_block(function.body)
+                if not isinstance(ret, TailCall):
+                    return ret
+                function, args, scope = ret.function, ret.args, ret.scope
+
+        finally:
+            self.var_table = saved
+
+    def steps_block(self, block: ast.Body):
+        """
+        Executa um bloco, com os mesmos sinais de Executor.exec_block
+        """
+        if not any(map(self.calls, block)):
+            return self.exec_block(block)
+
+        for instruction in block:
+            if not self.calls(instruction):
+                ret = self.exec_block([instruction])
+                if isinstance(instruction, ast.Return):
+                    return ret
+            elif isinstance(instruction, ast.Return):
+                return (yield from self.steps_Return(instruction))
+            else:
+                meth_name = f"steps_{type(instruction).__name__}"
+                ret = yield from getattr(self, meth_name)(instruction)
+            if ret is not None:
+                return ret
+        return None
+
+    def steps_Return(self, node: ast.Return):
+        function = self.tail_callee(node.expr)
+        if function is None:
+            return (yield from self.steps(node.expr))
+        args = yield from self.steps_args(node.expr.args)  # type: ignore
+        return TailCall(function, args, self.definition_scope(function))
+
+    def steps_Assign(self, node: ast.Assign):
+        value = yield from self.steps(node.right)
+        self.exec_Assign(replace(node, right=self.value(value)))
+
+    def steps_Call(self, node: ast.Call):
+        yield from self.steps(node)
+
+    steps_ChannelCall = steps_Call
+
+    def steps_If(self, node: ast.If):
+        condition = yield from self.steps(node.condition)
+        block = node.body if condition else node.else_stmt
+        if not block:
+            return None
+        if not self.needs_scope(block):
+            return (yield from self.steps_block(block))
+        self.enter_scope()
+        ret = yield from self.steps_block(block)
         self.exit_scope()
         return ret
+
+    def steps_While(self, node: ast.While):
+        condition = yield from self.steps(node.condition)
+        scoped = self.needs_scope(node.body)
+        if scoped:
+            self.enter_scope()
+        ret = None
+        while condition:
+            signal = yield from self.steps_block(node.body)
+            if signal == commands.BREAK:
+                break
+            elif signal is not None and signal != commands.CONTINUE:
+                ret = signal
+                break
+            condition = yield from self.steps(node.condition)
+        if scoped:
+            self.exit_scope()
+        return ret
+
+    steps_CountingWhile = steps_While
+
+    def steps(self, node: ast.Expression):
+        """
+        Avalia uma expressão, pedindo com yield as chamadas a funções do
+        usuário
+        """
+        if not self.calls(node):
+            return self.execute(node)
+
+        match node:
+            case ast.Call() if node.oper or (
+                node.token.value in self.default_functions
+            ):
+                args = yield from self.steps_args(node.args)
+                return self.execute(
+                    replace(node, args=[self.value(arg) for arg in args])
+                )
+            case ast.Call():
+                args = yield from self.steps_args(node.args)
+                function = self.function_table.get(node.token.value)
+                if function is None:
+                    return None
+                return (yield function, args)
+            case ast.Logical() if node.token.value == "&&":
+                left = yield from self.steps(node.left)
+                return (yield from self.steps(node.right)) if left else left
+            case ast.Logical() | ast.Relational() | ast.Arithmetic():
+                left = yield from self.steps(node.left)
+                right = yield from self.steps(node.right)
+                return self.execute(
+                    replace(
+                        node, left=self.value(left), right=self.value(right)
+                    )
+                )
+            case ast.Unary() | ast.Access():
+                expr = yield from self.steps(node.expr)
+                return self.execute(replace(node, expr=self.value(expr)))
+            case _:
+                return self.execute(node)
+
+    def steps_args(self, args: ast.Arguments):
+        values = []
+        for arg in args:
+            values.append((yield from self.steps(arg)))
+        return values
+
+    def value(self, value: Any) -> Resolved:
+        return Resolved(None, None, value)  # type: ignore
+
+    def exec_Resolved(self, node: Resolved):
+        return node.value
@@ -0,0 +1,199 @@
+"""
+Módulo de Enquadramento
+
+O módulo de enquadramento delimita as mensagens trocadas por sockets
+com um prefixo de tamanho, de modo que cada mensagem seja recebida
+inteira, sem truncar mensagens grandes nem juntar mensagens pequenas.
+Os bytes são lidos com `recv_into` direto no buffer da mensagem; as
+conexões dos canais reaproveitam o mesmo buffer em todas as mensagens
+"""
+
+import asyncio
+import pickle
+import socket
+import struct
+from dataclasses import dataclass, field
+from typing import Any
+
+# Prefixo com o tamanho da mensagem, em bytes (big-endian, sem sinal)
+HEADER = struct.Struct("!I")
+
+# Tamanho inicial do buffer de leitura de uma conexão, em bytes
+BUFFER_SIZE = 64 * 1024
+
+
+def frame(payload: bytes) -> bytes:
+    """
+    Prefixa uma mensagem com o seu tamanho
+    """
+    return HEADER.pack(len(payload)) + payload
+
+
+def send_frame(sock: socket.socket, payload: bytes):
+    """
+    Envia uma mensagem precedida do seu tamanho
+    """
+    sock.sendall(frame(payload))
+
+
+def recv_exact(sock: socket.socket, size: int) -> bytearray | None:
+    """
+    Recebe exatamente `size` bytes
+
+    Returns:
+        bytearray | None: bytes recebidos, ou None se a conexão terminou
+    """
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if not count:
+            return None
+        received += count
+    return buffer
+
+
+def recv_frame(sock: socket.socket) -> bytearray | None:
+    """
+    Recebe uma mensagem enviada por send_frame
+
+    Returns:
+        bytearray | None: conteúdo da mensagem, ou None se a conexão
+            terminou
+    """
+    header = recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    (size,) = HEADER.unpack(header)
+    return recv_exact(sock, size)
+
+
+def send_message(sock: socket.socket, message: Any):
+    """
+    Envia um objeto Python serializado em uma mensagem
+    """
+    send_frame(sock, pickle.dumps(message, pickle.HIGHEST_PROTOCOL))
+
+
+def recv_message(sock: socket.socket) -> Any:
+    """
+    Recebe um objeto enviado por send_message
+
+    Returns:
+        Any: objeto recebido, ou None se a conexão terminou
+    """
+    payload = recv_frame(sock)
+    if payload is None:
+        return None
+    return pickle.loads(payload)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes | None:
+    """
+    Recebe de um stream do asyncio uma mensagem enviada com prefixo
+
+    Returns:
+        bytes | None: conteúdo da mensagem, ou None se a conexão terminou
+    """
+    try:
+        header = await reader.readexactly(HEADER.size)
+        (size,) = HEADER.unpack(header)
+        return await reader.readexactly(size)
+    except asyncio.IncompleteReadError:
+        return None
+
+
+@dataclass
+class FramedSocket:
+    """
+    Conexão que troca mensagens com prefixo de tamanho
+
+    As leituras usam um único buffer, que cresce apenas para mensagens
+    maiores que ele; cada `recv_into` lê o que estiver disponível, de
+    modo que várias mensagens pequenas chegam em uma única leitura
+
+    Attributes:
+        sock (socket): conexão
+        buffer (bytearray): bytes recebidos e ainda não consumidos
+        start (int): início dos bytes não consumidos no buffer
+        end (int): fim dos bytes recebidos no buffer
+    """
+
+    sock: socket.socket
+    buffer: bytearray = field(default_factory=lambda: bytearray(BUFFER_SIZE))
+    start: int = 0
+    end: int = 0
+
+    def send(self, payload: bytes):
+        self.sock.sendall(frame(payload))
+
+    def send_many(self, payloads: list[bytes]):
+        """
+        Envia várias mensagens em uma única escrita
+        """
+        self.sock.sendall(b"".join(map(frame, payloads)))
+
+    def receive(self) -> memoryview | None:
+        """
+        Recebe uma mensagem
+
+        Returns:
+            memoryview | None: conteúdo da mensagem, válido até a próxima
+                leitura, ou None se a conexão terminou
+        """
+        if not self.fill(HEADER.size):
+            return None
+        (size,) = HEADER.unpack_from(self.buffer, self.start)
+        self.start += HEADER.size
+        if not self.fill(size):
+            return None
+        payload = memoryview(self.buffer)[self.start : self.start + size]
+        self.start += size
+        return payload
+
+    def receive_text(self) -> str | None:
+        """
+        Recebe uma mensagem de texto
+
+        Returns:
+            str | None: mensagem decodificada, ou None se a conexão
+                terminou
+        """
+        payload = self.receive()
+        if payload is None:
+            return None
+        with payload:
+            return str(payload, "utf-8")
+
+    def fill(self, size: int) -> bool:
+        """
+        Lê do socket até o buffer ter `size` bytes não consumidos
+
+        Returns:
+            bool: se os bytes foram recebidos antes do fim da conexão
+        """
+        if self.end - self.start >= size:
+            return True
+        if self.start + size > len(self.buffer):
+            # move os bytes pendentes para o início, ou para um buffer
+            # maior quando a mensagem não cabe no atual
+            pending = self.end - self.start
+            if size > len(self.buffer):
+                buffer = bytearray(max(size, 2 * len(self.buffer)))
+                buffer[:pending] = self.buffer[self.start : self.end]
+                self.buffer = buffer
+            else:
+                self.buffer[:pending] = self.buffer[self.start : self.end]
+            self.start, self.end = 0, pending
+
+        with memoryview(self.buffer) as view:
+            while self.end - self.start < size:
+                count = self.sock.recv_into(view[self.end :])
+                if not count:
+                    return False
+                self.end += count
+        return True
+
+    def close(self):
+        self.sock.close()
@@ -58,9 +58,11 @@ class Lexer(ILexer):
         self.token_table["break"] = "BREAK"
         self.token_table["continue"] = "CONTINUE"
         self.token_table["par"] = "PAR"
+        self.token_table["for"] = "FOR"
         self.token_table["seq"] = "SEQ"
         self.token_table["c_channel"] = "C_CHANNEL"
         self.token_table["s_channel"] = "S_CHANNEL"
+        self.token_table["chan"] = "CHAN"
 
     def scan(self):
         """
@@ -0,0 +1,498 @@
+"""
+Módulo de Otimização de Laços
+
+O módulo de otimização de laços move para antes de cada While as
+subexpressões cujas entradas não são alteradas no laço, guardando os
+valores em variáveis temporárias, e reconhece contadores simples
+(`i = i + 1` com a condição `i < n`), executados por um caminho rápido
+
+As variáveis alteradas por uma chamada são obtidas da tabela de funções:
+a chamada invalida as variáveis que a função, ou as funções chamadas por
+ela, atribui fora do próprio escopo
+"""
+
+from dataclasses import dataclass, field
+
+from minipar import ast
+from minipar.resolver import walk
+from minipar.token import DEFAULT_FUNCTION_NAMES, Token
+
+# Funções padrão sem efeitos colaterais e que não lançam erros, cujas
+# chamadas podem ser avaliadas antes do laço
+HOISTABLE_FUNCTIONS = {"len", "to_string", "to_bool", "isalpha", "isnum"}
+
+# Operadores que não lançam erros para operandos com tipos verificados
+HOISTABLE_OPERATORS = {"+", "-", "*", "==", "!=", ">", "<", ">=", "<="}
+
+# Tipo do valor de cada nó especializado
+SPECIALIZED_TYPES = {
+    "And": "BOOL",
+    "Or": "BOOL",
+    "TypedRelational": "BOOL",
+    "NumberArithmetic": "NUMBER",
+    "StringConcat": "STRING",
+}
+
+# Comparações aceitas na condição de um laço com contador
+COUNTER_OPERATORS = {">", "<", ">=", "<="}
+
+
+@dataclass
+class Effects:
+    """
+    Efeitos diretos de uma função sobre as variáveis
+
+    Attributes:
+        writes (set): variáveis atribuídas fora do escopo da função
+        callees (set): funções do usuário chamadas pela função
+    """
+
+    writes: set[str] = field(default_factory=set)
+    callees: set[str] = field(default_factory=set)
+
+
+def assigned_names(block: ast.Body | None) -> set[str]:
+    """
+    Coleta os nomes atribuídos ou declarados em um bloco e nos blocos
+    aninhados
+    """
+    names: set[str] = set()
+    for stmt in block or []:
+        match stmt:
+            case ast.Assign(left=ast.ID() as var):
+                names.add(var.token.value)
+            case ast.Chan():
+                names.add(stmt.var.token.value)
+            case ast.If():
+                names |= assigned_names(stmt.body)
+                names |= assigned_names(stmt.else_stmt)
+            case ast.While() | ast.Seq():
+                names |= assigned_names(stmt.body)
+    return names
+
+
+def statements(block: ast.Body | None):
+    """
+    Percorre as instruções de um bloco e dos blocos aninhados, inclusive
+    os corpos de funções
+    """
+    for stmt in block or []:
+        yield stmt
+        match stmt:
+            case ast.If():
+                yield from statements(stmt.body)
+                yield from statements(stmt.else_stmt)
+            case ast.While() | ast.Seq() | ast.Par() | ast.ParFor():
+                yield from statements(stmt.body)
+            case ast.FuncDef():
+                yield from statements(stmt.body)
+
+
+def program_names(block: ast.Body | None) -> set[str]:
+    """
+    Coleta os nomes de variáveis, parâmetros e funções de um programa
+    """
+    names = assigned_names(block)
+    for stmt in statements(block):
+        if isinstance(stmt, ast.FuncDef):
+            names.add(stmt.name)
+            names |= set(stmt.params)
+            names |= assigned_names(stmt.body)
+        for expr in expression_values([stmt]):
+            names |= {node.token.value for node in walk(expr)}
+    return names
+
+
+def continues(block: ast.Body | None) -> bool:
+    """
+    Verifica se um bloco contém um continue do próprio laço
+    """
+    for stmt in block or []:
+        match stmt:
+            case ast.Continue():
+                return True
+            case ast.If() if continues(stmt.body) or continues(stmt.else_stmt):
+                return True
+            case ast.Seq() if continues(stmt.body):
+                return True
+    return False
+
+
+def expressions(block: ast.Body | None):
+    """
+    Percorre as expressões de um bloco e dos blocos aninhados como pares
+    (nó, atributo), permitindo substituí-las
+    """
+    for stmt in block or []:
+        match stmt:
+            case ast.Assign():
+                yield stmt, "right"
+            case ast.Return():
+                yield stmt, "expr"
+            case ast.If():
+                yield stmt, "condition"
+                yield from expressions(stmt.body)
+                yield from expressions(stmt.else_stmt)
+            case ast.While():
+                yield stmt, "condition"
+                yield from expressions(stmt.body)
+            case ast.Seq():
+                yield from expressions(stmt.body)
+            case ast.ParFor():
+                # o corpo declara o índice e altera apenas cópias
+                yield stmt, "start"
+                yield stmt, "end"
+            case ast.Call():
+                for index in range(len(stmt.args)):
+                    yield stmt.args, index
+
+
+def expression_values(block: ast.Body | None):
+    for parent, key in expressions(block):
+        if isinstance(parent, list):
+            yield parent[key]
+        else:
+            yield getattr(parent, key)
+
+
+def parallel_nodes(block: ast.Body | None):
+    """
+    Percorre os blocos par e as reduções par de um bloco e dos blocos
+    aninhados, inclusive os corpos de funções, sempre na mesma ordem
+    """
+    seen: set[int] = set()
+    for stmt in statements(block):
+        if isinstance(stmt, ast.Par):
+            yield stmt
+        for expr in expression_values([stmt]):
+            for node in walk(expr):
+                # expressões de blocos aninhados aparecem mais de uma vez
+                if isinstance(node, ast.ParReduce) and id(node) not in seen:
+                    seen.add(id(node))
+                    yield node
+
+
+def node_type(node: ast.Expression) -> str:
+    if isinstance(node, ast.Call):
+        return DEFAULT_FUNCTION_NAMES[node.token.value]
+    return SPECIALIZED_TYPES.get(type(node).__name__, node.type)
+
+
+class LoopOptimizer:
+    """
+    Classe que otimiza os laços While
+
+    Attributes:
+        function_table (dict): funções do programa, pelo nome
+        effects (dict): efeitos diretos de cada função já analisada
+        names (set): nomes usados no programa, evitados pelas temporárias
+        temporaries (int): quantidade de temporárias criadas
+        created (set): nomes das temporárias criadas
+        hoisted (int): quantidade de expressões movidas para fora de laços
+        counters (int): quantidade de laços com contador reconhecidos
+    """
+
+    def __init__(
+        self, function_table: dict[str, ast.FuncDef], names: set[str]
+    ):
+        self.function_table = function_table
+        self.effects: dict[int, Effects] = {}
+        self.names = names
+        self.temporaries: int = 0
+        self.created: set[str] = set()
+        self.hoisted: int = 0
+        self.counters: int = 0
+
+    def optimize(self, node: ast.While) -> ast.Body:
+        """
+        Otimiza um laço cujo corpo já foi otimizado
+
+        Returns:
+            Body: declarações das temporárias seguidas do laço
+        """
+        variant = self.variant_names(node)
+        if variant is None:
+            # o laço chama funções desconhecidas
+            return [node]
+
+        # temporárias de laços internos que também são invariantes neste
+        # laço são movidas inteiras, sem criar uma nova temporária
+        moved = [
+            stmt
+            for stmt in node.body
+            if isinstance(stmt, ast.Assign)
+            and stmt.left.token.value in self.created
+            and self.invariant(stmt.right, variant)
+        ]
+        node.body = [
+            stmt for stmt in node.body if all(stmt is not m for m in moved)
+        ]
+
+        hoisted: dict[str, ast.Assign] = {}
+        node.condition = self.hoist(node.condition, variant, hoisted)
+        for parent, key in expressions(node.body):
+            if isinstance(parent, list):
+                parent[key] = self.hoist(parent[key], variant, hoisted)
+            else:
+                expr = getattr(parent, key)
+                setattr(parent, key, self.hoist(expr, variant, hoisted))
+        self.hoisted += len(hoisted)
+
+        return [*moved, *hoisted.values(), self.counter(node, variant)]
+
+    ###### EFEITOS DAS CHAMADAS ######
+
+    def variant_names(self, node: ast.While) -> set[str] | None:
+        """
+        Calcula as variáveis que podem mudar durante o laço: as
+        atribuídas no corpo e as alteradas pelas funções chamadas
+
+        Returns:
+            set | None: nomes alterados, ou None se o laço chama funções
+                ausentes da tabela
+        """
+        names = assigned_names(node.body)
+        writes = self.writes(
+            self.calls(node.condition) | self.block_calls(node.body)
+        )
+        if writes is None:
+            return None
+        return names | writes
+
+    def block_calls(self, block: ast.Body | None) -> set[str]:
+        """
+        Coleta as funções do usuário chamadas em um bloco
+        """
+        effects = Effects()
+        self.collect(block, [set()], effects)
+        return effects.callees
+
+    def calls(self, expr: ast.Expression | None) -> set[str]:
+        """
+        Coleta as funções do usuário chamadas em uma expressão
+        """
+        if expr is None:
+            return set()
+        return {
+            node.token.value
+            for node in walk(expr)
+            if isinstance(node, ast.Call)
+            and not node.oper
+            and node.token.value not in DEFAULT_FUNCTION_NAMES
+        }
+
+    def writes(self, callees: set[str]) -> set[str] | None:
+        """
+        Calcula as variáveis alteradas pelas funções e, transitivamente,
+        pelas funções que elas chamam
+
+        Returns:
+            set | None: nomes alterados, ou None se alguma função não
+                estiver na tabela
+        """
+        names: set[str] = set()
+        pending = list(callees)
+        seen: set[str] = set()
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            function = self.function_table.get(name)
+            if function is None:
+                return None
+            effects = self.function_effects(function)
+            names |= effects.writes
+            pending.extend(effects.callees)
+        return names
+
+    def function_effects(self, function: ast.FuncDef) -> Effects:
+        effects = self.effects.get(id(function))
+        if effects is None:
+            effects = self.effects[id(function)] = Effects()
+            if not function.pure:
+                self.collect(function.body, [set(function.params)], effects)
+        return effects
+
+    def collect(
+        self, block: ast.Body | None, scopes: list[set[str]], effects: Effects
+    ):
+        """
+        Coleta as atribuições a variáveis externas e as chamadas de um
+        bloco de função
+        """
+        for stmt in block or []:
+            match stmt:
+                case ast.Assign(left=ast.ID() as var):
+                    effects.callees |= self.calls(stmt.right)
+                    name = var.token.value
+                    if var.decl:
+                        scopes[-1].add(name)
+                    elif not any(name in scope for scope in scopes):
+                        effects.writes.add(name)
+                case ast.Chan():
+                    effects.callees |= self.calls(stmt.capacity)
+                    scopes[-1].add(stmt.var.token.value)
+                case ast.Return():
+                    effects.callees |= self.calls(stmt.expr)
+                case ast.If():
+                    effects.callees |= self.calls(stmt.condition)
+                    self.collect(stmt.body, [*scopes, set()], effects)
+                    self.collect(stmt.else_stmt, [*scopes, set()], effects)
+                case ast.While():
+                    effects.callees |= self.calls(stmt.condition)
+                    self.collect(stmt.body, [*scopes, set()], effects)
+                case ast.Seq():
+                    self.collect(stmt.body, scopes, effects)
+                case ast.ParFor():
+                    effects.callees |= self.calls(stmt.start)
+                    effects.callees |= self.calls(stmt.end)
+                case ast.SChannel():
+                    effects.callees.add(stmt.func_name)
+                case ast.Call():
+                    effects.callees |= self.calls(stmt)
+                case _:
+                    # ramos de um par alteram cópias das variáveis
+                    pass
+
+    ###### INVARIANTES ######
+
+    def invariant(self, node: ast.Expression, variant: set[str]) -> bool:
+        """
+        Verifica se uma expressão tem o mesmo valor em todas as iterações
+        e pode ser avaliada antes do laço sem efeitos nem erros
+        """
+        match node:
+            case ast.Constant():
+                return True
+            case ast.ID():
+                return node.token.value not in variant
+            case ast.And() | ast.Or():
+                return self.invariant(node.left, variant) and self.invariant(
+                    node.right, variant
+                )
+            case (
+                ast.TypedRelational()
+                | ast.NumberArithmetic()
+                | ast.StringConcat()
+            ):
+                return (
+                    node.token.value in HOISTABLE_OPERATORS
+                    and self.invariant(node.left, variant)
+                    and self.invariant(node.right, variant)
+                )
+            case ast.Unary():
+                return self.invariant(node.expr, variant)
+            case ast.Call() if not node.oper:
+                return node.token.value in HOISTABLE_FUNCTIONS and all(
+                    self.invariant(arg, variant) for arg in node.args
+                )
+            case _:
+                return False
+
+    def hoist(
+        self,
+        node: ast.Expression,
+        variant: set[str],
+        hoisted: dict[str, ast.Assign],
+    ) -> ast.Expression:
+        """
+        Substitui as maiores subexpressões invariantes por temporárias
+
+        Returns:
+            Expression: a expressão com as substituições
+        """
+        if isinstance(node, (ast.Constant, ast.ID)):
+            return node
+        if self.invariant(node, variant):
+            # expressões iguais compartilham a mesma temporária
+            key = repr(node)
+            assign = hoisted.get(key)
+            if assign is None:
+                var = ast.ID(
+                    type=node_type(node),
+                    token=Token("ID", self.temporary()),
+                    decl=True,
+                )
+                assign = hoisted[key] = ast.Assign(left=var, right=node)
+            left = assign.left
+            return ast.ID(type=left.type, token=left.token)
+
+        match node:
+            case ast.Logical() | ast.Relational() | ast.Arithmetic():
+                node.left = self.hoist(node.left, variant, hoisted)
+                node.right = self.hoist(node.right, variant, hoisted)
+            case ast.Unary():
+                node.expr = self.hoist(node.expr, variant, hoisted)
+            case ast.Access():
+                node.expr = self.hoist(node.expr, variant, hoisted)
+            case ast.Call():
+                node.args = [
+                    self.hoist(arg, variant, hoisted) for arg in node.args
+                ]
+        return node
+
+    def temporary(self) -> str:
+        """
+        Gera o nome de uma temporária que não colide com os nomes do
+        programa
+        """
+        name = f"_inv{self.temporaries}"
+        while name in self.names:
+            self.temporaries += 1
+            name = f"_inv{self.temporaries}"
+        self.temporaries += 1
+        self.names.add(name)
+        self.created.add(name)
+        return name
+
+    ###### CONTADORES ######
+
+    def counter(self, node: ast.While, variant: set[str]) -> ast.While:
+        """
+        Reconhece um laço com contador: a condição compara o contador a
+        um limite invariante, e a última instrução do corpo, a única que
+        altera o contador, soma ou subtrai uma constante
+
+        Returns:
+            While: um CountingWhile, ou o próprio laço
+        """
+        condition = node.condition
+        if not (
+            isinstance(condition, ast.TypedRelational)
+            and condition.token.value in COUNTER_OPERATORS
+            and isinstance(condition.left, ast.ID)
+            and isinstance(condition.right, (ast.ID, ast.Constant))
+            and self.invariant(condition.right, variant)
+            and node.body
+            and not continues(node.body)
+        ):
+            return node
+
+        name = condition.left.token.value
+        step = node.body[-1]
+        match step:
+            case ast.Assign(
+                left=ast.ID(decl=False) as var,
+                right=ast.NumberArithmetic(
+                    left=ast.ID() as counter, right=ast.Constant() as amount
+                ) as update,
+            ) if (
+                var.token.value == name
+                and counter.token.value == name
+                and update.token.value in ("+", "-")
+                and isinstance(amount.value, (int, float))
+                and not isinstance(amount.value, bool)
+            ):
+                pass
+            case _:
+                return node
+
+        rest = node.body[:-1]
+        writes = self.writes(self.block_calls(rest))
+        if name in assigned_names(rest) or writes is None or name in writes:
+            return node
+
+        self.counters += 1
+        value = amount.value if update.token.value == "+" else -amount.value
+        return ast.CountingWhile(node.condition, node.body, step=value)
@@ -0,0 +1,120 @@
+"""
+Módulo de Memoização
+
+O módulo de memoização guarda os resultados de funções puras,
+classificadas pela análise semântica, em caches LRU limitados por
+função e indexados pelos valores dos argumentos
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+# Marcador de ausência de resultado no cache
+MISSING = object()
+
+
+@dataclass
+class FunctionCache:
+    """
+    Cache LRU de uma função
+
+    Attributes:
+        entries (OrderedDict): resultados indexados pelos argumentos, do
+            menos para o mais recentemente usado
+        hits (int): quantidade de consultas atendidas pelo cache
+        misses (int): quantidade de consultas não atendidas
+    """
+
+    entries: OrderedDict = field(default_factory=OrderedDict)
+    hits: int = 0
+    misses: int = 0
+
+
+@dataclass
+class Memoizer:
+    """
+    Classe que memoiza os resultados das funções puras
+
+    Compartilhada entre os ramos de um bloco par, por isso as operações
+    são protegidas por um lock
+
+    Attributes:
+        size (int): quantidade máxima de resultados por função
+        caches (dict): cache de cada função, pelo nome
+    """
+
+    size: int = 128
+    caches: dict[str, FunctionCache] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.lock = threading.Lock()
+
+    def key(self, args: list | tuple) -> tuple | None:
+        """
+        Gera a chave de uma chamada; os tipos fazem parte da chave para
+        que 1 e 1.0 não compartilhem o mesmo resultado
+
+        Returns:
+            tuple | None: chave da chamada, ou None se algum argumento
+                não puder ser usado como chave
+        """
+        key = (*args, *map(type, args))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def lookup(self, name: str, key: tuple | None) -> Any:
+        """
+        Busca o resultado de uma chamada
+
+        Returns:
+            Any: resultado guardado, ou MISSING se não houver
+        """
+        if key is None:
+            return MISSING
+        with self.lock:
+            cache = self.caches.get(name)
+            if cache is None:
+                cache = self.caches[name] = FunctionCache()
+            value = cache.entries.get(key, MISSING)
+            if value is MISSING:
+                cache.misses += 1
+            else:
+                cache.hits += 1
+                cache.entries.move_to_end(key)
+            return value
+
+    def store(self, name: str, key: tuple | None, value: Any):
+        """
+        Guarda o resultado de uma chamada, descartando o menos usado
+        quando o cache da função está cheio
+        """
+        if key is None or self.size <= 0:
+            return
+        with self.lock:
+            cache = self.caches.setdefault(name, FunctionCache())
+            cache.entries[key] = value
+            cache.entries.move_to_end(key)
+            if len(cache.entries) > self.size:
+                cache.entries.popitem(last=False)
+
+    def report(self) -> str:
+        """
+        Gera o relatório de acertos e falhas de cada função
+
+        Returns:
+            str: uma linha por função memoizada
+        """
+        lines = []
+        for name, cache in sorted(self.caches.items()):
+            total = cache.hits + cache.misses
+            rate = cache.hits / total * 100 if total else 0
+            lines.append(
+                f"{name}: {cache.hits} hits, {cache.misses} misses "
+                f"({rate:.1f}%), {len(cache.entries)} entries"
+            )
+        return "\n".join(lines)
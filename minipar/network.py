@@ -0,0 +1,403 @@
+"""
+Módulo de Rede
+
+O módulo de rede implementa os canais declarados com `s_channel` e
+`c_channel`. O servidor continua aceitando conexões e atende vários
+clientes ao mesmo tempo, cada um em uma thread de um conjunto limitado;
+quando todas as threads estão ocupadas, as novas conexões esperam na
+fila do socket até um cliente terminar.
+
+As conexões dos canais clientes fechadas pelo programa voltam a um
+conjunto por endereço e são reaproveitadas pelo próximo `c_channel`
+para o mesmo servidor, evitando um novo handshake TCP a cada canal
+aberto em laços e funções. Antes de reaproveitada, a conexão é
+verificada; se o servidor a encerrou, uma nova é aberta
+"""
+
+import queue
+import socket
+import threading
+import time
+import traceback
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any
+
+from minipar import error as err
+from minipar.framing import FramedSocket
+
+# Clientes atendidos ao mesmo tempo por um canal servidor
+MAX_CLIENTS = 64
+
+# Conexões ociosas mantidas por endereço para os canais clientes
+POOL_SIZE = 4
+
+# Segundos que uma conexão ociosa é mantida no conjunto
+KEEP_ALIVE = 30.0
+
+# Mensagens enviadas de uma vez pelo envio em lote
+PIPELINE_WINDOW = 64
+
+
+@dataclass
+class ClientConnection:
+    """
+    Conexão de um canal cliente
+
+    Attributes:
+        address (tuple): host e porta do servidor
+        framed (FramedSocket): conexão com o servidor
+        description (str): descrição enviada pelo servidor ao conectar
+        released (float): instante em que a conexão voltou ao conjunto
+        sent (int): mensagens enviadas pela conexão
+        received (int): respostas lidas da conexão
+        replies (dict): respostas lidas e ainda não pedidas, pelo
+            identificador do envio
+        reused (bool): se a conexão veio do conjunto e ainda não trocou
+            mensagens desde então
+    """
+
+    address: tuple[str, int]
+    framed: FramedSocket
+    description: str
+    released: float = 0.0
+    sent: int = 0
+    received: int = 0
+    replies: dict[int, str] = field(default_factory=dict)
+    reused: bool = False
+
+
+@dataclass
+class Network:
+    """
+    Opções e conexões dos canais, compartilhadas por todos os executores
+
+    Attributes:
+        max_clients (int): clientes atendidos ao mesmo tempo por canal
+        accept_limit (int): conexões aceitas antes de o servidor fechar;
+            0 mantém o servidor aberto
+        pool_size (int): conexões ociosas mantidas por endereço; 0
+            fecha as conexões dos canais clientes
+        handler_workers (int): threads que executam os handlers dos
+            canais servidores, separadas das que leem as mensagens; 0
+            executa o handler na thread da conexão
+        idle (dict): conexões ociosas de cada endereço, da mais antiga
+            para a mais recente
+    """
+
+    max_clients: int = MAX_CLIENTS
+    accept_limit: int = 0
+    pool_size: int = POOL_SIZE
+    handler_workers: int = 0
+    idle: dict[tuple[str, int], list[ClientConnection]] = field(
+        default_factory=dict
+    )
+
+    def __post_init__(self):
+        self.lock = threading.Lock()
+
+    ###### CANAIS CLIENTES ######
+
+    def connect(self, host: str, port: int) -> ClientConnection:
+        """
+        Retorna uma conexão com o servidor, reaproveitando uma conexão
+        ociosa e saudável quando existe
+        """
+        address = (host, port)
+        while True:
+            with self.lock:
+                connections = self.idle.get(address)
+                if not connections:
+                    break
+                connection = connections.pop()
+            if self.healthy(connection):
+                connection.reused = True
+                return connection
+            connection.framed.close()
+        return self.open(address)
+
+    def open(self, address: tuple[str, int]) -> ClientConnection:
+        sock = socket.create_connection(address)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        framed = FramedSocket(sock)
+        description = framed.receive_text()
+        if description is None:
+            framed.close()
+            raise err.RunTimeError(
+                f"servidor {address[0]}:{address[1]} encerrou a conexão"
+            )
+        return ClientConnection(address, framed, description)
+
+    def healthy(self, connection: ClientConnection) -> bool:
+        """
+        Verifica se uma conexão ociosa pode ser reaproveitada: ela não
+        pode ter passado de KEEP_ALIVE segundos no conjunto, nem ter
+        sido encerrada pelo servidor ou recebido dados inesperados
+        """
+        if time.monotonic() - connection.released > KEEP_ALIVE:
+            return False
+        framed = connection.framed
+        if framed.start != framed.end:
+            return False
+        sock = framed.sock
+        sock.setblocking(False)
+        try:
+            # o fim da conexão ou dados sem pedido a tornam inválida
+            sock.recv(1, socket.MSG_PEEK)
+            return False
+        except BlockingIOError:
+            # sem dados disponíveis, a conexão continua aberta
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.setblocking(True)
+
+    def request(self, connection: ClientConnection, data: str) -> str:
+        """
+        Envia uma mensagem e retorna a resposta do servidor. Se o envio
+        falha em uma conexão reaproveitada do conjunto, que o servidor
+        encerrou enquanto estava ociosa, a mensagem é enviada por uma
+        nova conexão; depois de enviada, ela nunca é reenviada, pois o
+        servidor pode já tê-la executado
+        """
+        if connection.sent > connection.received:
+            # as respostas dos envios assíncronos chegam antes desta
+            return self.wait(connection, self.submit(connection, [data])[0])
+
+        try:
+            connection.framed.send(data.encode("utf-8"))
+        except OSError:
+            connection.framed.close()
+            if not connection.reused:
+                raise self.closed(connection) from None
+            # nada chegou ao servidor: a mensagem vai por uma nova conexão
+            connection.framed = self.open(connection.address).framed
+            connection.reused = False
+            return self.request(connection, data)
+        connection.reused = False
+        try:
+            reply = connection.framed.receive_text()
+        except OSError:
+            reply = None
+        if reply is None:
+            connection.framed.close()
+            raise self.closed(connection)
+        connection.sent += 1
+        connection.received += 1
+        return reply
+
+    def submit(
+        self, connection: ClientConnection, messages: list[str]
+    ) -> list[int]:
+        """
+        Envia mensagens sem esperar as respostas, em uma única escrita
+
+        Returns:
+            list: identificador da resposta de cada mensagem
+        """
+        try:
+            connection.framed.send_many(
+                [message.encode("utf-8") for message in messages]
+            )
+        except OSError:
+            raise self.closed(connection) from None
+        connection.reused = False
+        first = connection.sent
+        connection.sent += len(messages)
+        return list(range(first, connection.sent))
+
+    def wait(self, connection: ClientConnection, handle: int | float) -> str:
+        """
+        Retorna a resposta de um envio assíncrono. As respostas chegam na
+        ordem dos envios; as anteriores à pedida ficam guardadas até
+        serem lidas
+        """
+        if isinstance(handle, float) and handle.is_integer():
+            handle = int(handle)
+        reply = connection.replies.pop(handle, None)  # type: ignore
+        if reply is not None:
+            return reply
+        if not connection.received <= handle < connection.sent:
+            raise err.RunTimeError(
+                f"resposta {handle} inexistente ou já recebida"
+            )
+        while connection.received <= handle:
+            reply = connection.framed.receive_text()
+            if reply is None:
+                raise self.closed(connection)
+            connection.replies[connection.received] = reply
+            connection.received += 1
+        return connection.replies.pop(handle)  # type: ignore
+
+    def pipeline(
+        self, connection: ClientConnection, messages: list[str]
+    ) -> list[str]:
+        """
+        Envia várias mensagens pela mesma conexão sem esperar cada
+        resposta e retorna as respostas na ordem das mensagens. No
+        máximo duas janelas de PIPELINE_WINDOW mensagens ficam sem
+        resposta, para que o servidor não trave escrevendo respostas
+        que ninguém lê
+        """
+        handles: deque[int] = deque()
+        replies: list[str] = []
+        for start in range(0, len(messages), PIPELINE_WINDOW):
+            window = messages[start : start + PIPELINE_WINDOW]
+            handles.extend(self.submit(connection, window))
+            while len(handles) > PIPELINE_WINDOW:
+                replies.append(self.wait(connection, handles.popleft()))
+        replies.extend(self.wait(connection, handle) for handle in handles)
+        return replies
+
+    def closed(self, connection: ClientConnection) -> err.RunTimeError:
+        host, port = connection.address
+        return err.RunTimeError(f"servidor {host}:{port} encerrou a conexão")
+
+    def release(self, connection: ClientConnection):
+        """
+        Devolve ao conjunto a conexão de um canal cliente fechado; se
+        ainda há respostas pendentes, ela é fechada
+        """
+        if connection.sent > connection.received:
+            connection.framed.close()
+            return
+        with self.lock:
+            connection.replies.clear()
+            connections = self.idle.setdefault(connection.address, [])
+            if len(connections) < self.pool_size:
+                connection.released = time.monotonic()
+                connections.append(connection)
+                return
+        connection.framed.close()
+
+    def close(self):
+        """
+        Fecha as conexões ociosas
+        """
+        with self.lock:
+            idle = [
+                connection
+                for connections in self.idle.values()
+                for connection in connections
+            ]
+            self.idle.clear()
+        for connection in idle:
+            connection.framed.close()
+
+    ###### CANAIS SERVIDORES ######
+
+    def serve(
+        self,
+        host: str,
+        port: int,
+        description: str,
+        handler: Callable[[str], Any],
+    ):
+        """
+        Atende os clientes do canal servidor, respondendo cada mensagem
+        com o retorno do handler, que pode ser chamado por várias threads
+        """
+        slots = threading.BoundedSemaphore(self.max_clients)
+        server = socket.create_server((host, port), backlog=socket.SOMAXCONN)
+        pool = ThreadPoolExecutor(
+            self.max_clients, thread_name_prefix="minipar-client"
+        )
+        if self.handler_workers:
+            handlers = ThreadPoolExecutor(
+                self.handler_workers, thread_name_prefix="minipar-handler"
+            )
+            handler = partial(handlers.submit, handler)
+        else:
+            handlers = nullcontext()
+        # as conexões terminam antes do conjunto de handlers
+        with server, handlers, pool:
+            accepted = 0
+            while not self.accept_limit or accepted < self.accept_limit:
+                # sem thread livre, a conexão espera na fila do socket
+                slots.acquire()
+                conn, _ = server.accept()
+                # respostas pequenas saem sem esperar o ACK das anteriores
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                accepted += 1
+                pool.submit(
+                    self.handle,
+                    conn,
+                    description,
+                    handler,
+                    slots.release,
+                    bool(self.handler_workers),
+                )
+
+    def handle(
+        self,
+        conn: socket.socket,
+        description: str,
+        handler: Callable[[str], Any],
+        release: Callable[[], None],
+        pooled: bool,
+    ):
+        """
+        Atende um cliente até ele fechar a conexão. Com o conjunto de
+        handlers, o handler retorna um Future, e as respostas são
+        escritas por outra thread na ordem das mensagens, de modo que a
+        leitura continua enquanto handlers lentos executam
+        """
+        try:
+            with conn:
+                framed = FramedSocket(conn)
+                # a descrição é sempre enviada, mesmo vazia, pois o
+                # cliente espera por ela ao conectar
+                framed.send(description.encode("utf-8"))
+
+                if not pooled:
+                    while (data := framed.receive_text()) is not None:
+                        print(f"received: {data}")
+
+                        ret = handler(data)
+
+                        framed.send(str(ret).encode("utf-8"))
+                    return
+
+                replies: queue.SimpleQueue[Future | None] = queue.SimpleQueue()
+                writer = threading.Thread(
+                    target=self.reply, args=(framed, replies)
+                )
+                writer.start()
+                try:
+                    while (data := framed.receive_text()) is not None:
+                        print(f"received: {data}")
+                        replies.put(handler(data))
+                finally:
+                    replies.put(None)
+                    writer.join()
+        except OSError:
+            # o cliente desconectou; os demais continuam sendo atendidos
+            pass
+        except Exception:
+            traceback.print_exc()
+        finally:
+            release()
+
+    def reply(
+        self, framed: FramedSocket, replies: "queue.SimpleQueue[Future | None]"
+    ):
+        """
+        Escreve as respostas de uma conexão na ordem das mensagens
+        """
+        while (future := replies.get()) is not None:
+            try:
+                ret = future.result()
+                framed.send(str(ret).encode("utf-8"))
+            except OSError:
+                return
+            except Exception:
+                traceback.print_exc()
+                # como sem o conjunto, o erro do handler encerra a conexão
+                framed.sock.shutdown(socket.SHUT_RDWR)
+                return
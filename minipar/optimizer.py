@@ -0,0 +1,307 @@
+"""
+Módulo de Otimização
+
+O módulo de otimização percorre a AST, já verificada pela análise
+semântica, e a simplifica antes da execução: literais são convertidos
+uma única vez para valores Python, subexpressões constantes são
+calculadas, desvios com condição constante são eliminados e os laços
+passam pelo otimizador de laços
+"""
+
+import operator
+from collections.abc import Callable
+from typing import Any
+
+from minipar import ast
+from minipar.loops import LoopOptimizer, program_names
+from minipar.token import Token
+
+# Operadores binários que podem ser calculados em tempo de compilação
+FOLDABLE_OPERATORS: dict[str, Callable[[Any, Any], Any]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+
+def decode_constant(node: ast.Constant) -> Any:
+    """
+    Converte o valor textual de um literal para o valor Python,
+    reaproveitando o valor já decodificado pelo otimizador
+
+    Returns:
+        Any: valor equivalente ao calculado por Executor.exec_Constant
+    """
+    if node.value is not None:
+        return node.value
+    value = node.token.value
+    match node.type:
+        case "NUMBER":
+            try:
+                return int(value)
+            except ValueError:
+                return float(value)
+        case "BOOL":
+            return value == "true"
+        case _:
+            return value
+
+
+def make_constant(value: Any) -> ast.Constant | None:
+    """
+    Cria um literal a partir de um valor calculado pelo otimizador
+
+    Returns:
+        Constant | None: literal equivalente, ou None se o valor não
+            puder ser representado na linguagem
+    """
+    match value:
+        case bool():
+            text, kind = ("true" if value else "false"), "BOOL"
+        case int() | float():
+            text, kind = repr(value), "NUMBER"
+        case str():
+            text, kind = value, "STRING"
+        case _:
+            return None
+    tag = {"BOOL": "TRUE" if value is True else "FALSE"}.get(kind, kind)
+    return ast.Constant(type=kind, token=Token(tag, text), value=value)
+
+
+def declares(block: ast.Body | None) -> bool:
+    """
+    Verifica se um bloco declara variáveis ou funções, ou seja, se
+    depende de um escopo próprio
+    """
+    return any(
+        isinstance(stmt, ast.FuncDef)
+        or (isinstance(stmt, ast.Assign) and getattr(stmt.left, "decl"))
+        for stmt in block or []
+    )
+
+
+class Optimizer:
+    """
+    Classe que otimiza a AST
+
+    Cada método `visit_` retorna o nó otimizado, que pode ser o próprio
+    nó, um literal equivalente ou, para instruções, uma lista de
+    instruções que o substitui no bloco
+
+    Attributes:
+        function_table (dict): funções do programa, pelo nome, usadas
+            para saber quais variáveis cada chamada altera
+        folded (int): quantidade de expressões calculadas
+        removed (int): quantidade de desvios eliminados
+        loops (LoopOptimizer | None): otimizador dos laços do programa
+    """
+
+    def __init__(self, function_table: dict[str, ast.FuncDef] | None = None):
+        self.function_table = function_table or {}
+        self.folded: int = 0
+        self.removed: int = 0
+        self.loops: LoopOptimizer | None = None
+
+    def optimize(self, node: ast.Module) -> ast.Module:
+        """
+        Otimiza um programa
+
+        Returns:
+            Module: o mesmo módulo, com os nós otimizados
+        """
+        self.loops = LoopOptimizer(
+            self.function_table, program_names(node.stmts)
+        )
+        node.stmts = self.visit_block(node.stmts)
+        return node
+
+    def visit(self, node: ast.Node):
+        meth_name: str = f"visit_{type(node).__name__}"
+        visitor = getattr(self, meth_name, None)
+
+        if visitor:
+            return visitor(node)
+        return node
+
+    def visit_block(self, block: ast.Body | None) -> ast.Body:
+        stmts: ast.Body = []
+        for stmt in block or []:
+            optimized = self.visit(stmt)
+            if isinstance(optimized, list):
+                stmts.extend(optimized)
+            else:
+                stmts.append(optimized)
+        return stmts
+
+    def constant(self, node: ast.Expression) -> ast.Constant | None:
+        if isinstance(node, ast.Constant):
+            return node
+        return None
+
+    def fold(self, node: ast.Expression, value: Any) -> ast.Expression:
+        constant = make_constant(value)
+        if constant is None:
+            return node
+        self.folded += 1
+        return constant
+
+    ###### VISIT STATEMENTS ######
+
+    def visit_Assign(self, node: ast.Assign):
+        node.right = self.visit(node.right)
+        return node
+
+    def visit_Return(self, node: ast.Return):
+        node.expr = self.visit(node.expr)
+        return node
+
+    def visit_FuncDef(self, node: ast.FuncDef):
+        for name, (kind, default) in node.params.items():
+            if default:
+                node.params[name] = (kind, self.visit(default))
+        node.body = self.visit_block(node.body)
+        return node
+
+    def visit_If(self, node: ast.If):
+        node.condition = self.visit(node.condition)
+        node.body = self.visit_block(node.body)
+        if node.else_stmt:
+            node.else_stmt = self.visit_block(node.else_stmt)
+
+        condition = self.constant(node.condition)
+        if condition is None:
+            return node
+
+        self.removed += 1
+        block = node.body if condition.value else node.else_stmt
+        if not block:
+            return []
+        if declares(block):
+            # o bloco mantém o próprio escopo
+            return ast.If(make_constant(True), block, None)
+        return block
+
+    def visit_While(self, node: ast.While):
+        node.condition = self.visit(node.condition)
+        node.body = self.visit_block(node.body)
+
+        condition = self.constant(node.condition)
+        if condition is not None and not condition.value:
+            self.removed += 1
+            return []
+        if self.loops is None:
+            return node
+        return self.loops.optimize(node)
+
+    def visit_Par(self, node: ast.Par):
+        node.body = self.visit_block(node.body)
+        return node
+
+    def visit_ParReduce(self, node: ast.ParReduce):
+        node.body = [self.visit(call) for call in node.body]
+        return node
+
+    def visit_ParFor(self, node: ast.ParFor):
+        node.start = self.visit(node.start)
+        node.end = self.visit(node.end)
+        node.body = self.visit_block(node.body)
+        return node
+
+    def visit_Seq(self, node: ast.Seq):
+        node.body = self.visit_block(node.body)
+        return node
+
+    def visit_Chan(self, node: ast.Chan):
+        node.capacity = self.visit(node.capacity)
+        return node
+
+    def visit_SChannel(self, node: ast.SChannel):
+        node.description = self.visit(node.description)
+        return node
+
+    ###### VISIT EXPRESSIONS ######
+
+    def visit_Constant(self, node: ast.Constant):
+        if node.value is None:
+            node.value = decode_constant(node)
+        return node
+
+    def visit_Access(self, node: ast.Access):
+        node.expr = self.visit(node.expr)
+        return node
+
+    def visit_Logical(self, node: ast.Logical):
+        node.left = self.visit(node.left)
+        node.right = self.visit(node.right)
+        left = self.constant(node.left)
+        right = self.constant(node.right)
+
+        match node.token.value:
+            case "&&" if left is not None and not left.value:
+                # o operando direito nunca é avaliado
+                return self.fold(node, left.value)
+            case "&&" if left is not None:
+                # o resultado é o próprio operando direito
+                self.folded += 1
+                return node.right
+            case "||" if left is not None and right is not None:
+                return self.fold(node, left.value or right.value)
+            case _:
+                return node
+
+    visit_And = visit_Or = visit_Logical
+
+    def visit_binary(self, node: ast.Relational | ast.Arithmetic):
+        node.left = self.visit(node.left)
+        node.right = self.visit(node.right)
+        left = self.constant(node.left)
+        right = self.constant(node.right)
+        op = FOLDABLE_OPERATORS.get(node.token.value)
+
+        if left is None or right is None or op is None:
+            return node
+        if op is operator.mul and str in (type(left.value), type(right.value)):
+            # repetição de strings pode gerar literais enormes
+            return node
+        try:
+            value = op(left.value, right.value)
+        except (ArithmeticError, TypeError, ValueError):
+            # o erro é mantido para a execução
+            return node
+        return self.fold(node, value)
+
+    visit_Relational = visit_binary
+    visit_Arithmetic = visit_binary
+    visit_TypedRelational = visit_binary
+    visit_NumberArithmetic = visit_StringConcat = visit_binary
+
+    def visit_Unary(self, node: ast.Unary):
+        node.expr = self.visit(node.expr)
+        expr = self.constant(node.expr)
+
+        if expr is None:
+            return node
+        match node.token.value:
+            case "!":
+                return self.fold(node, not expr.value)
+            case "-":
+                try:
+                    return self.fold(node, expr.value * (-1))
+                except TypeError:
+                    return node
+            case _:
+                return node
+
+    def visit_Call(self, node: ast.Call):
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    visit_ChannelCall = visit_Call
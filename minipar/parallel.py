@@ -0,0 +1,421 @@
+"""
+Módulo de Execução Paralela
+
+O módulo de execução paralela executa os ramos dos blocos par em
+conjuntos reutilizáveis de threads ou de processos. As threads
+persistentes evitam criar uma thread por ramo a cada execução do bloco;
+os processos contornam o GIL nos ramos que usam a CPU. O programa é
+enviado uma única vez a cada processo, e cada ramo recebe apenas o
+índice da sua chamada. As variáveis que os ramos de um bloco par leem
+são serializadas uma única vez por bloco; quando grandes, passam por
+memória compartilhada
+"""
+
+import os
+import pickle
+import queue
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+from minipar import ast
+from minipar.channels import Channel
+from minipar.dependencies import DependencyAnalyzer
+from minipar.executor import Executor
+from minipar.loops import parallel_nodes, statements
+from minipar.schedule import raise_first
+from minipar.symtable import VarTable
+
+# Segundos que uma thread além do tamanho do conjunto espera por um
+# novo ramo antes de terminar
+KEEP_ALIVE = 1.0
+
+# Variáveis serializadas a partir deste tamanho, em bytes, vão por
+# memória compartilhada
+SHARED_THRESHOLD = 64 * 1024
+
+# Variáveis lidas da memória compartilhada mantidas em cada processo,
+# para os ramos do mesmo bloco par
+BLOCK_CACHE_SIZE = 8
+
+
+@dataclass(frozen=True)
+class SharedVariables:
+    """
+    Referência às variáveis de um bloco par, serializadas em memória
+    compartilhada
+
+    Attributes:
+        name (str): nome do bloco de memória compartilhada
+        size (int): tamanho das variáveis serializadas, em bytes
+    """
+
+    name: str
+    size: int
+
+
+def branch_calls(module: ast.Module) -> list[ast.Call]:
+    """
+    Lista as chamadas dos ramos de todos os blocos par do programa,
+    inclusive os das reduções, na mesma ordem no processo principal e
+    nos processos do conjunto
+    """
+    calls: list[ast.Call] = []
+    for node in parallel_nodes(module.stmts):
+        calls.extend(node.body)  # type: ignore
+    return calls
+
+
+def function_definitions(module: ast.Module) -> dict[str, ast.FuncDef]:
+    """
+    Monta a tabela com as funções declaradas no programa, mantendo a
+    primeira declaração de cada nome como na análise semântica
+    """
+    functions: dict[str, ast.FuncDef] = {}
+    for stmt in statements(module.stmts):
+        if isinstance(stmt, ast.FuncDef):
+            functions.setdefault(stmt.name, stmt)
+    return functions
+
+
+###### CONJUNTO DE THREADS ######
+
+
+@dataclass
+class Task:
+    """
+    Ramo de um bloco par submetido ao conjunto de threads
+
+    Attributes:
+        branch (Callable): função que executa o ramo
+        done (Event): sinalizado quando o ramo termina
+        claimed (Lock): adquirido por quem executa o ramo
+        error (Exception | None): erro lançado pelo ramo
+    """
+
+    branch: Callable[[], Any]
+    done: threading.Event = field(default_factory=threading.Event)
+    claimed: threading.Lock = field(default_factory=threading.Lock)
+    error: Exception | None = None
+
+    def claim(self) -> bool:
+        """
+        Reserva o ramo para quem vai executá-lo; apenas a primeira
+        reserva é aceita
+        """
+        return self.claimed.acquire(blocking=False)
+
+    def run(self):
+        try:
+            self.branch()
+        except Exception as error:
+            self.error = error
+        finally:
+            self.done.set()
+
+
+@dataclass
+class ThreadPool:
+    """
+    Conjunto persistente de threads que executa os ramos dos blocos par
+
+    Sem limite de concorrência, cada ramo recebe uma thread livre,
+    criando threads extras se necessário, pois ramos podem depender uns
+    dos outros (um servidor e um cliente, por exemplo); as threads
+    extras terminam quando ficam ociosas por KEEP_ALIVE segundos. Com limite, os
+    ramos excedentes esperam por uma thread livre, e quem espera o bloco
+    executa os ramos ainda não iniciados, de modo que blocos par
+    aninhados não travam com todas as threads ocupadas
+
+    Attributes:
+        workers (int): quantidade de threads mantidas no conjunto
+        bounded (bool): se a concorrência é limitada a `workers`
+        threads (list): threads em execução
+        available (int): threads livres e ainda não reservadas
+    """
+
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    bounded: bool = False
+    threads: list[threading.Thread] = field(default_factory=list)
+    available: int = 0
+
+    def __post_init__(self):
+        self.tasks: queue.SimpleQueue[Task | None] = queue.SimpleQueue()
+        self.lock = threading.Lock()
+
+    def run(self, branches: list[Callable[[], Any]]):
+        """
+        Executa os ramos de um bloco par e espera todos terminarem; o
+        erro do primeiro ramo que falhou é relançado
+        """
+        tasks = [Task(branch) for branch in branches]
+        with self.lock:
+            if self.bounded:
+                missing = self.workers - len(self.threads)
+            else:
+                reserved = min(self.available, len(tasks))
+                self.available -= reserved
+                missing = len(tasks) - reserved
+            for _ in range(max(missing, 0)):
+                self.start()
+
+        for task in tasks:
+            self.tasks.put(task)
+        if self.bounded:
+            for task in tasks:
+                if task.claim():
+                    task.run()
+        for task in tasks:
+            task.done.wait()
+        raise_first([task.error for task in tasks])
+
+    def start(self):
+        thread = threading.Thread(target=self.work, daemon=True)
+        self.threads.append(thread)
+        thread.start()
+
+    def work(self):
+        while True:
+            extra = len(self.threads) > self.workers
+            try:
+                task = self.tasks.get(timeout=KEEP_ALIVE if extra else None)
+            except queue.Empty:
+                with self.lock:
+                    # threads extras terminam após KEEP_ALIVE sem ramos,
+                    # desde que nenhum ramo tenha contado com elas
+                    if len(self.threads) > self.workers and self.available:
+                        self.available -= 1
+                        self.threads.remove(threading.current_thread())
+                        return
+                continue
+            if task is None:
+                return
+            if task.claim():
+                task.run()
+            with self.lock:
+                self.available += 1
+
+    def close(self):
+        """
+        Encerra as threads do conjunto
+        """
+        with self.lock:
+            threads = list(self.threads)
+        for _ in threads:
+            self.tasks.put(None)
+
+
+###### PROCESSOS DO CONJUNTO ######
+
+
+@dataclass
+class Worker:
+    """
+    Estado de um processo do conjunto, criado uma vez por processo
+
+    Attributes:
+        calls (list): chamadas dos ramos, pelo índice
+        functions (dict): funções do programa, pelo nome
+        blocks (OrderedDict): últimas variáveis lidas da memória
+            compartilhada, da menos para a mais recente
+    """
+
+    calls: list[ast.Call]
+    functions: dict[str, ast.FuncDef]
+    blocks: OrderedDict[SharedVariables, dict[str, Any]] = field(
+        default_factory=OrderedDict
+    )
+
+    def load(self, variables: "bytes | SharedVariables") -> dict[str, Any]:
+        """
+        Retorna as variáveis de um bloco par; as da memória
+        compartilhada são desserializadas uma vez por processo
+        """
+        if not isinstance(variables, SharedVariables):
+            return pickle.loads(variables)
+        table = self.blocks.get(variables)
+        if table is not None:
+            self.blocks.move_to_end(variables)
+            return table
+        segment = SharedMemory(variables.name)
+        try:
+            table = pickle.loads(segment.buf[: variables.size])
+        finally:
+            segment.close()
+        self.blocks[variables] = table
+        if len(self.blocks) > BLOCK_CACHE_SIZE:
+            self.blocks.popitem(last=False)
+        return table
+
+
+worker: Worker | None = None
+
+
+def initialize(module: ast.Module):
+    global worker
+    worker = Worker(branch_calls(module), function_definitions(module))
+
+
+def run_branch(index: int, variables: "bytes | SharedVariables") -> Any:
+    """
+    Executa o ramo de índice `index` com as variáveis do seu bloco
+
+    Returns:
+        Any: valor retornado pela chamada do ramo
+    """
+    assert worker is not None
+    # cada ramo altera a própria cópia das variáveis do bloco
+    table = dict(worker.load(variables))
+    executor = Executor(VarTable(table), dict(worker.functions))
+    try:
+        return executor.execute(worker.calls[index])
+    finally:
+        sys.stdout.flush()
+
+
+###### PROCESSO PRINCIPAL ######
+
+
+@dataclass
+class ProcessPool:
+    """
+    Conjunto de processos que executa os ramos dos blocos par
+
+    Os processos são criados na primeira execução de um bloco par e
+    reaproveitados até o fim do programa
+
+    Attributes:
+        module (Module): programa enviado a cada processo
+        workers (int): quantidade de processos
+        pool (ProcessPoolExecutor | None): processos em execução
+        indexes (dict): índice de cada chamada de ramo, pelo id do nó
+        reads (dict): nomes lidos e escritos pelos ramos de cada bloco
+            par, pelo id da primeira chamada, ou None se todas as
+            variáveis visíveis são necessárias
+    """
+
+    module: ast.Module
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    pool: ProcessPoolExecutor | None = None
+    indexes: dict[int, int] = field(default_factory=dict)
+    reads: dict[int, set[str] | None] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.indexes = {
+            id(call): index
+            for index, call in enumerate(branch_calls(self.module))
+        }
+        self.dependencies = DependencyAnalyzer(
+            function_definitions(self.module).values()
+        )
+
+    def run(self, calls: list[ast.Call], var_table: VarTable) -> list[Any]:
+        """
+        Executa os ramos de um bloco par e espera todos terminarem
+
+        Returns:
+            list: valor retornado por cada ramo
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                self.workers, initializer=initialize, initargs=(self.module,)
+            )
+
+        # as variáveis são serializadas uma única vez para todos os
+        # ramos; a memória compartilhada vive até os ramos terminarem
+        data = pickle.dumps(
+            self.variables(calls, var_table), pickle.HIGHEST_PROTOCOL
+        )
+        segment = None
+        variables: bytes | SharedVariables = data
+        if len(data) >= SHARED_THRESHOLD:
+            segment = SharedMemory(create=True, size=len(data))
+            segment.buf[: len(data)] = data
+            variables = SharedVariables(segment.name, len(data))
+        try:
+            # a saída do processo principal vem antes da saída dos ramos
+            sys.stdout.flush()
+            futures = [
+                self.pool.submit(run_branch, self.indexes[id(call)], variables)
+                for call in calls
+            ]
+            # o erro de um ramo é relançado depois que todos terminaram
+            wait(futures)
+            return [future.result() for future in futures]
+        finally:
+            if segment is not None:
+                segment.close()
+                segment.unlink()
+
+    def accepts(self, calls: list[ast.Call], var_table: VarTable) -> bool:
+        """
+        Verifica se as variáveis usadas pelos ramos podem ser enviadas
+        aos processos; canais existem apenas no processo que os criou
+        """
+        return not any(
+            isinstance(value, Channel)
+            for value in self.variables(calls, var_table).values()
+        )
+
+    def variables(
+        self, calls: list[ast.Call], var_table: VarTable
+    ) -> dict[str, Any]:
+        """
+        Reúne as variáveis visíveis que os ramos de um bloco par leem ou
+        escrevem, inclusive pelas funções que chamam
+        """
+        names = self.needed(calls)
+        visible = self.visible(var_table)
+        if names is None:
+            return visible
+        return {name: visible[name] for name in names if name in visible}
+
+    def needed(self, calls: list[ast.Call]) -> set[str] | None:
+        """
+        Calcula, com cache, os nomes usados pelos ramos de um bloco par,
+        a partir dos resumos da análise de dependências; blocos que
+        chamam funções com par ou canais socket recebem todas as
+        variáveis visíveis
+        """
+        key = id(calls[0])
+        if key in self.reads:
+            return self.reads[key]
+        names: set[str] | None = set()
+        for call in calls:
+            access = self.dependencies.access(call)
+            if access.barrier:
+                names = None
+                break
+            names |= access.reads | access.writes  # type: ignore
+        self.reads[key] = names
+        return names
+
+    def visible(self, var_table: VarTable) -> dict[str, Any]:
+        """
+        Reúne em uma única tabela as variáveis visíveis no escopo atual
+        """
+        chain = []
+        st: VarTable | None = var_table
+        while st:
+            chain.append(st.table)
+            st = st.prev
+
+        variables: dict[str, Any] = {}
+        for table in reversed(chain):
+            for name, value in table.items():
+                if value is not None:
+                    variables[name] = value
+        return variables
+
+    def close(self):
+        """
+        Encerra os processos
+        """
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
@@ -13,7 +13,13 @@ from minipar import ast
 from minipar import error as err
 from minipar.lexer import Lexer, NextToken
 from minipar.symtable import Symbol, SymTable
-from minipar.token import DEFAULT_FUNCTION_NAMES, STATEMENT_TOKENS, Token
+from minipar.token import (
+    CHANNEL_TYPE,
+    DEFAULT_FUNCTION_NAMES,
+    REDUCTIONS,
+    STATEMENT_TOKENS,
+    Token,
+)
 
 
 class IParser(ABC):
@@ -189,7 +195,10 @@ class Parser(IParser):
                 return ast.Seq(body=self.block())
             case "PAR":
                 # par_stmt -> par block
+                #           | par for ( ID in expression , expression ) block
                 self.match("PAR")
+                if self.lookahead.tag == "FOR":
+                    return self.par_for()
                 return ast.Par(body=self.block())
             case "C_CHANNEL":
                 # c_channel_stmt -> c_channel ID {STRING, NUMBER}
@@ -255,12 +264,97 @@ class Parser(IParser):
                     func_name=func,
                     description=description,
                 )
+            case "CHAN":
+                # chan_stmt -> chan ID : TYPE { expression }
+                self.match("CHAN")
+                token: Token = deepcopy(self.lookahead)
+                if not self.match("ID"):
+                    raise err.SyntaxError(
+                        self.lineno,
+                        f"esperado um identificador no lugar de {self.lookahead.value}",
+                    )
+                if not self.match(":"):
+                    raise err.SyntaxError(
+                        self.lineno,
+                        f"esperado : no lugar de {self.lookahead.value}",
+                    )
+                _type: str = self.lookahead.value
+                if not self.match("TYPE") or _type == "void":
+                    raise err.SyntaxError(
+                        self.lineno, f"tipo {_type} inválido para um canal"
+                    )
+                if not self.match("{"):
+                    raise err.SyntaxError(
+                        self.lineno,
+                        f"esperando {{ no lugar de {self.lookahead.value}",
+                    )
+                capacity: ast.Expression = self.ari()
+                if not self.match("}"):
+                    raise err.SyntaxError(
+                        self.lineno,
+                        f"esperando }} no lugar de {self.lookahead.value}",
+                    )
+                chan_type = CHANNEL_TYPE + _type.upper()
+                if not self.symtable.insert(
+                    token.value, Symbol(token.value, chan_type)
+                ):
+                    raise err.SyntaxError(
+                        self.lineno,
+                        f"variável {token.value} já foi declarada neste escopo",
+                    )
+                var = ast.ID(type=chan_type, token=token, decl=True)
+                return ast.Chan(var=var, capacity=capacity)
             case _:
                 raise err.SyntaxError(
                     self.lineno,
                     f"{self.lookahead.value} não inicia instrução válida",
                 )
 
+    def par_for(self):
+        self.match("FOR")
+        if not self.match("("):
+            raise err.SyntaxError(
+                self.lineno, f"esperando ( no lugar de {self.lookahead.value}"
+            )
+        token: Token = deepcopy(self.lookahead)
+        if not self.match("ID"):
+            raise err.SyntaxError(
+                self.lineno,
+                f"esperado um identificador no lugar de {self.lookahead.value}",
+            )
+        if self.lookahead.value != "in" or not self.match("ID"):
+            raise err.SyntaxError(
+                self.lineno, f"esperando in no lugar de {self.lookahead.value}"
+            )
+        start: ast.Expression = self.ari()
+        if not self.match(","):
+            raise err.SyntaxError(
+                self.lineno, f"esperando , no lugar de {self.lookahead.value}"
+            )
+        end: ast.Expression = self.ari()
+        if not self.match(")"):
+            raise err.SyntaxError(
+                self.lineno, f"esperando ) no lugar de {self.lookahead.value}"
+            )
+        # o índice é declarado no escopo do corpo, como um parâmetro
+        body: ast.Body = self.block({token.value: ("NUMBER", None)})
+        var = ast.ID(type="NUMBER", token=token, decl=True)
+        return ast.ParFor(var=var, start=start, end=end, body=body)
+
+    def par_reduce(self):
+        self.match("PAR")
+        token: Token = deepcopy(self.lookahead)
+        if token.value not in REDUCTIONS or not self.match("ID"):
+            raise err.SyntaxError(
+                self.lineno,
+                f"esperando uma redução ({', '.join(REDUCTIONS)}) no lugar "
+                f"de {token.value}",
+            )
+        body: ast.Body = self.block()
+        return ast.ParReduce(
+            type=REDUCTIONS[token.value], token=token, body=body
+        )
+
     def block(self, params: ast.Parameters | None = None):
         # block -> { stmts }
         if not self.match("{"):
@@ -586,6 +680,7 @@ class Parser(IParser):
 
     def primary(self):
         # primary -> ( disjunction )
+        #       | par ID block
         #       | local
         #       | NUMBER
         #       | STRING
@@ -601,6 +696,8 @@ class Parser(IParser):
                         self.lineno,
                         f"esperando ) no lugar de {self.lookahead.value}",
                     )
+            case "PAR":
+                expr = self.par_reduce()
             case "ID":
                 expr = self.local()
             case "NUMBER":
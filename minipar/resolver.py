@@ -0,0 +1,356 @@
+"""
+Módulo de Resolução de Nomes
+
+O módulo de resolução percorre a AST, já verificada pela análise
+semântica, e atribui a cada variável um endereço léxico fixo
+(profundidade, posição). Com esses endereços, os motores de execução
+usam frames baseados em listas pré-alocadas no lugar da busca
+encadeada em VarTable
+"""
+
+from copy import deepcopy
+from dataclasses import dataclass, field
+
+from minipar import ast
+from minipar import error as err
+
+# Endereço léxico: (funções a subir pelo elo estático, posição no frame)
+type Address = tuple[int, int]
+
+# Posição do elo estático (frame da função que envolve a declaração)
+STATIC_LINK = 0
+
+
+@dataclass
+class Resolution:
+    """
+    Resultado da resolução de nomes, indexado pela identidade dos nós
+
+    Attributes:
+        addresses (dict): endereço de cada ID
+        frame_sizes (dict): tamanho do frame de cada FuncDef e do Module
+        callees (dict): função chamada por cada Call ou SChannel e a
+            profundidade do frame onde ela foi declarada
+        loop_conditions (dict): condição de cada While reavaliada no
+            escopo do laço, quando difere da condição inicial
+    """
+
+    addresses: dict[int, Address] = field(default_factory=dict)
+    frame_sizes: dict[int, int] = field(default_factory=dict)
+    callees: dict[int, tuple[ast.FuncDef, int]] = field(default_factory=dict)
+    loop_conditions: dict[int, ast.Expression] = field(default_factory=dict)
+
+    def address(self, node: ast.ID) -> Address:
+        return self.addresses[id(node)]
+
+    def frame_size(self, node: ast.FuncDef | ast.Module) -> int:
+        return self.frame_sizes[id(node)]
+
+    def callee(self, node: ast.Call | ast.SChannel):
+        return self.callees.get(id(node))
+
+    def loop_condition(self, node: ast.While) -> ast.Expression:
+        return self.loop_conditions.get(id(node), node.condition)
+
+    def functions(self) -> list[ast.FuncDef]:
+        """
+        Lista, sem repetições, as funções chamadas no programa
+        """
+        called = {
+            id(function): function for function, _ in self.callees.values()
+        }
+        return list(called.values())
+
+
+@dataclass
+class Frame:
+    """
+    Frame em construção durante a resolução
+
+    Attributes:
+        size (int): quantidade de posições alocadas
+    """
+
+    size: int = STATIC_LINK + 1
+
+    def allocate(self) -> int:
+        self.size += 1
+        return self.size - 1
+
+
+@dataclass
+class Block:
+    """
+    Escopo de bloco durante a resolução
+
+    Attributes:
+        level (int): nível de aninhamento de funções do bloco
+        frame (Frame): frame da função dona do bloco
+        names (dict): posição de cada variável declarada no bloco
+        functions (dict): funções declaradas no bloco
+    """
+
+    level: int
+    frame: Frame
+    names: dict[str, int] = field(default_factory=dict)
+    functions: dict[str, ast.FuncDef] = field(default_factory=dict)
+
+
+class Resolver:
+    """
+    Classe que resolve os nomes da AST para endereços léxicos
+
+    Cada chamada de função usa um único frame: declarações em blocos
+    internos recebem posições próprias nesse frame, o que dispensa a
+    criação de escopos em tempo de execução
+
+    Attributes:
+        blocks (list): pilha de escopos de bloco
+        resolution (Resolution): resultado em construção
+    """
+
+    def __init__(self):
+        self.blocks: list[Block] = []
+        self.resolution = Resolution()
+
+    def resolve(self, node: ast.Module) -> Resolution:
+        """
+        Resolve os nomes de um programa
+
+        Returns:
+            Resolution: endereços e tamanhos de frame calculados
+        """
+        frame = Frame()
+        self.blocks.append(Block(0, frame))
+        self.visit_block(node.stmts)
+        self.blocks.pop()
+        self.resolution.frame_sizes[id(node)] = frame.size
+        return self.resolution
+
+    def visit(self, node: ast.Node):
+        meth_name: str = f"visit_{type(node).__name__}"
+        visitor = getattr(self, meth_name, None)
+
+        if visitor:
+            visitor(node)
+
+    def visit_block(self, block: ast.Body | None):
+        for node in block or []:
+            self.visit(node)
+
+    def scoped(self, block: ast.Body | None):
+        current = self.blocks[-1]
+        self.blocks.append(Block(current.level, current.frame))
+        self.visit_block(block)
+        self.blocks.pop()
+
+    def declare(self, name: str) -> Address:
+        block = self.blocks[-1]
+        if name not in block.names:
+            block.names[name] = block.frame.allocate()
+        return 0, block.names[name]
+
+    def lookup(self, name: str) -> Address:
+        level = self.blocks[-1].level
+        for block in reversed(self.blocks):
+            if name in block.names:
+                return level - block.level, block.names[name]
+        raise err.SemanticError(f"variável {name} não declarada")
+
+    def lookup_function(self, name: str):
+        level = self.blocks[-1].level
+        for block in reversed(self.blocks):
+            if name in block.functions:
+                return block.functions[name], level - block.level
+        return None
+
+    ###### VISIT STATEMENTS ######
+
+    def visit_Assign(self, node: ast.Assign):
+        self.visit(node.right)
+        var: ast.ID = node.left  # type: ignore
+        if var.decl:
+            address = self.declare(var.token.value)
+        else:
+            address = self.lookup(var.token.value)
+        self.resolution.addresses[id(var)] = address
+
+    def visit_Return(self, node: ast.Return):
+        self.visit(node.expr)
+
+    def visit_FuncDef(self, node: ast.FuncDef):
+        outer = self.blocks[-1]
+        outer.functions[node.name] = node
+
+        frame = Frame()
+        block = Block(outer.level + 1, frame)
+        self.blocks.append(block)
+        # valores padrão são resolvidos no escopo da chamada
+        for name, (_, default) in node.params.items():
+            if default:
+                self.visit(default)
+        for name in node.params:
+            block.names[name] = frame.allocate()
+        self.visit_block(node.body)
+        self.blocks.pop()
+
+        self.resolution.frame_sizes[id(node)] = frame.size
+
+    def visit_If(self, node: ast.If):
+        self.visit(node.condition)
+        self.scoped(node.body)
+        if node.else_stmt:
+            self.scoped(node.else_stmt)
+
+    def visit_While(self, node: ast.While):
+        self.visit(node.condition)
+
+        current = self.blocks[-1]
+        self.blocks.append(Block(current.level, current.frame))
+        self.visit_block(node.body)
+
+        # após a primeira iteração, a condição é avaliada no escopo do
+        # laço e enxerga as declarações feitas no corpo
+        condition = deepcopy(node.condition)
+        self.visit(condition)
+        if self.differs(node.condition, condition):
+            self.resolution.loop_conditions[id(node)] = condition
+        else:
+            self.forget(condition)
+        self.blocks.pop()
+
+    visit_CountingWhile = visit_While
+
+    def visit_Par(self, node: ast.Par):
+        self.visit_block(node.body)
+
+    def visit_ParReduce(self, node: ast.ParReduce):
+        for call in node.body:
+            self.visit(call)
+
+    def visit_ParFor(self, node: ast.ParFor):
+        self.visit(node.start)
+        self.visit(node.end)
+
+        current = self.blocks[-1]
+        self.blocks.append(Block(current.level, current.frame))
+        self.resolution.addresses[id(node.var)] = self.declare(
+            node.var.token.value
+        )
+        self.visit_block(node.body)
+        self.blocks.pop()
+
+    def visit_Seq(self, node: ast.Seq):
+        self.scoped(node.body)
+
+    def visit_Chan(self, node: ast.Chan):
+        self.visit(node.capacity)
+        address = self.declare(node.var.token.value)
+        self.resolution.addresses[id(node.var)] = address
+
+    def visit_CChannel(self, node: ast.CChannel):
+        self.visit(node._localhost)
+        self.visit(node._port)
+
+    def visit_SChannel(self, node: ast.SChannel):
+        self.visit(node.description)
+        self.visit(node._localhost)
+        self.visit(node._port)
+        callee = self.lookup_function(node.func_name)
+        if callee:
+            self.resolution.callees[id(node)] = callee
+
+    ###### VISIT EXPRESSIONS ######
+
+    def visit_ID(self, node: ast.ID):
+        self.resolution.addresses[id(node)] = self.lookup(node.token.value)
+
+    def visit_Access(self, node: ast.Access):
+        self.visit(node.id)
+        self.visit(node.expr)
+
+    def visit_binary(
+        self, node: ast.Logical | ast.Relational | ast.Arithmetic
+    ):
+        self.visit(node.left)
+        self.visit(node.right)
+
+    visit_Logical = visit_binary
+    visit_Relational = visit_binary
+    visit_Arithmetic = visit_binary
+    visit_And = visit_Or = visit_binary
+    visit_TypedRelational = visit_binary
+    visit_NumberArithmetic = visit_StringConcat = visit_binary
+
+    def visit_Unary(self, node: ast.Unary):
+        self.visit(node.expr)
+
+    def visit_ChannelCall(self, node: ast.ChannelCall):
+        self.visit(node.id)  # type: ignore
+        for arg in node.args:
+            self.visit(arg)
+
+    def visit_Call(self, node: ast.Call):
+        for arg in node.args:
+            self.visit(arg)
+        if not node.oper:
+            callee = self.lookup_function(node.token.value)
+            if callee:
+                self.resolution.callees[id(node)] = callee
+
+    def differs(self, first: ast.Node, second: ast.Node) -> bool:
+        """
+        Verifica se duas cópias de uma expressão foram resolvidas
+        para endereços diferentes
+        """
+        addresses = self.resolution.addresses
+        ids = [
+            (addresses.get(id(a)), addresses.get(id(b)))
+            for a, b in zip(walk(first), walk(second))
+        ]
+        return any(a != b for a, b in ids)
+
+    def forget(self, node: ast.Node):
+        """
+        Remove os resultados de uma expressão descartada
+        """
+        for child in walk(node):
+            self.resolution.addresses.pop(id(child), None)
+            self.resolution.callees.pop(id(child), None)
+
+
+def walk(node: ast.Node):
+    """
+    Percorre os nós de uma expressão em pré-ordem
+    """
+    yield node
+    match node:
+        case ast.Logical() | ast.Relational() | ast.Arithmetic():
+            yield from walk(node.left)
+            yield from walk(node.right)
+        case ast.Unary():
+            yield from walk(node.expr)
+        case ast.Access():
+            yield from walk(node.id)
+            yield from walk(node.expr)
+        case ast.ChannelCall():
+            yield from walk(node.id)  # type: ignore
+            for arg in node.args:
+                yield from walk(arg)
+        case ast.Call():
+            for arg in node.args:
+                yield from walk(arg)
+        case ast.ParReduce():
+            for call in node.body:
+                yield from walk(call)
+
+
+def copy_frames(frame: list) -> list:
+    """
+    Copia um frame e a cadeia de frames acessível pelo elo estático,
+    isolando as variáveis de um ramo paralelo
+    """
+    copied = list(frame)
+    if copied[STATIC_LINK] is not None:
+        copied[STATIC_LINK] = copy_frames(copied[STATIC_LINK])
+    return copied
@@ -0,0 +1,350 @@
+"""
+Módulo de Escalonamento
+
+O módulo de escalonamento divide o intervalo de índices de um par for
+em blocos (chunks) distribuídos dinamicamente entre os workers. Cada
+worker retira o próximo bloco quando termina o anterior, e o tamanho
+dos blocos diminui com o trabalho restante (escalonamento guiado), o
+que equilibra a carga quando o custo das iterações varia. O
+escalonador registra, para cada laço, quanto trabalho cada worker fez.
+
+O escalonador também decide, para cada bloco par, se os ramos executam
+em paralelo ou em sequência na thread atual, quando são curtos demais
+para compensar o custo das threads. A decisão parte do custo estimado
+pela análise semântica e passa a seguir os tempos medidos dos ramos
+"""
+
+import math
+import os
+import sys
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import partial
+from time import perf_counter
+from typing import Any
+
+from minipar import ast
+from minipar import error as err
+from minipar.memo import MISSING
+
+type Iteration = Callable[[int], Any]
+
+# Custo estimado a partir do qual os ramos de um par executam em
+# paralelo enquanto não há tempos medidos
+COST_THRESHOLD = 1000
+
+# Peso de cada nova medição na média móvel do tempo dos ramos
+SMOOTHING = 0.25
+
+
+def integer(bound: Any, label: str) -> int:
+    """
+    Converte um limite do par for, aceitando números reais inteiros
+    """
+    if isinstance(bound, float) and bound.is_integer():
+        return int(bound)
+    if not isinstance(bound, int) or isinstance(bound, bool):
+        raise err.RunTimeError(
+            f"limites do par for {label} precisam ser inteiros"
+        )
+    return bound
+
+
+def raise_first(errors: list[Exception | None]):
+    """
+    Relança, depois que todos os ramos terminaram, o erro do primeiro
+    ramo que falhou, na ordem em que os ramos foram escritos
+    """
+    for error in errors:
+        if error is not None:
+            raise error
+
+
+@dataclass
+class LoopStats:
+    """
+    Métricas de balanceamento de um par for, acumuladas entre execuções
+
+    Attributes:
+        label (str): nome da variável de índice do laço
+        runs (int): quantidade de execuções do laço
+        iterations (int): quantidade total de iterações
+        chunks (int): quantidade total de blocos distribuídos
+        done (list): iterações executadas por cada worker
+        busy (list): segundos ocupados de cada worker
+    """
+
+    label: str
+    runs: int = 0
+    iterations: int = 0
+    chunks: int = 0
+    done: list[int] = field(default_factory=list)
+    busy: list[float] = field(default_factory=list)
+
+    @property
+    def imbalance(self) -> float:
+        """
+        Razão entre o worker mais ocupado e a média (1.0 é o equilíbrio)
+        """
+        total = sum(self.busy)
+        if not total:
+            return 1.0
+        return max(self.busy) / (total / len(self.busy))
+
+
+@dataclass
+class ParStats:
+    """
+    Decisões e tempos medidos de um bloco par, acumulados entre execuções
+
+    Attributes:
+        label (str): chamadas dos ramos do bloco
+        cost (float): custo estimado do ramo mais caro
+        parallel (int): execuções com os ramos em paralelo
+        inline (int): execuções com os ramos em sequência
+        branches (int): quantidade total de ramos executados
+        seconds (float): soma dos tempos medidos dos ramos
+        average (float | None): média móvel do tempo de um ramo
+    """
+
+    label: str
+    cost: float
+    parallel: int = 0
+    inline: int = 0
+    branches: int = 0
+    seconds: float = 0.0
+    average: float | None = None
+
+
+def par_label(node: ast.Par | ast.ParReduce) -> str:
+    calls = ", ".join(str(call.token.value) for call in node.body)
+    if isinstance(node, ast.ParReduce):
+        return f"par {node.token.value} {{{calls}}}"
+    return f"par {{{calls}}}"
+
+
+@dataclass
+class Scheduler:
+    """
+    Escalonador guiado dos par for e da granularidade dos blocos par
+
+    Compartilhado entre os executores de ramos paralelos, por isso o
+    registro das métricas é protegido por um lock
+
+    Attributes:
+        workers (int): quantidade máxima de workers por laço
+        min_chunk (int): menor tamanho de bloco distribuído
+        grain (float): segundos a partir dos quais um ramo compensa uma
+            thread; com 0, os ramos sempre executam em paralelo
+        log (bool): se as decisões dos blocos par são registradas em
+            stderr
+        stats (dict): métricas de cada laço, pela identidade do nó
+        blocks (dict): métricas de cada bloco par, pela identidade do nó
+    """
+
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    min_chunk: int = 1
+    grain: float = 0.001
+    log: bool = False
+    stats: dict[Any, LoopStats] = field(default_factory=dict)
+    blocks: dict[Any, ParStats] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.lock = threading.Lock()
+
+    def run(
+        self,
+        key: Any,
+        label: str,
+        start: Any,
+        end: Any,
+        worker: Callable[[], Iteration],
+        run_branches: Callable[[list[Callable[[], Any]]], Any],
+    ):
+        """
+        Executa as iterações de `start` até `end` (exclusivo) e espera
+        todas terminarem
+
+        Args:
+            worker (Callable): cria a função que executa uma iteração,
+                chamada uma vez por worker
+            run_branches (Callable): executa as funções dos workers em
+                paralelo
+        """
+        start, end = integer(start, label), integer(end, label)
+        total = end - start
+        if total <= 0:
+            return
+
+        count = min(self.workers, total)
+        lock = threading.Lock()
+        position = start
+        done = [0] * count
+        busy = [0.0] * count
+        chunks = [0] * count
+
+        def claim() -> tuple[int, int] | None:
+            nonlocal position
+            with lock:
+                remaining = end - position
+                if remaining <= 0:
+                    return None
+                # blocos diminuem conforme o trabalho restante
+                size = max(self.min_chunk, -(-remaining // (2 * count)))
+                first = position
+                position = min(position + size, end)
+                return first, position
+
+        def work(index: int):
+            iteration = worker()
+            while (chunk := claim()) is not None:
+                began = perf_counter()
+                for value in range(*chunk):
+                    iteration(value)
+                busy[index] += perf_counter() - began
+                done[index] += chunk[1] - chunk[0]
+                chunks[index] += 1
+
+        run_branches([partial(work, index) for index in range(count)])
+        self.record(key, label, done, busy, sum(chunks))
+
+    def record(
+        self,
+        key: Any,
+        label: str,
+        done: list[int],
+        busy: list[float],
+        chunks: int,
+    ):
+        with self.lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = LoopStats(label)
+            missing = len(done) - len(stats.done)
+            if missing > 0:
+                stats.done += [0] * missing
+                stats.busy += [0.0] * missing
+            for index, (count, seconds) in enumerate(zip(done, busy)):
+                stats.done[index] += count
+                stats.busy[index] += seconds
+            stats.runs += 1
+            stats.iterations += sum(done)
+            stats.chunks += chunks
+
+    def run_par(
+        self,
+        key: Any,
+        label: str,
+        cost: float,
+        branches: list[Callable[[], Any]],
+        run_branches: Callable[[list[Callable[[], Any]]], Any],
+    ) -> list[Any]:
+        """
+        Executa os ramos de um bloco par em paralelo ou, se forem curtos
+        demais para compensar as threads, em sequência na thread atual
+
+        Args:
+            cost (float): custo estimado do ramo mais caro do bloco
+            run_branches (Callable): executa os ramos em paralelo
+
+        Returns:
+            list: valor de cada ramo
+        """
+        stats = self.blocks.get(key)
+        if stats is None:
+            with self.lock:
+                stats = self.blocks.setdefault(key, ParStats(label, cost))
+        parallel = self.parallel(stats)
+
+        results: list[Any] = [MISSING] * len(branches)
+        durations = [0.0] * len(branches)
+
+        def run(index: int, branch: Callable[[], Any]):
+            began = perf_counter()
+            try:
+                results[index] = branch()
+            finally:
+                durations[index] = perf_counter() - began
+
+        tasks = [
+            partial(run, index, branch)
+            for index, branch in enumerate(branches)
+        ]
+        if parallel:
+            run_branches(tasks)
+        else:
+            errors: list[Exception | None] = [None] * len(tasks)
+            for index, task in enumerate(tasks):
+                try:
+                    task()
+                except Exception as error:
+                    errors[index] = error
+            self.measure(stats, parallel, durations)
+            raise_first(errors)
+            return results
+        self.measure(stats, parallel, durations)
+        return results
+
+    def parallel(self, stats: ParStats) -> bool:
+        """
+        Decide se os ramos de um bloco par executam em paralelo
+        """
+        if self.grain <= 0 or math.isinf(stats.cost):
+            return True
+        if stats.average is None:
+            return stats.cost >= COST_THRESHOLD
+        return stats.average >= self.grain
+
+    def measure(self, stats: ParStats, parallel: bool, durations: list[float]):
+        with self.lock:
+            if parallel:
+                stats.parallel += 1
+            else:
+                stats.inline += 1
+            stats.branches += len(durations)
+            stats.seconds += sum(durations)
+            if durations:
+                sample = sum(durations) / len(durations)
+                if stats.average is None:
+                    stats.average = sample
+                else:
+                    stats.average += SMOOTHING * (sample - stats.average)
+        if self.log:
+            times = ", ".join(
+                f"{seconds * 1000:.3f} ms" for seconds in durations
+            )
+            mode = "parallel" if parallel else "inline"
+            print(
+                f"[par] {stats.label}: {mode}, branches {times}",
+                file=sys.stderr,
+            )
+
+    def report(self) -> str:
+        """
+        Gera o relatório de balanceamento de cada par for e das decisões
+        de cada bloco par
+
+        Returns:
+            str: uma linha por laço ou bloco executado
+        """
+        lines = []
+        for stats in self.stats.values():
+            done = ", ".join(map(str, stats.done))
+            lines.append(
+                f"par for {stats.label}: {stats.runs} runs, "
+                f"{stats.iterations} iterations in {stats.chunks} chunks, "
+                f"{len(stats.done)} workers [{done}], "
+                f"imbalance {stats.imbalance:.2f}"
+            )
+        for block in self.blocks.values():
+            cost = (
+                "unbounded" if math.isinf(block.cost) else f"{block.cost:.0f}"
+            )
+            mean = block.seconds / block.branches if block.branches else 0.0
+            lines.append(
+                f"{block.label}: cost {cost}, {block.parallel} parallel and "
+                f"{block.inline} inline runs, {block.branches} branches, "
+                f"mean branch {mean * 1000:.3f} ms"
+            )
+        return "\n".join(lines)
@@ -6,12 +6,59 @@ cuidadosa na AST gerada pela análise sintática, visando a identificação
 de problemas semânticos
 """
 
+import operator
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 
 from minipar import ast
 from minipar import error as err
-from minipar.token import DEFAULT_FUNCTION_NAMES
+from minipar.loops import parallel_nodes
+from minipar.token import (
+    CHANNEL_METHODS,
+    CHANNEL_TYPE,
+    CONNECTION_METHODS,
+    DEFAULT_FUNCTION_NAMES,
+    REDUCTIONS,
+)
+
+# Tipos cujas operações são especializadas pela análise semântica
+SPECIALIZED_TYPES = {"NUMBER", "STRING", "BOOL"}
+
+# Operadores dos nós especializados
+SPECIALIZED_OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+# Funções padrão sem efeitos colaterais, que não impedem a memoização
+PURE_FUNCTION_NAMES = {
+    "to_number",
+    "to_string",
+    "to_bool",
+    "len",
+    "isalpha",
+    "isnum",
+}
+
+# Modelo de custo dos ramos de um par, em instruções executadas: laços
+# repetem o corpo LOOP_ITERATIONS vezes, chamadas custam CALL_COST mais
+# o corpo da função e a escrita no console custa IO_COST
+LOOP_ITERATIONS = 16
+CALL_COST = 5
+IO_COST = 50
+
+# Funções padrão que esperam por eventos externos; ramos que as usam
+# têm custo infinito e sempre executam em paralelo
+WAITING_FUNCTION_NAMES = {"sleep", "input"} | CONNECTION_METHODS
 
 # Tipo: verficação de compatibilidade de operadores (Arithmetic, Relational, Logic)
 # Funções: verificar que funções estão sendo atribuidas a variável de mesmo retorno
@@ -20,6 +67,17 @@ from minipar.token import DEFAULT_FUNCTION_NAMES
 # Escopo: verificar se return está em função e break e continue em while/for
 
 
+def specialize(node: ast.Expression, cls: type[ast.Expression], **fields):
+    """
+    Troca, no próprio nó, a classe de uma expressão pela versão
+    especializada nos tipos dos operandos. A troca é feita no lugar para
+    que as referências dos nós pais continuem válidas
+    """
+    node.__class__ = cls
+    for name, value in fields.items():
+        setattr(node, name, value)
+
+
 class ISemanticAnalyzer(ABC):
     """
     Interface para a Análise Semântica
@@ -67,6 +125,11 @@ class SemanticAnalyzer(ISemanticAnalyzer):
 
     ###### VISIT STATEMENTS ######
 
+    def visit_Module(self, node: ast.Module):
+        self.generic_visit(node)
+        self.classify_functions()
+        self.estimate_costs(node)
+
     def visit_Assign(self, node: ast.Assign):
         left_type = self.visit(node.left)
         right_type = self.visit(node.right)
@@ -96,6 +159,8 @@ class SemanticAnalyzer(ISemanticAnalyzer):
         function: ast.FuncDef = next(
             (n for n in self.context_stack[::-1] if isinstance(n, ast.FuncDef))
         )
+        if self.inside_par_for(ast.FuncDef):
+            raise err.SemanticError("return encontrado dentro de um par for")
         expr_type = self.visit(node.expr)
 
         if expr_type != function.return_type:
@@ -111,6 +176,8 @@ class SemanticAnalyzer(ISemanticAnalyzer):
             raise err.SemanticError(
                 "break encontrado fora de uma declaração de um loop"
             )
+        if self.inside_par_for(ast.While):
+            raise err.SemanticError("break encontrado dentro de um par for")
 
     def visit_Continue(self, _: ast.Continue):
         # verifica se continue está dentro de while ou for
@@ -120,11 +187,13 @@ class SemanticAnalyzer(ISemanticAnalyzer):
             raise err.SemanticError(
                 "continue encontrado fora de uma declaração de um loop"
             )
+        if self.inside_par_for(ast.While):
+            raise err.SemanticError("continue encontrado dentro de um par for")
 
     def visit_FuncDef(self, node: ast.FuncDef):
         # proibe criação de funções dentro de if, for, while, func, par
         if any(
-            isinstance(parent, (ast.If, ast.While, ast.Par))
+            isinstance(parent, (ast.If, ast.While, ast.Par, ast.ParFor))
             for parent in self.context_stack
         ):
             raise err.SemanticError(
@@ -173,6 +242,59 @@ class SemanticAnalyzer(ISemanticAnalyzer):
                 "esperado apenas funções em um bloco de execução paralela"
             )
 
+    def visit_ParReduce(self, node: ast.ParReduce):
+        reduction = node.token.value
+        if not node.body or any(
+            not isinstance(inst, ast.Call) for inst in node.body
+        ):
+            raise err.SemanticError(
+                "esperado apenas funções em um bloco de execução paralela"
+            )
+
+        # os resultados de todos os ramos têm o tipo da redução
+        expected = REDUCTIONS[reduction]
+        for call in node.body:
+            branch_type = self.visit(call)
+            if branch_type != expected:
+                raise err.SemanticError(
+                    f"(Erro de Tipo) par {reduction} espera ramos "
+                    f"{expected}, mas encontrado {branch_type}"
+                )
+        return expected
+
+    def visit_ParFor(self, node: ast.ParFor):
+        for bound in (node.start, node.end):
+            bound_type = self.visit(bound)
+            if bound_type != "NUMBER":
+                raise err.SemanticError(
+                    f"limites do par for precisam ser NUMBER, mas "
+                    f"encontrado {bound_type}"
+                )
+
+        self.context_stack.append(node)
+        self.visit_block(node.body)
+        self.context_stack.pop()
+
+    def inside_par_for(self, boundary: type[ast.Node]) -> bool:
+        """
+        Verifica se há um par for mais interno que o nó de contexto
+        `boundary` mais próximo
+        """
+        for parent in reversed(self.context_stack):
+            if isinstance(parent, ast.ParFor):
+                return True
+            if isinstance(parent, boundary):
+                return False
+        return False
+
+    def visit_Chan(self, node: ast.Chan):
+        capacity_type = self.visit(node.capacity)
+
+        if capacity_type != "NUMBER":
+            raise err.SemanticError(
+                f"capacidade de {node.var.token.value} precisa ser NUMBER"
+            )
+
     def visit_CChannel(self, node: ast.CChannel):
         localhost_type = self.visit(node._localhost)
 
@@ -246,8 +368,12 @@ class SemanticAnalyzer(ISemanticAnalyzer):
                 f"(Erro de Tipo) Esperado BOOL, mas encontrado {left_type} e {right_type} na operação {node.token.value}"
             )
 
+        specialize(node, ast.And if node.token.value == "&&" else ast.Or)
         return "BOOL"
 
+    visit_And = visit_Logical
+    visit_Or = visit_Logical
+
     def visit_Relational(self, node: ast.Relational):
         left_type = self.visit(node.left)
         right_type = self.visit(node.right)
@@ -263,8 +389,16 @@ class SemanticAnalyzer(ISemanticAnalyzer):
                     f"(Erro de Tipo) Esperado NUMBER, mas encontrado {left_type} e {right_type} na operação {node.token.value}"
                 )
 
+        if left_type in SPECIALIZED_TYPES:
+            specialize(
+                node,
+                ast.TypedRelational,
+                op=SPECIALIZED_OPERATORS[node.token.value],
+            )
         return "BOOL"
 
+    visit_TypedRelational = visit_Relational
+
     def visit_Arithmetic(self, node: ast.Arithmetic):
         left_type = self.visit(node.left)
         right_type = self.visit(node.right)
@@ -280,8 +414,19 @@ class SemanticAnalyzer(ISemanticAnalyzer):
                     f"(Erro de Tipo) Esperado NUMBER, mas encontrado {left_type} e {right_type} na operação {node.token.value}"
                 )
 
+        if left_type == right_type == "NUMBER":
+            specialize(
+                node,
+                ast.NumberArithmetic,
+                op=SPECIALIZED_OPERATORS[node.token.value],
+            )
+        elif left_type == right_type == "STRING":
+            specialize(node, ast.StringConcat)
         return left_type
 
+    visit_NumberArithmetic = visit_Arithmetic
+    visit_StringConcat = visit_Arithmetic
+
     def visit_Unary(self, node: ast.Unary):
         expr_type = self.visit(node.expr)
 
@@ -301,6 +446,9 @@ class SemanticAnalyzer(ISemanticAnalyzer):
     def visit_Call(self, node: ast.Call):
         func_name = node.oper if node.oper else node.token.value
 
+        if node.oper and node.id and node.id.type.startswith(CHANNEL_TYPE):
+            return self.visit_channel_call(node)
+
         for arg in node.args:
             self.visit(arg)
 
@@ -324,3 +472,230 @@ class SemanticAnalyzer(ISemanticAnalyzer):
             )
 
         return function.return_type
+
+    def visit_channel_call(self, node: ast.Call):
+        name, method = node.token.value, node.oper
+        value_type = node.id.type.removeprefix(CHANNEL_TYPE)  # type: ignore
+        if method not in CHANNEL_METHODS:
+            raise err.SemanticError(
+                f"método {method} não existe no canal {name}"
+            )
+
+        # put e try_put recebem um valor, try_get o valor padrão
+        expected = (
+            [value_type] if method in {"put", "try_put", "try_get"} else []
+        )
+        arg_types = [self.visit(arg) for arg in node.args]
+        if arg_types != expected:
+            raise err.SemanticError(
+                f"(Erro de Tipo) {name}.{method} espera "
+                f"({', '.join(expected)}), mas encontrado "
+                f"({', '.join(map(str, arg_types))})"
+            )
+
+        specialize(node, ast.ChannelCall)
+        return CHANNEL_METHODS[method] or value_type
+
+    ###### PURITY ######
+
+    def classify_functions(self):
+        """
+        Marca como puras as funções que não executam E/S nem usam
+        canais, que dependem apenas dos parâmetros e variáveis locais e
+        que chamam apenas outras funções puras
+        """
+        candidates: dict[str, set[str]] = {}
+        for name, function in self.function_table.items():
+            callees = self.function_callees(function)
+            if callees is not None:
+                candidates[name] = callees
+
+        # remove, até estabilizar, as funções que chamam funções impuras
+        changed = True
+        while changed:
+            changed = False
+            for name, callees in list(candidates.items()):
+                if any(callee not in candidates for callee in callees):
+                    del candidates[name]
+                    changed = True
+
+        for name, function in self.function_table.items():
+            function.pure = name in candidates
+
+    def function_callees(self, function: ast.FuncDef) -> set[str] | None:
+        """
+        Analisa isoladamente o corpo de uma função
+
+        Returns:
+            set | None: funções do usuário chamadas, ou None se a função
+                tiver efeitos colaterais próprios
+        """
+        # valores padrão não constantes podem depender de variáveis externas
+        if any(
+            default is not None and not isinstance(default, ast.Constant)
+            for _, default in function.params.values()
+        ):
+            return None
+
+        callees: set[str] = set()
+        scopes: list[set[str]] = [set(function.params)]
+        if self.pure_block(function.body, scopes, callees):
+            return callees
+        return None
+
+    def pure_block(
+        self, block: ast.Body | None, scopes: list[set[str]], callees: set[str]
+    ) -> bool:
+        scopes.append(set())
+        pure = all(self.pure_node(n, scopes, callees) for n in block or [])
+        scopes.pop()
+        return pure
+
+    def pure_node(
+        self, node: ast.Node, scopes: list[set[str]], callees: set[str]
+    ) -> bool:
+        def local(name: str) -> bool:
+            return any(name in scope for scope in scopes)
+
+        def pure(child: ast.Node) -> bool:
+            return self.pure_node(child, scopes, callees)
+
+        match node:
+            case ast.Assign(left=ast.ID() as var):
+                if not pure(node.right):
+                    return False
+                if var.decl:
+                    scopes[-1].add(var.token.value)
+                    return True
+                return local(var.token.value)
+            case ast.Return():
+                return pure(node.expr)
+            case ast.If():
+                return (
+                    pure(node.condition)
+                    and self.pure_block(node.body, scopes, callees)
+                    and self.pure_block(node.else_stmt, scopes, callees)
+                )
+            case ast.While():
+                return pure(node.condition) and self.pure_block(
+                    node.body, scopes, callees
+                )
+            case ast.Break() | ast.Continue() | ast.FuncDef() | ast.Constant():
+                return True
+            case ast.ID():
+                return local(node.token.value)
+            case ast.Access():
+                return local(node.id.token.value) and pure(node.expr)
+            case ast.Logical() | ast.Relational() | ast.Arithmetic():
+                return pure(node.left) and pure(node.right)
+            case ast.Unary():
+                return pure(node.expr)
+            case ast.Call() if not node.oper:
+                name = node.token.value
+                if name in self.default_func_names:
+                    if name not in PURE_FUNCTION_NAMES:
+                        return False
+                elif name in self.function_table:
+                    callees.add(name)
+                else:
+                    return False
+                return all(pure(arg) for arg in node.args)
+            case _:
+                # par, seq, canais e métodos de conexão
+                return False
+
+    ###### COST ######
+
+    def estimate_costs(self, module: ast.Module):
+        """
+        Estima o custo do ramo mais caro de cada bloco par, usado para
+        decidir se os ramos compensam o custo das threads
+        """
+        costs: dict[str, float] = {}
+        for node in parallel_nodes(module.stmts):
+            node.cost = max(
+                (self.cost(call, costs, set()) for call in node.body),
+                default=0,
+            )
+
+    def function_cost(
+        self, name: str, costs: dict[str, float], active: set[str]
+    ) -> float:
+        cost = costs.get(name)
+        if cost is not None:
+            return cost
+        function = self.function_table.get(name)
+        if function is None:
+            return CALL_COST
+        if name in active:
+            # chamada recursiva, estimada como um laço
+            return CALL_COST * LOOP_ITERATIONS
+
+        active.add(name)
+        cost = CALL_COST + self.block_cost(function.body, costs, active)
+        active.discard(name)
+        costs[name] = cost
+        return cost
+
+    def block_cost(
+        self, block: ast.Body | None, costs: dict[str, float], active: set[str]
+    ) -> float:
+        return sum(self.cost(node, costs, active) for node in block or [])
+
+    def cost(
+        self, node: ast.Node | None, costs: dict[str, float], active: set[str]
+    ) -> float:
+        def cost(child: ast.Node | None) -> float:
+            return self.cost(child, costs, active)
+
+        def block(body: ast.Body | None) -> float:
+            return self.block_cost(body, costs, active)
+
+        match node:
+            case None | ast.Break() | ast.Continue() | ast.FuncDef():
+                return 0
+            case ast.Assign():
+                return 1 + cost(node.right)
+            case ast.Return():
+                return 1 + cost(node.expr)
+            case ast.If():
+                return cost(node.condition) + max(
+                    block(node.body), block(node.else_stmt)
+                )
+            case ast.While():
+                return (cost(node.condition) + block(node.body)) * (
+                    LOOP_ITERATIONS
+                )
+            case ast.ParFor():
+                return (
+                    cost(node.start)
+                    + cost(node.end)
+                    + block(node.body) * LOOP_ITERATIONS
+                )
+            case ast.Seq():
+                return block(node.body)
+            case ast.Par() | ast.ParReduce():
+                return block(node.body)
+            case ast.Chan():
+                return 1 + cost(node.capacity)
+            case ast.ChannelCall() | ast.CChannel() | ast.SChannel():
+                # espera por outros ramos ou por conexões
+                return float("inf")
+            case ast.Call() if node.oper:
+                return float("inf")
+            case ast.Call():
+                name = node.token.value
+                args = block(node.args)  # type: ignore
+                if name in WAITING_FUNCTION_NAMES:
+                    return float("inf")
+                if name == "print":
+                    return IO_COST + args
+                if name in self.default_func_names:
+                    return 1 + args
+                return self.function_cost(name, costs, active) + args
+            case ast.Logical() | ast.Relational() | ast.Arithmetic():
+                return 1 + cost(node.left) + cost(node.right)
+            case ast.Unary() | ast.Access():
+                return 1 + cost(node.expr)
+            case _:
+                return 1
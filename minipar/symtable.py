@@ -71,10 +71,56 @@ class VarTable:
 
     table (dict): tabela de variáveis
     prev (VarTable): referência â tabela de escopo maior
+    shared (bool): se a tabela é compartilhada com outra cadeia e deve
+        ser copiada antes de uma alteração
+    functions (frozenset): nomes das funções declaradas no escopo
     """
 
     table: dict[str, Any] = field(default_factory=dict)
     prev: Optional["VarTable"] = None
+    shared: bool = False
+    functions: frozenset[str] = frozenset()
+
+    def write(self, string: str, value: Any):
+        """
+        Atribui um valor a uma variável da tabela, copiando antes a
+        tabela se ela for compartilhada (copy-on-write)
+        """
+        if self.shared:
+            self.table = dict(self.table)
+            self.shared = False
+        self.table[string] = value
+
+    def snapshot(self) -> "VarTable":
+        """
+        Cria uma cópia da cadeia de tabelas que compartilha os valores
+        atuais; cada tabela só é copiada quando for alterada
+
+        Returns:
+            VarTable: tabela do escopo atual na nova cadeia
+        """
+        chain = []
+        st: VarTable | None = self
+        while st:
+            chain.append(st)
+            st = st.prev
+
+        snapshot = None
+        for st in reversed(chain):
+            snapshot = VarTable(st.table, snapshot, True, st.functions)
+        return snapshot  # type: ignore
+
+    def own(self):
+        """
+        Copia as tabelas compartilhadas da cadeia, para que ramos que
+        escrevem na mesma cadeia não façam cópias separadas
+        """
+        st: VarTable | None = self
+        while st:
+            if st.shared:
+                st.table = dict(st.table)
+                st.shared = False
+            st = st.prev
 
     def find(self, string: str) -> Union["VarTable", None]:
         """
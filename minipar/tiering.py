@@ -0,0 +1,522 @@
+"""
+Módulo de Execução em Camadas
+
+O módulo de execução em camadas interpreta o programa com o Executor e
+conta as chamadas e as iterações de laço (back-edges) de cada função.
+Quando uma função ultrapassa o limite, ela é recompilada para closures
+especializadas nos tipos dos argumentos observados; uma guarda de tipos
+em cada chamada escolhe a versão especializada ou volta ao caminho
+genérico do Executor. Os laços somam as iterações ao sair, sem custo
+por iteração, e um laço que torna a função quente já na entrada é
+recompilado e executado no meio da própria chamada
+"""
+
+import sys
+from dataclasses import dataclass, field
+from typing import Any
+
+from minipar import ast
+from minipar import error as err
+from minipar.closure import (
+    BINARY_OPERATORS,
+    Closure,
+    ClosureCompiler,
+    CompiledFunction,
+    nothing,
+)
+from minipar.executor import DIRECT_CALLS, NUMBER_TYPES, Executor
+from minipar.loops import expression_values
+from minipar.optimizer import decode_constant
+from minipar.resolver import STATIC_LINK, Resolution, Resolver, walk
+from minipar.symtable import VarTable
+
+# Quantidade máxima de versões especializadas por função
+MAX_VARIANTS = 4
+
+NUMERIC_TYPES = (int, float)
+RELATIONAL_OPERATORS = {"==", "!=", ">", "<", ">=", "<="}
+
+
+def statements(block: ast.Body | None):
+    """
+    Percorre as instruções de um bloco e dos blocos aninhados
+    """
+    for stmt in block or []:
+        yield stmt
+        match stmt:
+            case ast.If():
+                yield from statements(stmt.body)
+                yield from statements(stmt.else_stmt)
+            case ast.While() | ast.Seq() | ast.ParFor():
+                yield from statements(stmt.body)
+
+
+def unsupported(function: ast.FuncDef) -> str | None:
+    """
+    Verifica se uma função usa construções que não são recompiladas
+
+    Returns:
+        str | None: motivo, ou None se a função pode ser recompilada
+    """
+    for stmt in statements(function.body):
+        match stmt:
+            case ast.Par() | ast.ParFor():
+                return "usa par"
+            case ast.CChannel() | ast.SChannel():
+                return "usa canais"
+            case ast.FuncDef():
+                return "declara funções internas"
+    return None
+
+
+def result_type(op: str, left: type | None, right: type | None):
+    """
+    Calcula o tipo do resultado de uma operação binária
+
+    Returns:
+        type | None: tipo do resultado, ou None se não for conhecido
+    """
+    if left is None or right is None:
+        return None
+    if op in RELATIONAL_OPERATORS:
+        return bool
+    if op == "+" and left is str and right is str:
+        return str
+    if left in NUMERIC_TYPES and right in NUMERIC_TYPES:
+        if op == "/" or float in (left, right):
+            return float
+        return int
+    return None
+
+
+def loop_variables(
+    node: ast.While, resolution: Resolution
+) -> list[tuple[str, int]]:
+    """
+    Lista o nome e a posição no frame das variáveis declaradas fora de
+    um laço e usadas por ele
+    """
+    used: dict[int, str] = {}
+    declared: set[int] = set()
+    exprs = list(expression_values([node]))
+    for stmt in statements([node]):
+        match stmt:
+            case ast.Assign(left=ast.ID() as var) if var.decl:
+                declared.add(resolution.address(var)[1])
+            case ast.Assign(left=ast.ID() as var):
+                used[resolution.address(var)[1]] = var.token.value
+            case ast.Chan():
+                declared.add(resolution.address(stmt.var)[1])
+                exprs.append(stmt.capacity)
+            case ast.ChannelCall():
+                exprs.append(stmt)
+    for expr in exprs:
+        for child in walk(expr):
+            address = resolution.addresses.get(id(child))
+            if isinstance(child, ast.ID) and address and address[0] == 0:
+                used[address[1]] = child.token.value
+    return [
+        (name, slot) for slot, name in used.items() if slot not in declared
+    ]
+
+
+@dataclass
+class CompiledLoop:
+    """
+    Laço de uma função interpretada recompilado para closures, em que a
+    chamada em andamento entra sem esperar pela próxima chamada
+    (on-stack replacement)
+
+    Attributes:
+        size (int): tamanho do frame da função
+        body (Closure): laço compilado
+        variables (list): nome e posição no frame de cada variável
+            declarada fora do laço e usada por ele
+    """
+
+    size: int
+    body: Closure
+    variables: list[tuple[str, int]]
+
+    def run(self, parent: list, var_table: VarTable) -> Any:
+        """
+        Executa o laço em um frame montado a partir das tabelas de
+        variáveis e devolve às tabelas os valores alterados
+        """
+        frame = [None] * self.size
+        frame[STATIC_LINK] = parent
+        for name, slot in self.variables:
+            scope = var_table.find(name)
+            if scope is not None:
+                frame[slot] = scope.table[name]
+
+        signal = self.body(frame)
+
+        for name, slot in self.variables:
+            value = frame[slot]
+            if value is not None:
+                scope = var_table.find(name) or var_table
+                scope.write(name, value)
+        if signal is not None:
+            return signal[0]
+
+
+@dataclass
+class Profile:
+    """
+    Perfil de execução de uma função
+
+    Attributes:
+        function (FuncDef): função observada
+        calls (int): quantidade de chamadas
+        back_edges (int): quantidade de iterações de laços da função
+        variants (dict): versão compilada para cada tupla de tipos
+        eligible (bool | None): se a função pode ser recompilada
+            (None enquanto ainda não foi avaliada)
+        megamorphic (bool): se o limite de versões foi atingido
+        resolution (Resolution | None): endereços das variáveis
+        frame (list): frame do módulo sintético que contém a função
+        loops (dict): laços recompilados na entrada, pelo id do nó
+    """
+
+    function: ast.FuncDef
+    calls: int = 0
+    back_edges: int = 0
+    variants: dict[tuple[type, ...], CompiledFunction] = field(
+        default_factory=dict
+    )
+    eligible: bool | None = None
+    megamorphic: bool = False
+    resolution: Resolution | None = None
+    frame: list = field(default_factory=list)
+    loops: dict[int, CompiledLoop] = field(default_factory=dict)
+
+    @property
+    def hotness(self) -> int:
+        return self.calls + self.back_edges
+
+
+@dataclass
+class SpecializingCompiler(ClosureCompiler):
+    """
+    Compilador de closures especializado nos tipos dos parâmetros
+
+    Operações cujos operandos têm tipos conhecidos dispensam a
+    verificação de valores vazios, e chamadas a funções do usuário
+    passam pelo Executor, que aplica as guardas de tipo do chamado
+
+    Attributes:
+        types (dict): tipo de cada parâmetro nunca reatribuído, pela
+            posição no frame
+    """
+
+    types: dict[int, type] = field(default_factory=dict)
+
+    def static_type(self, node: ast.Expression) -> type | None:
+        match node:
+            case ast.Constant():
+                return type(decode_constant(node))
+            case ast.ID():
+                depth, slot = self.resolution.address(node)
+                return self.types.get(slot) if depth == 0 else None
+            case ast.Relational() | ast.Arithmetic():
+                return result_type(
+                    node.token.value,
+                    self.static_type(node.left),
+                    self.static_type(node.right),
+                )
+            case ast.Unary() if node.token.value == "!":
+                return bool if self.static_type(node.expr) is bool else None
+            case ast.Unary():
+                kind = self.static_type(node.expr)
+                return kind if kind in NUMERIC_TYPES else None
+            case _:
+                return None
+
+    def local_slot(self, node: ast.Expression) -> int | None:
+        if isinstance(node, ast.ID):
+            depth, slot = self.resolution.address(node)
+            if depth == 0:
+                return slot
+        return None
+
+    def compile_specialized(
+        self, node: ast.Relational | ast.Arithmetic
+    ) -> Closure:
+        op = BINARY_OPERATORS.get(node.token.value)
+        kind = result_type(
+            node.token.value,
+            self.static_type(node.left),
+            self.static_type(node.right),
+        )
+        if kind is None or op is None:
+            return self.compile_binary(node)
+
+        left_slot = self.local_slot(node.left)
+        right_slot = self.local_slot(node.right)
+        if left_slot is not None and isinstance(node.right, ast.Constant):
+            value = decode_constant(node.right)
+            return lambda frame: op(frame[left_slot], value)
+        if right_slot is not None and isinstance(node.left, ast.Constant):
+            value = decode_constant(node.left)
+            return lambda frame: op(value, frame[right_slot])
+        if left_slot is not None and right_slot is not None:
+            return lambda frame: op(frame[left_slot], frame[right_slot])
+
+        left = self.compile(node.left)
+        right = self.compile(node.right)
+        return lambda frame: op(left(frame), right(frame))
+
+    compile_Relational = compile_specialized
+    compile_Arithmetic = compile_specialized
+    compile_TypedRelational = compile_specialized
+    compile_NumberArithmetic = compile_StringConcat = compile_specialized
+
+    def compile_tail(self, node: ast.Expression) -> None:
+        # as chamadas passam por Executor.call, que mantém os perfis
+        return None
+
+    def compile_Call(self, node: ast.Call):
+        ex = self.executor
+        name = node.token.value
+        if node.oper or name in ex.default_functions:
+            return super().compile_Call(node)
+
+        function = ex.function_table.get(name)
+        if function is None:
+            return nothing
+        args = tuple(self.compile(arg) for arg in node.args)
+
+        def call(frame: list):
+            return ex.call(function, [arg(frame) for arg in args])
+
+        return call
+
+
+@dataclass
+class TieredExecutor(Executor):
+    """
+    Executor que recompila as funções mais executadas
+
+    Attributes:
+        threshold (int): soma de chamadas e back-edges a partir da qual
+            uma função é recompilada
+        log (bool): se as decisões são registradas em stderr
+        profiles (dict): perfil de cada função, por declaração
+        active (Profile | None): perfil da função interpretada no momento
+    """
+
+    threshold: int = 100
+    log: bool = False
+    profiles: dict[int, Profile] = field(default_factory=dict)
+    active: Profile | None = None
+
+    def branch(self, var_table, function_table) -> Executor:
+        return type(self)(
+            var_table,
+            function_table,
+            memo=self.memo,
+            threads=self.threads,
+            scheduler=self.scheduler,
+            network=self.network,
+            threshold=self.threshold,
+            log=self.log,
+        )
+
+    def debug(self, message: str):
+        if self.log:
+            print(f"[tier] {message}", file=sys.stderr)
+
+    def profile(self, function: ast.FuncDef) -> Profile:
+        profile = self.profiles.get(id(function))
+        if profile is None:
+            profile = self.profiles[id(function)] = Profile(function)
+        return profile
+
+    def call_function(self, function: ast.FuncDef, args: list[Any]):
+        if self.depth >= DIRECT_CALLS:
+            # chamadas profundas seguem interpretadas, pela pilha
+            # explícita do Executor
+            return super().call_function(function, args)
+
+        profile = self.profile(function)
+        profile.calls += 1
+
+        # guarda: a versão especializada só atende os tipos observados
+        types = tuple(map(type, args))
+        compiled = profile.variants.get(types)
+        if compiled is None and profile.hotness >= self.threshold:
+            compiled = self.tier_up(profile, types)
+        if compiled is not None:
+            self.depth += 1
+            try:
+                return compiled.invoke(profile.frame, args)
+            finally:
+                self.depth -= 1
+
+        saved = self.active
+        self.active = profile
+        try:
+            return super().call_function(function, args)
+        finally:
+            self.active = saved
+
+    def trampoline(self, function: ast.FuncDef, args: list[Any]):
+        # os laços das chamadas da pilha explícita não são atribuídos à
+        # função interpretada que a iniciou
+        saved = self.active
+        self.active = None
+        try:
+            return super().trampoline(function, args)
+        finally:
+            self.active = saved
+
+    def tier_up(
+        self, profile: Profile, types: tuple[type, ...]
+    ) -> CompiledFunction | None:
+        """
+        Recompila uma função quente para os tipos dos argumentos
+
+        Returns:
+            CompiledFunction | None: versão especializada, ou None se a
+                função deve continuar no caminho genérico
+        """
+        function = profile.function
+        if profile.eligible is None:
+            self.prepare(profile)
+        if not profile.eligible or profile.megamorphic:
+            return None
+
+        names = ", ".join(kind.__name__ for kind in types)
+        if len(profile.variants) >= MAX_VARIANTS:
+            profile.megamorphic = True
+            self.debug(
+                f"{function.name}: limite de {MAX_VARIANTS} versões "
+                f"atingido em ({names}), mantendo o caminho genérico"
+            )
+            return None
+        if profile.variants:
+            self.debug(f"{function.name}: guarda falhou para ({names})")
+
+        compiler = SpecializingCompiler(
+            self,
+            profile.resolution,  # type: ignore
+            types=self.stable_types(profile, types),
+        )
+        compiled = compiler.function(function)
+        profile.variants[types] = compiled
+        self.debug(
+            f"{function.name}: recompilada para ({names}) após "
+            f"{profile.calls} chamadas e {profile.back_edges} back-edges"
+        )
+        return compiled
+
+    def prepare(self, profile: Profile):
+        """
+        Verifica se uma função pode ser recompilada e resolve os
+        endereços das suas variáveis
+        """
+        function = profile.function
+        reason = unsupported(function)
+        if reason is None:
+            module = ast.Module([function])
+            try:
+                profile.resolution = Resolver().resolve(module)
+                profile.frame = [None] * profile.resolution.frame_size(module)
+            except err.SemanticError:
+                reason = "acessa variáveis externas"
+
+        profile.eligible = reason is None
+        if reason:
+            self.debug(f"{function.name}: mantida no Executor ({reason})")
+
+    def stable_types(
+        self, profile: Profile, types: tuple[type, ...]
+    ) -> dict[int, type]:
+        """
+        Associa os tipos observados aos parâmetros nunca reatribuídos
+        no corpo da função
+        """
+        resolution: Resolution = profile.resolution  # type: ignore
+        assigned = {
+            resolution.address(stmt.left)  # type: ignore
+            for stmt in statements(profile.function.body)
+            if isinstance(stmt, ast.Assign) and not getattr(stmt.left, "decl")
+        }
+        return {
+            slot: kind
+            for slot, kind in enumerate(types, 1)
+            if slot <= len(profile.function.params)
+            and (0, slot) not in assigned
+        }
+
+    def back_edges(self, iterations: int):
+        if self.active is not None:
+            self.active.back_edges += iterations
+
+    def exec_While(self, node: ast.While):
+        loop = self.loop_entry(node, 0)
+        if loop is None:
+            return super().exec_While(node)
+        return loop.run(self.active.frame, self.var_table)  # type: ignore
+
+    def exec_CountingWhile(self, node: ast.CountingWhile):
+        loop = self.loop_entry(node, self.expected_iterations(node))
+        if loop is None:
+            return super().exec_CountingWhile(node)
+        return loop.run(self.active.frame, self.var_table)  # type: ignore
+
+    def expected_iterations(self, node: ast.CountingWhile) -> int:
+        """
+        Estima, na entrada do laço, quantas iterações um laço com
+        contador fará, quando o limite é uma variável ou constante
+        """
+        condition: ast.TypedRelational = node.condition  # type: ignore
+        if self.active is None or not isinstance(
+            condition.right, (ast.ID, ast.Constant)
+        ):
+            return 0
+        counter = self.execute(condition.left)
+        limit = self.execute(condition.right)
+        if not isinstance(counter, NUMBER_TYPES) or not isinstance(
+            limit, NUMBER_TYPES
+        ):
+            return 0
+        return max(int((limit - counter) / node.step), 0) if node.step else 0
+
+    def loop_entry(self, node: ast.While, iterations: int):
+        """
+        Na entrada de um laço de uma função interpretada, recompila o
+        laço se a função, somadas as iterações previstas, ficou quente;
+        sem isso, uma chamada com um único laço longo nunca sairia do
+        Executor
+
+        Returns:
+            CompiledLoop | None: laço recompilado, ou None se ele deve
+                ser interpretado
+        """
+        profile = self.active
+        if profile is None or profile.hotness + iterations < self.threshold:
+            return None
+        if profile.eligible is None:
+            self.prepare(profile)
+        if not profile.eligible:
+            return None
+
+        loop = profile.loops.get(id(node))
+        if loop is None:
+            resolution: Resolution = profile.resolution  # type: ignore
+            compiler = SpecializingCompiler(self, resolution)
+            loop = profile.loops[id(node)] = CompiledLoop(
+                resolution.frame_size(profile.function),
+                compiler.compile(node),
+                loop_variables(node, resolution),
+            )
+            self.debug(
+                f"{profile.function.name}: laço recompilado na entrada "
+                f"após {profile.calls} chamadas e {profile.back_edges} "
+                f"back-edges"
+            )
+        # as iterações do laço compilado não passam pelo Executor
+        profile.back_edges += iterations
+        return loop
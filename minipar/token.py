@@ -40,6 +40,7 @@ STATEMENT_TOKENS = {
     "PAR",
     "C_CHANNEL",
     "S_CHANNEL",
+    "CHAN",
 }
 
 # Mapeamento de tipos de retorno para funções padrão da linguagem
@@ -51,12 +52,41 @@ DEFAULT_FUNCTION_NAMES = {
     "to_string": "STRING",
     "to_bool": "BOOL",
     "send": "STRING",
+    "send_async": "NUMBER",
+    "receive": "STRING",
+    "send_all": "STRING",
     "close": "VOID",
     "len": "NUMBER",
     "isalpha": "BOOL",
     "isnum": "BOOL",
 }
 
+# Funções padrão chamadas como métodos das conexões dos canais clientes,
+# que recebem o nome da conexão antes dos argumentos
+CONNECTION_METHODS = {"send", "send_async", "receive", "send_all", "close"}
+
+# Mapeamento de tipos de retorno para métodos dos canais declarados com
+# chan (None: tipo dos valores do canal)
+CHANNEL_METHODS: dict[str, str | None] = {
+    "put": "VOID",
+    "get": None,
+    "try_put": "BOOL",
+    "try_get": None,
+    "size": "NUMBER",
+}
+
+# Prefixo do tipo dos canais, seguido do tipo dos valores (CHAN_NUMBER)
+CHANNEL_TYPE = "CHAN_"
+
+# Reduções que combinam os resultados dos ramos de um par, com o tipo
+# dos resultados e do valor combinado
+REDUCTIONS = {
+    "sum": "NUMBER",
+    "min": "NUMBER",
+    "max": "NUMBER",
+    "concat": "STRING",
+}
+
 
 # Regex para Análise Léxica
 TOKEN_REGEX = '|'.join(
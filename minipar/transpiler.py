@@ -0,0 +1,604 @@
+"""
+Módulo de Transpilação para Python
+
+O módulo de transpilação converte a AST, já verificada pela análise
+semântica, em código-fonte Python equivalente. O código gerado é
+compilado com `compile()` e executado pelo próprio CPython, usando as
+funções padrão do Executor como biblioteca de execução
+"""
+
+import math
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from types import CellType, FunctionType
+from typing import Any
+
+from minipar import ast
+from minipar.bytecode import BINARY_OPERATORS
+from minipar.channels import Channel
+from minipar.executor import Executor, combine
+from minipar.memo import MISSING
+from minipar.optimizer import decode_constant
+from minipar.schedule import par_label
+from minipar.token import CONNECTION_METHODS, DEFAULT_FUNCTION_NAMES
+
+# Valor padrão de parâmetros não informados na chamada
+UNSET = object()
+
+
+def isolate(namespace: dict[str, Any], function: FunctionType):
+    """
+    Religa uma função e as funções globais a uma cópia do namespace e
+    a cópias das células das variáveis de funções externas, de modo que
+    escritas em variáveis globais e externas fiquem restritas ao ramo
+    """
+    copied = dict(namespace)
+    cells: dict[int, CellType] = {}
+    for name, value in namespace.items():
+        if isinstance(value, FunctionType) and value.__globals__ is namespace:
+            copied[name] = rebind(value, namespace, copied, cells)
+    return rebind(function, namespace, copied, cells)
+
+
+def rebind(
+    function: FunctionType,
+    namespace: dict[str, Any],
+    copied: dict[str, Any],
+    cells: dict[int, CellType],
+):
+    closure = None
+    if function.__closure__ is not None:
+        closure = tuple(
+            copy_cell(cell, namespace, copied, cells)
+            for cell in function.__closure__
+        )
+    return FunctionType(
+        function.__code__,
+        copied,
+        function.__name__,
+        function.__defaults__,
+        closure,
+    )
+
+
+def copy_cell(
+    cell: CellType,
+    namespace: dict[str, Any],
+    copied: dict[str, Any],
+    cells: dict[int, CellType],
+) -> CellType:
+    """
+    Copia uma célula uma única vez por ramo, para que as funções que a
+    compartilham continuem compartilhando a cópia; funções geradas
+    guardadas em células também são religadas
+    """
+    new = cells.get(id(cell))
+    if new is not None:
+        return new
+    new = cells[id(cell)] = CellType()
+    try:
+        value = cell.cell_contents
+    except ValueError:
+        # variável ainda não atribuída
+        return new
+    if isinstance(value, FunctionType) and value.__globals__ is namespace:
+        value = rebind(value, namespace, copied, cells)
+    new.cell_contents = value
+    return new
+
+
+def logical_or(left, right):
+    # o Executor avalia os dois operandos de ||
+    return left or right
+
+
+def binary(op: str, left, right):
+    # como no Executor, operandos vazios produzem um valor vazio
+    if left is None or right is None:
+        return None
+    return BINARY_OPERATORS[op](left, right)
+
+
+def unary(op: str, value):
+    if value is None:
+        return None
+    return not value if op == "!" else -value
+
+
+@dataclass
+class Tail:
+    """
+    Chamada em posição de cauda, retornada pelo corpo `t_` de uma
+    função gerada para que a função chamada execute no laço de
+    trampoline, sem uma nova recursão
+
+    Attributes:
+        function (Callable): corpo da função chamada
+        args (tuple): valores dos argumentos, já avaliados
+    """
+
+    function: Callable
+    args: tuple
+
+
+def trampoline(ret):
+    while type(ret) is Tail:
+        ret = ret.function(*ret.args)
+    return ret
+
+
+@dataclass
+class Scope:
+    """
+    Escopo de nomes durante a transpilação
+
+    Attributes:
+        names (dict): nome Minipar -> nome Python
+        function (int): índice da função dona do escopo (0 = módulo)
+    """
+
+    names: dict[str, str] = field(default_factory=dict)
+    function: int = 0
+
+
+@dataclass
+class FunctionContext:
+    """
+    Informações de uma função em transpilação
+
+    Attributes:
+        global_names (set): variáveis globais atribuídas na função
+        nonlocal_names (set): variáveis de funções externas atribuídas
+        name (str | None): nome Minipar da função (None no módulo e
+            nos corpos de par for)
+        tail (bool): se a função tem chamadas em posição de cauda
+    """
+
+    global_names: set[str] = field(default_factory=set)
+    nonlocal_names: set[str] = field(default_factory=set)
+    name: str | None = None
+    tail: bool = False
+
+
+class Transpiler:
+    """
+    Classe que gera código-fonte Python a partir da AST
+
+    Variáveis recebem o prefixo `v_`, funções `f_` e funções padrão
+    `b_`. Declarações que sombreiam uma variável visível recebem um
+    sufixo numérico, reproduzindo os escopos de bloco da linguagem
+
+    Attributes:
+        lines (list): linhas geradas
+        indent (int): nível de indentação atual
+        scopes (list): pilha de escopos
+        functions (list): pilha de funções em transpilação
+        counter (int): contador para nomes únicos
+        tail_functions (set): funções geradas com um corpo `t_`, que
+            recebem as chamadas em posição de cauda
+    """
+
+    def __init__(self):
+        self.lines: list[str] = []
+        self.indent: int = 0
+        self.scopes: list[Scope] = [Scope()]
+        self.functions: list[FunctionContext] = [FunctionContext()]
+        self.counter: int = 0
+        self.tail_functions: set[str] = set()
+
+    def transpile(self, node: ast.Module) -> str:
+        """
+        Gera o código-fonte Python do programa
+
+        Returns:
+            str: código-fonte gerado
+        """
+        self.emit("# código gerado a partir de um programa Minipar")
+        self.block(node.stmts)
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, line: str):
+        self.lines.append("    " * self.indent + line)
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}_{self.counter}"
+
+    ###### NAMES #####
+
+    def lookup(self, name: str) -> tuple[str, int] | None:
+        for scope in reversed(self.scopes):
+            if name in scope.names:
+                return scope.names[name], scope.function
+        return None
+
+    def declare(self, name: str) -> str:
+        """
+        Declara uma variável no escopo atual, renomeando-a quando
+        sombreia outra variável visível
+        """
+        scope = self.scopes[-1]
+        if name in scope.names:
+            return scope.names[name]
+        if self.lookup(name):
+            py_name = self.unique(f"v_{name}")
+        else:
+            py_name = f"v_{name}"
+        scope.names[name] = py_name
+        return py_name
+
+    def resolve(self, name: str, store: bool = False) -> str:
+        found = self.lookup(name)
+        if found is None:
+            return f"v_{name}"
+
+        py_name, owner = found
+        current = len(self.functions) - 1
+        if store and owner != current:
+            if owner == 0:
+                self.functions[-1].global_names.add(py_name)
+            else:
+                self.functions[-1].nonlocal_names.add(py_name)
+        return py_name
+
+    def push_scope(self):
+        self.scopes.append(Scope(function=len(self.functions) - 1))
+
+    def pop_scope(self):
+        self.scopes.pop()
+
+    ###### STATEMENTS #####
+
+    def block(self, block: ast.Body | None):
+        start = len(self.lines)
+        for stmt in block or []:
+            self.stmt(stmt)
+        if len(self.lines) == start:
+            self.emit("pass")
+
+    def scoped_block(self, block: ast.Body | None):
+        self.push_scope()
+        self.indent += 1
+        self.block(block)
+        self.indent -= 1
+        self.pop_scope()
+
+    def stmt(self, node: ast.Node):
+        if isinstance(node, ast.Expression):
+            self.emit(self.expr(node))
+            return
+        meth_name: str = f"stmt_{type(node).__name__}"
+        getattr(self, meth_name, lambda _: None)(node)
+
+    def stmt_Assign(self, node: ast.Assign):
+        value = self.expr(node.right)
+        name = node.left.token.value
+        if getattr(node.left, "decl"):
+            target = self.declare(name)
+        else:
+            target = self.resolve(name, store=True)
+        self.emit(f"{target} = {value}")
+
+    def stmt_Return(self, node: ast.Return):
+        expr = node.expr
+        context = self.functions[-1]
+        if (
+            isinstance(expr, ast.Call)
+            and not expr.oper
+            and context.name is not None
+            and expr.token.value in self.tail_functions | {context.name}
+        ):
+            # chamada em posição de cauda: o corpo da função chamada
+            # executa no laço de rt_trampoline, como no Executor
+            context.tail = True
+            args = [self.expr(arg) for arg in expr.args]
+            values = f"{args[0]}," if len(args) == 1 else ", ".join(args)
+            self.emit(f"return rt_tail(t_{expr.token.value}, ({values}))")
+            return
+        self.emit(f"return {self.expr(expr)}")
+
+    def stmt_Break(self, _: ast.Break):
+        self.emit("break")
+
+    def stmt_Continue(self, _: ast.Continue):
+        self.emit("continue")
+
+    def stmt_FuncDef(self, node: ast.FuncDef):
+        has_defaults = any(default for _, default in node.params.values())
+        params = []
+        for name in node.params:
+            params.append(f"v_{name}=UNSET" if has_defaults else f"v_{name}")
+
+        saved_lines, saved_indent = self.lines, self.indent
+        self.lines, self.indent = [], 1
+        self.functions.append(FunctionContext(name=node.name))
+        self.push_scope()
+
+        # valores padrão são avaliados a cada chamada, como no Executor
+        for name, (_, default) in node.params.items():
+            if default:
+                self.emit(f"if v_{name} is UNSET:")
+                self.emit(f"    v_{name} = {self.expr(default)}")
+        for name in node.params:
+            self.scopes[-1].names[name] = f"v_{name}"
+        self.block(node.body)
+
+        self.pop_scope()
+        context = self.functions.pop()
+        body, self.lines, self.indent = self.lines, saved_lines, saved_indent
+
+        py_name = f"f_{node.name}"
+        if context.tail:
+            # o corpo vira t_<nome>, e f_<nome> o executa no trampolim
+            self.tail_functions.add(node.name)
+            py_name = f"t_{node.name}"
+        elif node.pure:
+            self.emit(f"@rt_memo({node.name!r})")
+        self.emit(f"def {py_name}({', '.join(params)}):")
+        if context.global_names:
+            self.emit(f"    global {', '.join(sorted(context.global_names))}")
+        if context.nonlocal_names:
+            names = ", ".join(sorted(context.nonlocal_names))
+            self.emit(f"    nonlocal {names}")
+        prefix = "    " * self.indent
+        self.lines.extend(prefix + line for line in body)
+
+        if context.tail:
+            names = ", ".join(f"v_{name}" for name in node.params)
+            if node.pure:
+                self.emit(f"@rt_memo({node.name!r})")
+            self.emit(f"def f_{node.name}({', '.join(params)}):")
+            self.emit(f"    return rt_trampoline(t_{node.name}({names}))")
+
+    def stmt_If(self, node: ast.If):
+        self.emit(f"if {self.expr(node.condition)}:")
+        self.scoped_block(node.body)
+        if node.else_stmt:
+            self.emit("else:")
+            self.scoped_block(node.else_stmt)
+
+    def stmt_While(self, node: ast.While):
+        # após a primeira iteração, a condição é avaliada no escopo do
+        # laço e enxerga as declarações feitas no corpo
+        condition = self.expr(node.condition)
+        header = len(self.lines)
+        self.push_scope()
+        self.indent += 1
+        self.block(node.body)
+        loop_condition = self.expr(node.condition)
+        self.indent -= 1
+        self.pop_scope()
+
+        if loop_condition == condition:
+            self.lines.insert(
+                header, "    " * self.indent + f"while {condition}:"
+            )
+            return
+
+        flag = self.unique("first")
+        inner = "    " * (self.indent + 1)
+        self.lines[header:header] = [
+            "    " * self.indent + f"{flag} = True",
+            "    " * self.indent
+            + f"while ({condition}) if {flag} else ({loop_condition}):",
+            inner + f"{flag} = False",
+        ]
+
+    stmt_CountingWhile = stmt_While
+
+    def stmt_Par(self, node: ast.Par):
+        self.emit(self.par(node))
+
+    def par(self, node: ast.Par | ast.ParReduce) -> str:
+        """
+        Gera a execução dos ramos de um par pelo escalonador, com uma
+        cópia própria das variáveis globais em cada ramo, como no
+        Executor.exec_Par
+        """
+        branches = ", ".join(
+            f"rt_isolate(globals(), lambda: {self.expr(call)})"
+            for call in node.body
+        )
+        cost = "float('inf')" if math.isinf(node.cost) else repr(node.cost)
+        return (
+            f"rt.scheduler.run_par({self.unique('par')!r}, "
+            f"{par_label(node)!r}, {cost}, [{branches}], rt.run_branches)"
+        )
+
+    def stmt_ParFor(self, node: ast.ParFor):
+        start, end = self.expr(node.start), self.expr(node.end)
+        name = node.var.token.value
+        function = self.unique("par_for")
+
+        saved_lines, saved_indent = self.lines, self.indent
+        self.lines, self.indent = [], 1
+        self.functions.append(FunctionContext())
+        self.push_scope()
+        self.scopes[-1].names[name] = f"v_{name}"
+        self.block(node.body)
+        self.pop_scope()
+        context = self.functions.pop()
+        body, self.lines, self.indent = self.lines, saved_lines, saved_indent
+
+        # variáveis externas alteradas no corpo viram parâmetros com o
+        # valor de antes do laço, de modo que cada iteração altere cópias
+        written = sorted(context.global_names | context.nonlocal_names)
+        params = [f"v_{name}", *(f"{var}={var}" for var in written)]
+        self.emit(f"def {function}({', '.join(params)}):")
+        prefix = "    " * self.indent
+        self.lines.extend(prefix + line for line in body)
+        self.emit(
+            f"rt.scheduler.run({function!r}, {name!r}, {start}, {end}, "
+            f"lambda: rt_isolate(globals(), {function}), rt.run_branches)"
+        )
+
+    def stmt_Seq(self, node: ast.Seq):
+        # o código gerado executa as instruções em ordem, no escopo próprio
+        self.push_scope()
+        self.block(node.body)
+        self.pop_scope()
+
+    def stmt_Chan(self, node: ast.Chan):
+        capacity = self.expr(node.capacity)
+        name = node.var.token.value
+        self.emit(f"{self.declare(name)} = rt_channel({name!r}, {capacity})")
+
+    def stmt_CChannel(self, node: ast.CChannel):
+        self.emit(
+            f"rt.connect({node.name!r}, {node.localhost!r}, {int(node.port)})"
+        )
+
+    def stmt_SChannel(self, node: ast.SChannel):
+        description = self.expr(node.description)
+        self.emit(
+            f"rt.serve({node.localhost!r}, {int(node.port)}, "
+            f"{description}, f_{node.func_name})"
+        )
+
+    ###### EXPRESSIONS #####
+
+    def expr(self, node: ast.Node) -> str:
+        meth_name: str = f"expr_{type(node).__name__}"
+        return getattr(self, meth_name, lambda _: "None")(node)
+
+    def expr_Constant(self, node: ast.Constant) -> str:
+        return repr(decode_constant(node))
+
+    def expr_ID(self, node: ast.ID) -> str:
+        return self.resolve(node.token.value)
+
+    def expr_Access(self, node: ast.Access) -> str:
+        return f"{self.resolve(node.id.token.value)}[{self.expr(node.expr)}]"
+
+    def expr_Logical(self, node: ast.Logical) -> str:
+        left = self.expr(node.left)
+        right = self.expr(node.right)
+        if node.token.value == "&&":
+            return f"({left} and {right})"
+        if has_call(node.right):
+            return f"rt_or({left}, {right})"
+        return f"({left} or {right})"
+
+    expr_And = expr_Or = expr_Logical
+
+    def expr_binary(self, node: ast.Relational | ast.Arithmetic) -> str:
+        left = self.expr(node.left)
+        right = self.expr(node.right)
+        if has_call(node):
+            # uma função que termina sem return produz None
+            return f"rt_binary({node.token.value!r}, {left}, {right})"
+        return f"({left} {node.token.value} {right})"
+
+    expr_Relational = expr_binary
+    expr_Arithmetic = expr_binary
+    expr_TypedRelational = expr_binary
+    expr_NumberArithmetic = expr_StringConcat = expr_binary
+
+    def expr_Unary(self, node: ast.Unary) -> str:
+        if has_call(node.expr):
+            return f"rt_unary({node.token.value!r}, {self.expr(node.expr)})"
+        if node.token.value == "!":
+            return f"(not {self.expr(node.expr)})"
+        return f"(-{self.expr(node.expr)})"
+
+    def expr_ChannelCall(self, node: ast.ChannelCall) -> str:
+        channel = self.resolve(node.token.value)
+        args = ", ".join(self.expr(arg) for arg in node.args)
+        return f"{channel}.{node.oper}({args})"
+
+    def expr_ParReduce(self, node: ast.ParReduce) -> str:
+        return f"rt_combine({node.token.value!r}, {self.par(node)})"
+
+    def expr_Call(self, node: ast.Call) -> str:
+        func_name = node.oper if node.oper else node.token.value
+        args = [self.expr(arg) for arg in node.args]
+
+        if func_name in CONNECTION_METHODS:
+            args.insert(0, repr(node.token.value))
+            return f"b_{func_name}({', '.join(args)})"
+        if func_name in DEFAULT_FUNCTION_NAMES:
+            return f"b_{func_name}({', '.join(args)})"
+        if node.oper:
+            # método desconhecido não produz valor
+            return "None"
+        return f"f_{func_name}({', '.join(args)})"
+
+
+def has_call(node: ast.Node) -> bool:
+    """
+    Verifica se uma expressão contém chamadas de função
+    """
+    match node:
+        case ast.Call():
+            return True
+        case ast.Logical() | ast.Relational() | ast.Arithmetic():
+            return has_call(node.left) or has_call(node.right)
+        case ast.Unary():
+            return has_call(node.expr)
+        case ast.Access():
+            return has_call(node.expr)
+        case _:
+            return False
+
+
+@dataclass
+class PythonExecutor(Executor):
+    """
+    Executor que transpila o programa para Python e o executa com
+    `compile()`/`exec`
+
+    Attributes:
+        source (str): último código-fonte gerado
+    """
+
+    source: str = ""
+
+    def namespace(self) -> dict[str, Any]:
+        """
+        Monta o namespace global do código gerado, com as funções
+        padrão e os auxiliares de execução
+        """
+        namespace: dict[str, Any] = {
+            "rt": self,
+            "rt_isolate": isolate,
+            "rt_combine": combine,
+            "rt_channel": Channel,
+            "rt_or": logical_or,
+            "rt_binary": binary,
+            "rt_unary": unary,
+            "rt_tail": Tail,
+            "rt_trampoline": trampoline,
+            "rt_memo": self.memoize,
+            "UNSET": UNSET,
+        }
+        for name, function in self.default_functions.items():
+            namespace[f"b_{name}"] = function
+        return namespace
+
+    def memoize(self, name: str):
+        """
+        Decorador aplicado às funções puras do código gerado, que
+        consulta o cache de memoização quando ele está habilitado
+        """
+
+        def decorator(function: Callable):
+            memo = self.memo
+            if memo is None:
+                return function
+
+            def memoized(*args):
+                key = memo.key(args)
+                value = memo.lookup(name, key)
+                if value is MISSING:
+                    value = function(*args)
+                    memo.store(name, key, value)
+                return value
+
+            return memoized
+
+        return decorator
+
+    def run(self, node: ast.Module):
+        self.source = Transpiler().transpile(node)
+        code = compile(self.source, "<minipar>", "exec")
+        exec(code, self.namespace())
@@ -0,0 +1,286 @@
+"""
+Módulo da Máquina Virtual
+
+O módulo da máquina virtual executa o bytecode gerado pelo compilador
+em um laço único de despacho sobre uma pilha de operandos, sem a
+recursão por nó e os sinais de retorno do Executor. As variáveis ficam
+em frames baseados em listas, endereçados pelo Resolver
+"""
+
+from dataclasses import dataclass
+from functools import partial
+
+from minipar import ast
+from minipar import error as err
+from minipar.bytecode import Code, Compiler, Op
+from minipar.channels import Channel
+from minipar.executor import Executor, combine
+from minipar.memo import MISSING
+from minipar.resolver import STATIC_LINK, Resolver, copy_frames
+
+# Opcodes como constantes do módulo, comparados no laço de despacho
+LOAD_CONST = Op.LOAD_CONST
+LOAD_FAST = Op.LOAD_FAST
+STORE_FAST = Op.STORE_FAST
+LOAD_DEREF = Op.LOAD_DEREF
+STORE_DEREF = Op.STORE_DEREF
+STORE_DEFAULT = Op.STORE_DEFAULT
+BINARY_SUBSCR = Op.BINARY_SUBSCR
+BINARY_OP = Op.BINARY_OP
+LOGICAL_OR = Op.LOGICAL_OR
+UNARY_NOT = Op.UNARY_NOT
+UNARY_NEG = Op.UNARY_NEG
+POP_TOP = Op.POP_TOP
+JUMP = Op.JUMP
+POP_JUMP_IF_FALSE = Op.POP_JUMP_IF_FALSE
+POP_JUMP_IF_TRUE = Op.POP_JUMP_IF_TRUE
+JUMP_IF_FALSE_OR_POP = Op.JUMP_IF_FALSE_OR_POP
+CALL_BUILTIN = Op.CALL_BUILTIN
+CALL_METHOD = Op.CALL_METHOD
+CALL_FUNCTION = Op.CALL_FUNCTION
+RETURN_VALUE = Op.RETURN_VALUE
+PAR = Op.PAR
+PAR_FOR = Op.PAR_FOR
+SEQ_LEVEL = Op.SEQ_LEVEL
+PAR_REDUCE = Op.PAR_REDUCE
+MAKE_CHANNEL = Op.MAKE_CHANNEL
+CALL_CHANNEL = Op.CALL_CHANNEL
+CONNECT = Op.CONNECT
+SERVE = Op.SERVE
+TAIL_CALL = Op.TAIL_CALL
+
+
+@dataclass
+class VirtualMachine(Executor):
+    """
+    Máquina virtual de pilha para o bytecode da linguagem
+
+    Reutiliza as funções padrão e os canais do Executor; as variáveis
+    ficam em frames endereçados pelo Resolver no lugar da VarTable
+    """
+
+    def run(self, node: ast.Module):
+        resolution = Resolver().resolve(node)
+        code = Compiler(resolution).compile_module(node)
+        self.run_code(code, [None] * code.size)
+
+    def execute(self, node: ast.Node):
+        module = node if isinstance(node, ast.Module) else ast.Module([node])
+        return self.run(module)
+
+    def parent(self, frame: list, depth: int) -> list:
+        for _ in range(depth):
+            frame = frame[STATIC_LINK]
+        return frame
+
+    def invoke(self, code: Code, parent: list, values: list):
+        """
+        Executa uma função em um novo frame ligado ao frame pai
+        """
+        count = min(len(values), len(code.params))
+        frame = [parent, *values[:count]]
+        frame += [None] * (code.size - len(frame))
+        return self.run_code(code, frame, count)
+
+    def run_par(self, par: tuple, frame: list) -> list:
+        """
+        Executa os ramos de um PAR ou PAR_REDUCE, cujo argumento começa
+        com (ramos, rótulo, custo estimado)
+        """
+        branches, label, cost = par[:3]
+        return self.scheduler.run_par(
+            id(par),
+            label,
+            cost,
+            [
+                partial(self.run_code, branch, copy_frames(frame))
+                for branch in branches
+            ],
+            self.run_branches,
+        )
+
+    def run_par_for(self, loop: tuple[Code, int, str], bounds: list, frame):
+        body, slot, name = loop
+
+        def worker():
+            def iteration(index: int):
+                copied = copy_frames(frame)
+                copied[slot] = index
+                self.run_code(body, copied)
+
+            return iteration
+
+        self.scheduler.run(id(body), name, *bounds, worker, self.run_branches)
+
+    def run_seq_level(self, statements: tuple[Code, ...], frame: list):
+        # as instruções independentes compartilham o frame atual
+        self.run_branches(
+            [partial(self.run_code, stmt, frame) for stmt in statements]
+        )
+
+    def run_code(self, code: Code, frame: list, argc: int = 0):
+        """
+        Executa um código até a instrução RETURN_VALUE correspondente
+
+        Chamadas de funções do usuário não usam a recursão do Python: o
+        estado do chamador é empilhado em uma pilha de chamadas própria
+        e restaurado no retorno
+
+        Args:
+            code (Code): código a executar
+            frame (list): frame das variáveis do código
+            argc (int): quantidade de argumentos recebidos na chamada
+
+        Returns:
+            Any: valor retornado pelo código
+        """
+        instructions = code.instructions
+        stack: list = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        # pilha de chamadas explícita: (instruções, pc, frame, operandos,
+        # argumentos recebidos, resultado a memoizar no retorno)
+        calls: list[tuple] = []
+        memo = self.memo
+
+        while True:
+            op, arg = instructions[pc]
+            pc += 1
+
+            if op is LOAD_FAST:
+                push(frame[arg])
+            elif op is LOAD_CONST:
+                push(arg)
+            elif op is STORE_FAST:
+                frame[arg] = pop()
+            elif op is BINARY_OP:
+                right = pop()
+                left = stack[-1]
+                if left is None or right is None:
+                    stack[-1] = None
+                else:
+                    stack[-1] = arg(left, right)
+            elif op is POP_JUMP_IF_FALSE:
+                if not pop():
+                    pc = arg
+            elif op is POP_JUMP_IF_TRUE:
+                if pop():
+                    pc = arg
+            elif op is LOAD_DEREF:
+                depth, slot = arg
+                scope = frame[STATIC_LINK]
+                for _ in range(depth - 1):
+                    scope = scope[STATIC_LINK]
+                push(scope[slot])
+            elif op is STORE_DEREF:
+                depth, slot = arg
+                scope = frame[STATIC_LINK]
+                for _ in range(depth - 1):
+                    scope = scope[STATIC_LINK]
+                scope[slot] = pop()
+            elif op is JUMP:
+                pc = arg
+            elif op is CALL_FUNCTION or op is TAIL_CALL:
+                function, depth, count = arg
+                values = stack[len(stack) - count :]
+                del stack[len(stack) - count :]
+                parent = frame
+                for _ in range(depth):
+                    parent = parent[STATIC_LINK]
+                if op is CALL_FUNCTION:
+                    pending = None
+                    if memo is not None and function.node.pure:
+                        key = memo.key(values)
+                        value = memo.lookup(function.name, key)
+                        if value is not MISSING:
+                            push(value)
+                            continue
+                        pending = (function.name, key)
+                    # o chamador é salvo na pilha de chamadas
+                    calls.append(
+                        (instructions, pc, frame, stack, argc, pending)
+                    )
+                    stack = []
+                    push = stack.append
+                    pop = stack.pop
+                # em uma chamada de cauda, o chamado ocupa o lugar do
+                # frame atual e retorna diretamente ao chamador dele
+                argc = min(count, len(function.params))
+                frame = [parent, *values[:argc]]
+                frame += [None] * (function.size - len(frame))
+                instructions = function.instructions
+                pc = 0
+            elif op is CALL_BUILTIN:
+                name, argc_ = arg
+                values = stack[len(stack) - argc_ :]
+                del stack[len(stack) - argc_ :]
+                push(self.default_functions[name](*values))
+            elif op is BINARY_SUBSCR:
+                index = pop()
+                stack[-1] = stack[-1][index]
+            elif op is POP_TOP:
+                pop()
+            elif op is JUMP_IF_FALSE_OR_POP:
+                if not stack[-1]:
+                    pc = arg
+                else:
+                    pop()
+            elif op is LOGICAL_OR:
+                right = pop()
+                stack[-1] = stack[-1] or right
+            elif op is UNARY_NOT:
+                value = stack[-1]
+                stack[-1] = None if value is None else not value
+            elif op is UNARY_NEG:
+                value = stack[-1]
+                stack[-1] = None if value is None else value * (-1)
+            elif op is STORE_DEFAULT:
+                value = pop()
+                if arg > argc:
+                    frame[arg] = value
+            elif op is RETURN_VALUE:
+                value = pop()
+                if not calls:
+                    return value
+                instructions, pc, frame, stack, argc, pending = calls.pop()
+                if pending is not None:
+                    memo.store(*pending, value)
+                push = stack.append
+                pop = stack.pop
+                push(value)
+            elif op is CALL_CHANNEL:
+                name, argc_ = arg
+                values = stack[len(stack) - argc_ :]
+                del stack[len(stack) - argc_ :]
+                stack[-1] = getattr(stack[-1], name)(*values)
+            elif op is MAKE_CHANNEL:
+                stack[-1] = Channel(arg, stack[-1])
+            elif op is CALL_METHOD:
+                conn_name, name, argc_ = arg
+                values = stack[len(stack) - argc_ :]
+                del stack[len(stack) - argc_ :]
+                push(self.default_functions[name](conn_name, *values))
+            elif op is PAR:
+                self.run_par(arg, frame)
+            elif op is PAR_FOR:
+                bounds = stack[-2:]
+                del stack[-2:]
+                self.run_par_for(arg, bounds, frame)
+            elif op is PAR_REDUCE:
+                push(combine(arg[3], self.run_par(arg, frame)))
+            elif op is SEQ_LEVEL:
+                self.run_seq_level(arg, frame)
+            elif op is CONNECT:
+                self.connect(*arg)
+            elif op is SERVE:
+                host, port, function, depth = arg
+                scope = self.parent(frame, depth)
+                self.serve(
+                    host,
+                    port,
+                    pop(),
+                    lambda data: self.invoke(function, scope, [data]),
+                )
+            else:
+                raise err.RunTimeError(f"instrução {op!r} desconhecida")
@@ -0,0 +1,64 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from minipar import ast
+from minipar.lexer import Lexer
+from minipar.parser import Parser
+from minipar.semantic import SemanticAnalyzer
+
+# Segundos que um programa pode executar antes de o teste falhar
+TIMEOUT = 60
+
+
+def run_program(
+    program: str, *options: str, stdin: str = ""
+) -> subprocess.CompletedProcess:
+    """
+    Executa um programa Minipar com `python -m minipar` e as opções
+    dadas, retornando o código de saída e as saídas do processo
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory, "program.minipar")
+        source.write_text(program)
+        return run_file(source, *options, stdin=stdin)
+
+
+def run_file(
+    source: Path, *options: str, stdin: str = ""
+) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "minipar", *options, str(source)],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        timeout=TIMEOUT,
+    )
+
+
+def analyze(program: str) -> tuple[ast.Module, SemanticAnalyzer]:
+    """
+    Executa o frontend sobre um programa, retornando a AST verificada e
+    o analisador semântico
+    """
+    semantic = SemanticAnalyzer()
+    module = Parser(Lexer(program)).start()
+    semantic.visit(module)
+    return module, semantic
+
+
+class ProgramTestCase(unittest.TestCase):
+    """
+    Casos de teste que executam programas Minipar
+    """
+
+    def output(self, program: str, *options: str, stdin: str = "") -> str:
+        """
+        Executa um programa que deve terminar sem erro e retorna a sua
+        saída, sem os espaços das pontas
+        """
+        result = run_program(program, *options, stdin=stdin)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout.strip()
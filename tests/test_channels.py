@@ -0,0 +1,135 @@
+import threading
+import unittest
+
+from minipar import ast
+from minipar import error as err
+from minipar.__main__ import ENGINES
+from minipar.channels import EMPTY, Channel
+from tests.helpers import ProgramTestCase, analyze
+
+# o consumidor espera em get até o produtor usar try_put; os ramos
+# escrevem em out, e não na saída, que as threads intercalariam
+TRY_PUT_PROGRAM = """
+chan c: number {1}
+chan out: string {2}
+func cons() -> void {
+    out.put(to_string(c.get()))
+}
+func prod() -> void {
+    sleep(0.1)
+    out.put(to_string(c.try_put(5)))
+}
+par {
+    cons()
+    prod()
+}
+print(out.get())
+print(out.get())
+"""
+
+# o produtor espera em put até o consumidor usar try_get
+TRY_GET_PROGRAM = """
+chan c: number {1}
+c.put(1)
+func prod() -> void {
+    c.put(2)
+}
+func cons() -> void {
+    sleep(0.1)
+    print(c.try_get(0))
+}
+par {
+    prod()
+    cons()
+}
+print(c.get())
+"""
+
+
+class TestChannel(unittest.TestCase):
+
+    def test_capacity(self):
+        channel = Channel("c", 2.0)
+        self.assertEqual(channel.capacity, 2)
+        for capacity in (0, -1, 1.5, "2"):
+            with self.subTest(capacity=capacity):
+                with self.assertRaises(err.RunTimeError):
+                    Channel("c", capacity)
+
+    def test_try_put_and_try_get(self):
+        channel = Channel("c", 2)
+        self.assertIs(channel.try_get(EMPTY), EMPTY)
+        self.assertTrue(channel.try_put(1))
+        self.assertTrue(channel.try_put(2))
+        self.assertFalse(channel.try_put(3))
+        self.assertEqual(channel.size(), 2)
+        self.assertEqual(channel.try_get(EMPTY), 1)
+        self.assertEqual(channel.get(), 2)
+        self.assertEqual(channel.size(), 0)
+
+    def test_put_waits_while_full(self):
+        channel = Channel("c", 1)
+        channel.put(1)
+        producer = threading.Thread(target=channel.put, args=(2,))
+        producer.start()
+        producer.join(0.1)
+        self.assertTrue(producer.is_alive())
+        self.assertEqual(channel.get(), 1)
+        producer.join()
+        self.assertEqual(channel.get(), 2)
+
+
+class TestChanParser(unittest.TestCase):
+
+    def test_parse(self):
+        module, _ = analyze(
+            "chan c: string {1 + 1}\nc.put(\"a\")\nx: number = c.size()"
+        )
+        node, put, size = module.stmts
+        self.assertIsInstance(node, ast.Chan)
+        self.assertEqual(node.var.type, "CHAN_STRING")
+        self.assertIsInstance(put, ast.ChannelCall)
+        self.assertIsInstance(size.right, ast.ChannelCall)
+
+    def test_syntax_errors(self):
+        for program in [
+            "chan {1}",
+            "chan c number {1}",
+            "chan c: void {1}",
+            "chan c: number 1",
+            "chan c: number {1}\nchan c: number {1}",
+        ]:
+            with self.subTest(program=program):
+                with self.assertRaises(err.SyntaxError):
+                    analyze(program)
+
+    def test_semantic_errors(self):
+        for program in [
+            'chan c: number {"1"}',
+            "chan c: number {1}\nc.put(\"a\")",
+            "chan c: number {1}\nc.get(1)",
+            "chan c: number {1}\nc.close()",
+            "chan c: number {1}\nx: string = c.get()",
+        ]:
+            with self.subTest(program=program):
+                with self.assertRaises(err.SemanticError):
+                    analyze(program)
+
+
+class TestChannelPrograms(ProgramTestCase):
+
+    def test_try_put_wakes_get(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                output = self.output(TRY_PUT_PROGRAM, "-engine", engine)
+                self.assertEqual(sorted(output.split()), ["5", "True"])
+
+    def test_try_get_wakes_put(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                output = self.output(TRY_GET_PROGRAM, "-engine", engine)
+                self.assertEqual(output.split(), ["1", "2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import socket
+import threading
+import unittest
+
+from minipar import error as err
+from minipar.distributed import (
+    RemoteWorker,
+    challenge,
+    format_address,
+    parse_address,
+    respond,
+)
+from minipar.framing import recv_message, send_message
+from tests.helpers import ProgramTestCase
+
+PROGRAM = """
+func quadrado(n: number) -> number {
+    return n * n
+}
+total: number = par sum {
+    quadrado(2)
+    quadrado(3)
+    quadrado(4)
+}
+print(total)
+"""
+
+
+class TestAddresses(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(
+            parse_address("localhost:7070"),
+            (socket.AF_INET, ("localhost", 7070)),
+        )
+        self.assertEqual(
+            parse_address(":0"), (socket.AF_INET, ("127.0.0.1", 0))
+        )
+        self.assertEqual(
+            parse_address("unix:/tmp/minipar.sock"),
+            (socket.AF_UNIX, "/tmp/minipar.sock"),
+        )
+        with self.assertRaises(err.RunTimeError):
+            parse_address("localhost")
+
+    def test_format(self):
+        self.assertEqual(
+            format_address(socket.AF_INET, ("127.0.0.1", 80)), "127.0.0.1:80"
+        )
+        self.assertEqual(format_address(socket.AF_UNIX, "/s"), "unix:/s")
+
+
+class TestRemoteWorker(unittest.TestCase):
+
+    def setUp(self):
+        ours, self.peer = socket.socketpair()
+        self.addCleanup(self.peer.close)
+        self.worker = RemoteWorker(ours, "teste")
+        self.addCleanup(self.worker.close)
+
+    def test_block_is_sent_once(self):
+        first = self.worker.submit(0, 0, 7, b"variaveis")
+        second = self.worker.submit(1, 1, 7, b"variaveis")
+        self.assertEqual(recv_message(self.peer), ("block", 7, b"variaveis"))
+        self.assertEqual(recv_message(self.peer), ("run", 0, 0, 7))
+        self.assertEqual(recv_message(self.peer), ("run", 1, 1, 7))
+
+        send_message(self.peer, (1, True, "b"))
+        send_message(self.peer, (0, False, "ZeroDivisionError"))
+        self.assertEqual(second.result(5), "b")
+        with self.assertRaises(err.RunTimeError):
+            first.result(5)
+
+        self.worker.release(7)
+        self.worker.release(7)
+        self.assertEqual(recv_message(self.peer), ("release", 7))
+        self.assertNotIn(7, self.worker.blocks)
+
+    def test_disconnect_fails_pending(self):
+        future = self.worker.submit(0, 0, 1, b"")
+        self.peer.close()
+        with self.assertRaises(err.RunTimeError):
+            future.result(5)
+        with self.assertRaises(err.RunTimeError):
+            self.worker.submit(1, 0, 2, b"")
+
+
+class TestAuthentication(unittest.TestCase):
+
+    def exchange(self, key: bytes, peer_key: bytes):
+        # o desafiante roda nesta thread e o outro lado em uma auxiliar
+        ours, theirs = socket.socketpair()
+        with ours, theirs:
+            peer = threading.Thread(target=respond, args=(theirs, peer_key))
+            peer.start()
+            try:
+                challenge(ours, key)
+            finally:
+                ours.close()
+                peer.join()
+
+    def test_same_key_is_accepted(self):
+        self.exchange(b"chave", b"chave")
+
+    def test_other_key_is_refused(self):
+        with self.assertRaises(err.RunTimeError):
+            self.exchange(b"chave", b"outra")
+
+
+class TestRemotePool(ProgramTestCase):
+
+    def test_spawned_workers_run_branches(self):
+        # sem MINIPAR_AUTHKEY, o coordenador gera a chave dos workers
+        output = self.output(
+            PROGRAM,
+            "-par-backend",
+            "remote",
+            "-par-spawn",
+            "-par-workers",
+            "2",
+            "-par-listen",
+            "127.0.0.1:0",
+        )
+        self.assertEqual(output, "29")
+
+
+if __name__ == "__main__":
+    unittest.main()
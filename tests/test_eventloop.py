@@ -0,0 +1,84 @@
+import unittest
+
+from tests.helpers import ProgramTestCase, run_program
+
+# os ramos só terminam se alternarem a cada valor: cada um espera em get
+# pela resposta do outro
+PING_PONG_PROGRAM = """
+chan ping: number {1}
+chan pong: number {1}
+func jogador(n: number) -> number {
+    total: number = 0
+    i: number = 0
+    while (i < n) {
+        ping.put(i)
+        total = total + pong.get()
+        i = i + 1
+    }
+    return total
+}
+func espelho(n: number) -> number {
+    i: number = 0
+    while (i < n) {
+        pong.put(ping.get() * 2)
+        i = i + 1
+    }
+    return 0
+}
+print(par sum {
+    jogador(100)
+    espelho(100)
+})
+"""
+
+SLEEP_PROGRAM = """
+chan ordem: string {3}
+func lento() -> void {
+    sleep(0.2)
+    ordem.put("lento")
+}
+func rapido() -> void {
+    sleep(0.05)
+    ordem.put("rapido")
+}
+par {
+    lento()
+    rapido()
+}
+print(ordem.get(), ordem.get())
+"""
+
+ERROR_PROGRAM = """
+func falha() -> number {
+    return 1 / 0
+}
+func ok() -> number {
+    return 1
+}
+x: number = par sum {
+    ok()
+    falha()
+}
+print("fim")
+"""
+
+
+class TestEventLoop(ProgramTestCase):
+
+    def test_branches_interleave(self):
+        output = self.output(PING_PONG_PROGRAM, "-engine", "async")
+        self.assertEqual(output, str(sum(i * 2 for i in range(100))))
+
+    def test_sleep_does_not_block(self):
+        output = self.output(SLEEP_PROGRAM, "-engine", "async")
+        self.assertEqual(output, "rapido lento")
+
+    def test_branch_error(self):
+        result = run_program(ERROR_PROGRAM, "-engine", "async")
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("ZeroDivisionError", result.stderr)
+        self.assertNotIn("fim", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import re
+import unittest
+from pathlib import Path
+
+from minipar.__main__ import ENGINES
+from tests.helpers import run_file
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+# exemplos que executam sem entrada nem conexões de rede
+PROGRAMS = [
+    "ex1",
+    "ex4",
+    "ex5",
+    "ex7",
+    "ex8",
+    "ex9",
+    "fatorial_rec",
+    "simple_nn",
+]
+
+
+# opções que não podem alterar a saída dos programas
+OPTIONS = [("-no-opt",), ("-memo",), ("-par-backend", "process")]
+
+
+def output(source: Path, *options: str) -> list[str]:
+    result = run_file(source, *options)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    # os ramos de um bloco par imprimem em uma ordem que depende do tempo
+    # e o print escreve cada argumento separadamente, então só os
+    # caracteres impressos são comparados
+    if re.search(r"\bpar\b", source.read_text()):
+        return sorted("".join(result.stdout.split()))
+    return result.stdout.splitlines()
+
+
+class TestExamples(unittest.TestCase):
+
+    def test_engines_agree(self):
+        for name in PROGRAMS:
+            source = EXAMPLES / f"{name}.minipar"
+            expected = output(source, "-engine", "tree")
+            for engine in sorted(set(ENGINES) - {"tree"}):
+                with self.subTest(example=name, engine=engine):
+                    self.assertEqual(
+                        output(source, "-engine", engine), expected
+                    )
+
+    def test_options_agree(self):
+        for name in PROGRAMS:
+            source = EXAMPLES / f"{name}.minipar"
+            expected = output(source)
+            for options in OPTIONS:
+                with self.subTest(example=name, options=options):
+                    self.assertEqual(output(source, *options), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
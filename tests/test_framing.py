@@ -0,0 +1,95 @@
+import socket
+import threading
+import time
+import unittest
+
+from minipar.framing import (
+    HEADER,
+    FramedSocket,
+    frame,
+    recv_message,
+    send_message,
+)
+
+
+class TestFramedSocket(unittest.TestCase):
+
+    def setUp(self):
+        self.sender, receiver = socket.socketpair()
+        self.receiver = FramedSocket(receiver)
+
+    def tearDown(self):
+        self.sender.close()
+        self.receiver.close()
+
+    def receive(self) -> bytes | None:
+        payload = self.receiver.receive()
+        if payload is None:
+            return None
+        with payload:
+            return bytes(payload)
+
+    def test_merged_frames(self):
+        # várias mensagens chegam em uma única leitura
+        payloads = [b"a", b"", b"bc" * 100]
+        FramedSocket(self.sender).send_many(payloads)
+        self.assertEqual([self.receive() for _ in payloads], payloads)
+
+    def test_split_frames(self):
+        # uma mensagem chega em pedaços, inclusive o prefixo
+        data = frame(b"mensagem") + frame(b"fim")
+
+        def send():
+            for index in range(len(data)):
+                self.sender.sendall(data[index : index + 1])
+                time.sleep(0.001)
+
+        sender = threading.Thread(target=send)
+        sender.start()
+        self.assertEqual(self.receive(), b"mensagem")
+        self.assertEqual(self.receive(), b"fim")
+        sender.join()
+
+    def test_buffer_growth(self):
+        self.receiver.buffer = bytearray(8)
+        large = bytes(range(256)) * 4
+        self.sender.sendall(frame(large) + frame(b"depois"))
+        self.assertEqual(self.receive(), large)
+        self.assertGreaterEqual(len(self.receiver.buffer), len(large))
+        self.assertEqual(self.receive(), b"depois")
+
+    def test_pending_bytes_move_to_start(self):
+        # a segunda mensagem não cabe no fim do buffer e os bytes já
+        # recebidos dela voltam para o início
+        self.receiver.buffer = bytearray(16)
+        self.sender.sendall(frame(b"123456") + frame(b"abcdefgh")[:4])
+        self.assertEqual(self.receive(), b"123456")
+        self.sender.sendall(frame(b"abcdefgh")[4:])
+        self.assertEqual(self.receive(), b"abcdefgh")
+        self.assertEqual(len(self.receiver.buffer), 16)
+
+    def test_connection_end(self):
+        self.sender.sendall(frame(b"completa") + frame(b"parcial")[:-2])
+        self.sender.close()
+        self.assertEqual(self.receive(), b"completa")
+        self.assertIsNone(self.receive())
+
+    def test_receive_text(self):
+        self.sender.sendall(frame("canção".encode()))
+        self.assertEqual(self.receiver.receive_text(), "canção")
+
+
+class TestMessages(unittest.TestCase):
+
+    def test_round_trip(self):
+        first, second = socket.socketpair()
+        with first, second:
+            send_message(first, ("run", 1, [2.5, "x"]))
+            self.assertEqual(recv_message(second), ("run", 1, [2.5, "x"]))
+            first.sendall(HEADER.pack(4) + b"ab")
+            first.shutdown(socket.SHUT_WR)
+            self.assertIsNone(recv_message(second))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+
+from minipar.__main__ import ENGINES
+from minipar.memo import MISSING, Memoizer
+from tests.helpers import analyze, run_program
+
+PURITY_PROGRAM = """
+g: number = 1
+func dobro(n: number) -> number {
+    return n * 2
+}
+func quadruplo(n: number) -> number {
+    return dobro(dobro(n))
+}
+func global() -> number {
+    return g
+}
+func mostra(n: number) -> number {
+    print(n)
+    return n
+}
+func usa_mostra(n: number) -> number {
+    return mostra(n) + 1
+}
+"""
+
+FIB_PROGRAM = """
+func fib(n: number) -> number {
+    if (n < 2) {
+        return n
+    }
+    return fib(n - 1) + fib(n - 2)
+}
+print(fib(25))
+"""
+
+
+class TestMemoizer(unittest.TestCase):
+
+    def test_key(self):
+        memo = Memoizer()
+        self.assertNotEqual(memo.key([1]), memo.key([1.0]))
+        self.assertNotEqual(memo.key([1]), memo.key([True]))
+        self.assertEqual(memo.key(["a", 2]), memo.key(("a", 2)))
+        self.assertIsNone(memo.key([[1, 2]]))
+
+    def test_lookup_and_store(self):
+        memo = Memoizer()
+        key = memo.key([3])
+        self.assertIs(memo.lookup("f", key), MISSING)
+        memo.store("f", key, 9)
+        self.assertEqual(memo.lookup("f", key), 9)
+        self.assertIs(memo.lookup("g", key), MISSING)
+
+        cache = memo.caches["f"]
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertIs(memo.lookup("f", None), MISSING)
+        memo.store("f", None, 1)
+        self.assertEqual(len(cache.entries), 1)
+
+    def test_least_recently_used(self):
+        memo = Memoizer(size=2)
+        memo.store("f", (1,), 1)
+        memo.store("f", (2,), 2)
+        memo.lookup("f", (1,))
+        memo.store("f", (3,), 3)
+        self.assertEqual(list(memo.caches["f"].entries), [(1,), (3,)])
+
+        memo = Memoizer(size=0)
+        memo.store("f", (1,), 1)
+        self.assertNotIn("f", memo.caches)
+
+    def test_report(self):
+        memo = Memoizer()
+        memo.lookup("f", (1,))
+        memo.store("f", (1,), 1)
+        memo.lookup("f", (1,))
+        self.assertEqual(
+            memo.report(), "f: 1 hits, 1 misses (50.0%), 1 entries"
+        )
+
+
+class TestPurity(unittest.TestCase):
+
+    def test_classify_functions(self):
+        _, semantic = analyze(PURITY_PROGRAM)
+        pure = {
+            name: function.pure
+            for name, function in semantic.function_table.items()
+        }
+        self.assertEqual(
+            pure,
+            {
+                "dobro": True,
+                "quadruplo": True,
+                "global": False,
+                "mostra": False,
+                "usa_mostra": False,
+            },
+        )
+
+
+class TestMemoPrograms(unittest.TestCase):
+
+    def test_memo_stats(self):
+        # cada valor de fib é calculado uma vez em todos os motores
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                result = run_program(
+                    FIB_PROGRAM, "-engine", engine, "-memo", "-memo-stats"
+                )
+                self.assertEqual(result.stdout.strip(), "75025")
+                self.assertIn("fib: 23 hits, 26 misses", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,360 @@
+import contextlib
+import io
+import socket
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from minipar import error as err
+from minipar.__main__ import ENGINES
+from minipar.framing import FramedSocket
+from minipar.network import (
+    KEEP_ALIVE,
+    PIPELINE_WINDOW,
+    ClientConnection,
+    Network,
+)
+from tests.helpers import ProgramTestCase
+
+# Segundos que um teste espera pelo servidor
+TIMEOUT = 5
+
+SERVER_PROGRAM = """
+func eco(mensagem: string) -> string {
+    return mensagem + "!"
+}
+s_channel servidor {eco, "eco", "localhost", %d}
+"""
+
+CLIENT_PROGRAM = """
+c_channel cliente {"localhost", %d}
+print(cliente.send("a"))
+p: number = cliente.send_async("b")
+q: number = cliente.send_async("c")
+print(cliente.receive(q))
+print(cliente.receive(p))
+print(cliente.send_all("d,e,f", ","))
+print(cliente.send("g"))
+cliente.close()
+"""
+
+CLIENT_OUTPUT = ["eco", "a!", "c!", "b!", "d!,e!,f!", "g!"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class NetworkTestCase(unittest.TestCase):
+    """
+    Casos de teste com um canal servidor executando em uma thread
+    """
+
+    def setUp(self):
+        # o servidor imprime cada mensagem recebida
+        self.enterContext(contextlib.redirect_stdout(io.StringIO()))
+
+    def serve(self, network: Network, handler, description="calc") -> int:
+        port = free_port()
+        threading.Thread(
+            target=network.serve,
+            args=("127.0.0.1", port, description, handler),
+            daemon=True,
+        ).start()
+        return port
+
+    def connect(self, network: Network, port: int) -> ClientConnection:
+        deadline = time.monotonic() + TIMEOUT
+        while True:
+            try:
+                connection = network.connect("127.0.0.1", port)
+            except ConnectionRefusedError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+                continue
+            self.addCleanup(connection.framed.close)
+            return connection
+
+
+class TestServer(NetworkTestCase):
+
+    def test_request(self):
+        network = Network()
+        port = self.serve(network, str.upper)
+        connection = self.connect(network, port)
+        self.assertEqual(connection.description, "calc")
+        self.assertEqual(network.request(connection, "abc"), "ABC")
+        self.assertEqual(network.request(connection, "dé"), "DÉ")
+
+    def test_clients_are_served_concurrently(self):
+        # cada handler espera o do outro cliente
+        barrier = threading.Barrier(2, timeout=TIMEOUT)
+
+        def handler(data: str) -> str:
+            barrier.wait()
+            return data
+
+        network = Network(max_clients=2)
+        port = self.serve(network, handler)
+        connections = [self.connect(network, port) for _ in range(2)]
+        replies = [None, None]
+
+        def request(index: int):
+            replies[index] = network.request(connections[index], str(index))
+
+        threads = [
+            threading.Thread(target=request, args=(index,))
+            for index in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(replies, ["0", "1"])
+
+    def test_clients_wait_for_a_free_slot(self):
+        network = Network(max_clients=1)
+        port = self.serve(network, str.upper)
+        first = self.connect(network, port)
+        self.assertEqual(network.request(first, "a"), "A")
+
+        # o segundo cliente só é atendido quando o primeiro sai
+        second = socket.create_connection(("127.0.0.1", port))
+        self.addCleanup(second.close)
+        second.settimeout(0.2)
+        with self.assertRaises(TimeoutError):
+            second.recv(1)
+        first.framed.close()
+        second.settimeout(TIMEOUT)
+        self.assertTrue(second.recv(1))
+
+    def test_accept_limit(self):
+        network = Network(accept_limit=1)
+        port = free_port()
+        server = threading.Thread(
+            target=network.serve,
+            args=("127.0.0.1", port, "", str.upper),
+            daemon=True,
+        )
+        server.start()
+        connection = self.connect(network, port)
+        self.assertEqual(connection.description, "")
+        self.assertEqual(network.request(connection, "a"), "A")
+        connection.framed.close()
+        server.join(TIMEOUT)
+        self.assertFalse(server.is_alive())
+
+
+class TestConnectionPool(NetworkTestCase):
+
+    def test_reuse(self):
+        network = Network()
+        port = self.serve(network, str.upper)
+        first = self.connect(network, port)
+        network.request(first, "a")
+        network.release(first)
+        self.assertEqual(network.idle[("127.0.0.1", port)], [first])
+
+        second = self.connect(network, port)
+        self.assertIs(second, first)
+        self.assertTrue(second.reused)
+        self.assertEqual(network.request(second, "b"), "B")
+        self.assertFalse(second.reused)
+
+    def test_pool_size(self):
+        network = Network(pool_size=1)
+        port = self.serve(network, str.upper)
+        first, second = (self.connect(network, port) for _ in range(2))
+        network.release(first)
+        network.release(second)
+        self.assertEqual(network.idle[("127.0.0.1", port)], [first])
+        self.assertEqual(second.framed.sock.fileno(), -1)
+
+        network.close()
+        self.assertEqual(network.idle, {})
+        self.assertEqual(first.framed.sock.fileno(), -1)
+
+    def test_pending_replies_are_not_pooled(self):
+        network = Network()
+        port = self.serve(network, str.upper)
+        connection = self.connect(network, port)
+        network.submit(connection, ["a"])
+        network.release(connection)
+        self.assertEqual(network.idle, {})
+
+    def test_expired_connection(self):
+        network = Network()
+        port = self.serve(network, str.upper)
+        first = self.connect(network, port)
+        network.release(first)
+        first.released -= KEEP_ALIVE + 1
+        second = self.connect(network, port)
+        self.assertIsNot(second, first)
+        self.assertEqual(first.framed.sock.fileno(), -1)
+
+    def test_connection_closed_by_server(self):
+        # servidor que responde uma mensagem por conexão e a encerra
+        listener = socket.create_server(("127.0.0.1", 0))
+        self.addCleanup(listener.close)
+        port = listener.getsockname()[1]
+
+        def serve():
+            for _ in range(2):
+                conn, _ = listener.accept()
+                framed = FramedSocket(conn)
+                framed.send(b"uma vez")
+                framed.send(bytes(framed.receive()).upper())
+                framed.close()
+
+        server = threading.Thread(target=serve, daemon=True)
+        server.start()
+        network = Network()
+        first = self.connect(network, port)
+        self.assertEqual(network.request(first, "a"), "A")
+        network.release(first)
+
+        # a conexão encerrada não é reaproveitada
+        deadline = time.monotonic() + TIMEOUT
+        while network.healthy(first) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        second = self.connect(network, port)
+        self.assertIsNot(second, first)
+        self.assertEqual(network.request(second, "b"), "B")
+        server.join(TIMEOUT)
+
+
+class TestAsyncSend(NetworkTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.network = Network()
+        port = self.serve(self.network, str.upper)
+        self.connection = self.connect(self.network, port)
+
+    def test_submit_and_wait(self):
+        network, connection = self.network, self.connection
+        handles = network.submit(connection, ["a", "b", "c"])
+        self.assertEqual(handles, [0, 1, 2])
+        # respostas anteriores à pedida ficam guardadas
+        self.assertEqual(network.wait(connection, 2.0), "C")
+        self.assertEqual(connection.replies, {0: "A", 1: "B"})
+        self.assertEqual(network.wait(connection, 0), "A")
+        # um envio síncrono espera as respostas assíncronas pendentes
+        self.assertEqual(network.request(connection, "d"), "D")
+        self.assertEqual(network.wait(connection, 1), "B")
+        self.assertEqual(connection.replies, {})
+
+    def test_unknown_handle(self):
+        network, connection = self.network, self.connection
+        (handle,) = network.submit(connection, ["a"])
+        self.assertEqual(network.wait(connection, handle), "A")
+        for handle in (handle, 5):
+            with self.subTest(handle=handle):
+                with self.assertRaises(err.RunTimeError):
+                    network.wait(connection, handle)
+
+    def test_pipeline(self):
+        messages = [str(index) for index in range(3 * PIPELINE_WINDOW + 1)]
+        replies = self.network.pipeline(self.connection, messages)
+        self.assertEqual(replies, messages)
+        self.assertEqual(self.network.pipeline(self.connection, []), [])
+        self.assertEqual(self.connection.sent, self.connection.received)
+
+
+class TestHandlerPool(NetworkTestCase):
+
+    def test_replies_keep_message_order(self):
+        def handler(data: str) -> str:
+            # a primeira mensagem termina depois da segunda
+            time.sleep(0.2 if data == "lenta" else 0)
+            return data.upper()
+
+        network = Network(handler_workers=2)
+        port = self.serve(network, handler)
+        connection = self.connect(network, port)
+        replies = network.pipeline(connection, ["lenta", "rapida"])
+        self.assertEqual(replies, ["LENTA", "RAPIDA"])
+
+    def test_handler_error_closes_connection(self):
+        def handler(data: str) -> str:
+            if data == "erro":
+                raise ValueError(data)
+            return data
+
+        network = Network(handler_workers=1)
+        port = self.serve(network, handler)
+        connection = self.connect(network, port)
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            with self.assertRaises(err.RunTimeError):
+                network.request(connection, "erro")
+        self.assertIn("ValueError: erro", stderr.getvalue())
+
+        # os outros clientes continuam sendo atendidos
+        other = self.connect(network, port)
+        self.assertEqual(network.request(other, "ok"), "ok")
+
+
+class TestChannelPrograms(ProgramTestCase):
+
+    def start_server(self, connections: int, *options: str) -> int:
+        """
+        Executa SERVER_PROGRAM em outro processo até ele aceitar
+        `connections` clientes
+
+        Returns:
+            int: porta do servidor
+        """
+        port = free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "minipar",
+                *options,
+                # mais a conexão de teste abaixo
+                "-chan-accept",
+                str(connections + 1),
+                "/dev/stdin",
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            text=True,
+        )
+        self.addCleanup(server.kill)
+        self.addCleanup(lambda: self.assertEqual(server.wait(TIMEOUT), 0))
+        server.stdin.write(SERVER_PROGRAM % port)
+        server.stdin.close()
+        # uma conexão de teste espera o servidor começar a escutar
+        deadline = time.monotonic() + TIMEOUT
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port)).close()
+                return port
+            except ConnectionRefusedError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+
+    def client_output(self, port: int, *options: str) -> list[str]:
+        return self.output(CLIENT_PROGRAM % port, *options).splitlines()
+
+    def test_client_methods(self):
+        port = self.start_server(len(ENGINES))
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(
+                    self.client_output(port, "-engine", engine), CLIENT_OUTPUT
+                )
+
+    def test_handler_threads(self):
+        port = self.start_server(1, "-chan-handlers", "2")
+        self.assertEqual(self.client_output(port), CLIENT_OUTPUT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import unittest
+
+from minipar import ast
+from minipar.optimizer import Optimizer
+from tests.helpers import analyze
+
+
+def optimize(program: str) -> tuple[ast.Body, Optimizer]:
+    module, semantic = analyze(program)
+    optimizer = Optimizer(semantic.function_table)
+    return optimizer.optimize(module).stmts, optimizer
+
+
+def value(program: str):
+    # valor do literal atribuído pela última instrução
+    stmts, _ = optimize(program)
+    right = stmts[-1].right
+    assert isinstance(right, ast.Constant), right
+    return right.value
+
+
+class TestFolding(unittest.TestCase):
+
+    def test_arithmetic(self):
+        self.assertEqual(value("x: number = 1 + 2 * 3"), 7)
+        self.assertEqual(value("x: number = 7 / 2"), 3.5)
+        self.assertEqual(value("x: number = -(2 - 5)"), 3)
+        self.assertEqual(value('x: string = "a" + "b"'), "ab")
+
+    def test_relational_and_logical(self):
+        self.assertIs(value("x: bool = 2 >= 1"), True)
+        self.assertIs(value("x: bool = !(1 == 1)"), False)
+        self.assertIs(value("x: bool = false || 1 < 2"), True)
+        self.assertIs(value("b: bool = true\nx: bool = 1 > 2 && b"), False)
+
+    def test_partial_logical(self):
+        # com o operando esquerdo verdadeiro, && vira o operando direito
+        stmts, _ = optimize("b: bool = true\nx: bool = 1 < 2 && b")
+        right = stmts[-1].right
+        self.assertIsInstance(right, ast.ID)
+        self.assertEqual(right.token.value, "b")
+
+    def test_errors_are_kept(self):
+        stmts, optimizer = optimize("x: number = 1 / 0")
+        self.assertNotIsInstance(stmts[-1].right, ast.Constant)
+        self.assertEqual(optimizer.folded, 0)
+
+    def test_variables_are_kept(self):
+        stmts, optimizer = optimize("y: number = 2\nx: number = y * (1 + 1)")
+        right = stmts[-1].right
+        self.assertIsInstance(right.left, ast.ID)
+        self.assertEqual(right.right.value, 2)
+        self.assertEqual(optimizer.folded, 1)
+
+    def test_literals_are_decoded(self):
+        stmts, _ = optimize('x: number = 1.5\ny: string = "a"\nz: bool = true')
+        self.assertEqual(
+            [stmt.right.value for stmt in stmts], [1.5, "a", True]
+        )
+
+
+class TestDeadBranches(unittest.TestCase):
+
+    def test_if(self):
+        stmts, optimizer = optimize(
+            "if (1 > 2) {\n print(1)\n} else {\n print(2)\n}\n"
+            "if (false) {\n print(3)\n}"
+        )
+        self.assertEqual(len(stmts), 1)
+        self.assertIsInstance(stmts[0], ast.Call)
+        self.assertEqual(stmts[0].args[0].value, 2)
+        self.assertEqual(optimizer.removed, 2)
+
+    def test_if_keeps_scope(self):
+        # o bloco que declara variáveis continua em um escopo próprio
+        stmts, _ = optimize("if (true) {\n x: number = 1\n print(x)\n}")
+        self.assertIsInstance(stmts[0], ast.If)
+        self.assertIs(stmts[0].condition.value, True)
+        self.assertIsNone(stmts[0].else_stmt)
+
+    def test_while(self):
+        stmts, optimizer = optimize("while (1 < 0) {\n print(1)\n}")
+        self.assertEqual(stmts, [])
+        self.assertEqual(optimizer.removed, 1)
+
+
+LOOP_PROGRAM = """
+s: string = "abc"
+n: number = 10
+i: number = 0
+t: number = 0
+while (i < n) {
+    t = t + len(s) * 2 + i
+    %s
+}
+"""
+
+
+def loop(step: str) -> tuple[ast.Body, Optimizer]:
+    # o laço de LOOP_PROGRAM terminando com as instruções `step`
+    return optimize(LOOP_PROGRAM % step)
+
+
+class TestLoops(unittest.TestCase):
+
+    def test_hoist_invariant(self):
+        stmts, optimizer = loop("i = i + 1")
+        temporary = stmts[4]
+        self.assertEqual(temporary.left.token.value, "_inv0")
+        self.assertTrue(temporary.left.decl)
+        self.assertIsInstance(temporary.right.left, ast.Call)
+        self.assertEqual(optimizer.loops.hoisted, 1)
+
+        # a temporária substitui a expressão dentro do laço
+        body = stmts[5].body
+        self.assertEqual(body[0].right.left.right.token.value, "_inv0")
+
+    def test_variant_not_hoisted(self):
+        _, optimizer = loop("i = i + 1\n    s = s + \"d\"")
+        self.assertEqual(optimizer.loops.hoisted, 0)
+
+    def test_temporary_avoids_program_names(self):
+        stmts, _ = optimize("_inv0: number = 1\n" + LOOP_PROGRAM % "i = i + 1")
+        self.assertEqual(stmts[5].left.token.value, "_inv1")
+
+    def test_counter(self):
+        for step, expected in [("i = i + 1", 1), ("i = i - 2.5", -2.5)]:
+            with self.subTest(step=step):
+                stmts, optimizer = loop(step)
+                self.assertIsInstance(stmts[-1], ast.CountingWhile)
+                self.assertEqual(stmts[-1].step, expected)
+                self.assertEqual(optimizer.loops.counters, 1)
+
+    def test_not_a_counter(self):
+        for step in [
+            "i = i * 2",
+            "i = i + n",
+            "i = i + 1\n    t = t + 1",
+            "i = i + 1\n    i = i + 1",
+            "if (t > 5) {\n continue\n}\n    i = i + 1",
+        ]:
+            with self.subTest(step=step):
+                stmts, optimizer = loop(step)
+                self.assertNotIsInstance(stmts[-1], ast.CountingWhile)
+                self.assertEqual(optimizer.loops.counters, 0)
+
+    def test_call_writes_counter(self):
+        # a função altera o contador, então o laço não tem contador
+        program = (
+            "i: number = 0\n"
+            "func pula() -> void {\n i = i + 1\n}\n"
+            "while (i < 10) {\n pula()\n i = i + 1\n}"
+        )
+        stmts, _ = optimize(program)
+        self.assertNotIsInstance(stmts[-1], ast.CountingWhile)
+
+
+if __name__ == "__main__":
+    unittest.main()
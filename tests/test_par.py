@@ -0,0 +1,61 @@
+import unittest
+
+from minipar.__main__ import ENGINES
+from tests.helpers import ProgramTestCase, run_program
+
+# escritas dos ramos em variáveis globais e de funções externas ficam
+# restritas ao próprio ramo
+ISOLATION_PROGRAM = """
+func outer() -> number {
+    x: number = 0
+    func inc() -> void {
+        x = x + 1
+    }
+    par {
+        inc()
+        inc()
+    }
+    inc()
+    return x
+}
+print(outer())
+g: number = 0
+func bump() -> void {
+    g = g + 1
+}
+par {
+    bump()
+    bump()
+}
+print(g)
+"""
+
+PAR_FOR_PROGRAM = """
+par for (i in 0, 10) {
+    x: number = i * 2
+}
+"""
+
+
+class TestPar(ProgramTestCase):
+
+    def test_branch_writes_are_isolated(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                output = self.output(ISOLATION_PROGRAM, "-engine", engine)
+                self.assertEqual(output.split(), ["1", "0"])
+
+    def test_par_for_stats(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                result = run_program(
+                    PAR_FOR_PROGRAM, "-engine", engine, "-par-stats"
+                )
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertIn(
+                    "par for i: 1 runs, 10 iterations", result.stderr
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
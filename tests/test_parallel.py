@@ -0,0 +1,209 @@
+import pickle
+import threading
+import time
+import unittest
+from multiprocessing.shared_memory import SharedMemory
+
+from minipar.channels import Channel
+from minipar.parallel import (
+    BLOCK_CACHE_SIZE,
+    ProcessPool,
+    SharedVariables,
+    ThreadPool,
+    Worker,
+    branch_calls,
+)
+from minipar.symtable import VarTable
+from tests.helpers import ProgramTestCase, analyze
+
+PROGRAM = """
+a: number = 1
+b: string = "não usada"
+c: number = 3
+func f(n: number) -> number {
+    return n + a
+}
+func g() -> number {
+    return c
+}
+func h() -> number {
+    par {
+        f(1)
+        g()
+    }
+    return 0
+}
+x: number = par sum {
+    f(2)
+    g()
+}
+y: number = par sum {
+    h()
+    g()
+}
+print(x + y)
+"""
+
+# as variáveis do bloco passam de SHARED_THRESHOLD e vão pela memória
+# compartilhada
+LARGE_PROGRAM = """
+s: string = "abcd"
+i: number = 0
+while (i < 15) {
+    s = s + s
+    i = i + 1
+}
+func tamanho(n: number) -> number {
+    return len(s) * n
+}
+print(par sum {
+    tamanho(1)
+    tamanho(2)
+})
+"""
+
+
+class TestThreadPool(unittest.TestCase):
+
+    def pool(self, *args) -> ThreadPool:
+        pool = ThreadPool(*args)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_threads_are_reused(self):
+        pool = self.pool(2)
+        results: list[int] = []
+        pool.run([lambda: results.append(1), lambda: results.append(2)])
+        threads = list(pool.threads)
+        # as threads voltam a ficar livres logo depois do fim dos ramos
+        deadline = time.monotonic() + 5
+        while pool.available < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        pool.run([lambda: results.append(3), lambda: results.append(4)])
+        self.assertEqual(pool.threads, threads)
+        self.assertEqual(sorted(results), [1, 2, 3, 4])
+
+    def test_dependent_branches(self):
+        # sem limite, ramos que esperam uns pelos outros executam juntos
+        # mesmo com mais ramos que threads mantidas
+        pool = self.pool(1)
+        ready = threading.Event()
+        pool.run([lambda: ready.wait(5), ready.set])
+        self.assertTrue(ready.is_set())
+
+    def test_bounded(self):
+        pool = self.pool(2, True)
+        lock = threading.Lock()
+        running = peak = 0
+
+        def branch():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+
+        pool.run([branch] * 8)
+        # as duas threads e quem espera o bloco
+        self.assertLessEqual(peak, 3)
+        self.assertEqual(len(pool.threads), 2)
+
+    def test_bounded_nested_blocks(self):
+        pool = self.pool(1, True)
+        results: list[int] = []
+
+        def nested():
+            pool.run([lambda: results.append(1), lambda: results.append(2)])
+
+        pool.run([nested, nested])
+        self.assertEqual(sorted(results), [1, 1, 2, 2])
+
+    def test_first_error(self):
+        pool = self.pool(2)
+        finished = threading.Event()
+
+        def slow():
+            time.sleep(0.05)
+            finished.set()
+            raise KeyError("segundo")
+
+        def fail():
+            raise ValueError("primeiro")
+
+        with self.assertRaises(ValueError):
+            pool.run([fail, slow])
+        self.assertTrue(finished.is_set())
+
+    def test_close(self):
+        pool = ThreadPool(2)
+        pool.run([lambda: None, lambda: None])
+        pool.close()
+        for thread in pool.threads:
+            thread.join(5)
+            self.assertFalse(thread.is_alive())
+
+
+class TestProcessPool(ProgramTestCase):
+
+    def setUp(self):
+        module, _ = analyze(PROGRAM)
+        self.pool = ProcessPool(module, 1)
+        calls = branch_calls(module)
+        self.first, self.second = calls[2:4], calls[4:6]
+
+    def test_only_used_variables_are_sent(self):
+        self.assertEqual(self.pool.needed(self.first), {"a", "c"})
+        table = VarTable({"a": 1, "b": "não usada", "c": 3})
+        self.assertEqual(
+            self.pool.variables(self.first, table), {"a": 1, "c": 3}
+        )
+
+    def test_nested_par_sends_every_variable(self):
+        self.assertIsNone(self.pool.needed(self.second))
+
+    def test_channels_stay_in_process(self):
+        channel = Channel("canal", 1)
+        table = VarTable({"a": channel, "b": channel, "c": 3})
+        self.assertFalse(self.pool.accepts(self.first, table))
+        table = VarTable({"a": 1, "b": channel, "c": 3})
+        self.assertTrue(self.pool.accepts(self.first, table))
+
+    def test_process_backend_output(self):
+        output = self.output(PROGRAM, "-par-backend", "process")
+        self.assertEqual(output, "9")
+        output = self.output(LARGE_PROGRAM, "-par-backend", "process")
+        self.assertEqual(output, str(4 * 2**15 * 3))
+
+
+class TestWorker(unittest.TestCase):
+
+    def share(self, variables: dict) -> SharedVariables:
+        data = pickle.dumps(variables)
+        segment = SharedMemory(create=True, size=len(data))
+        self.addCleanup(segment.unlink)
+        self.addCleanup(segment.close)
+        segment.buf[: len(data)] = data
+        return SharedVariables(segment.name, len(data))
+
+    def test_load(self):
+        worker = Worker([], {})
+        self.assertEqual(worker.load(pickle.dumps({"a": 1})), {"a": 1})
+
+        shared = self.share({"b": 2})
+        table = worker.load(shared)
+        self.assertEqual(table, {"b": 2})
+        # o mesmo bloco é desserializado uma única vez
+        self.assertIs(worker.load(shared), table)
+
+    def test_cache_size(self):
+        worker = Worker([], {})
+        blocks = [self.share({"n": n}) for n in range(BLOCK_CACHE_SIZE + 1)]
+        for block in blocks:
+            worker.load(block)
+        self.assertEqual(list(worker.blocks), blocks[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()
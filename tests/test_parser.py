@@ -0,0 +1,106 @@
+import unittest
+
+from minipar import ast
+from minipar import error as err
+from minipar.__main__ import ENGINES
+from tests.helpers import ProgramTestCase, analyze
+
+PAR_FOR_PROGRAM = """
+total: number = 10
+par for (i in 0, total / 2) {
+    print(i)
+    total = total + i
+}
+print(total)
+"""
+
+REDUCE_PROGRAM = """
+func dobro(n: number) -> number {
+    return n * 2
+}
+func nome(n: number) -> string {
+    return to_string(n)
+}
+print(par sum { dobro(1) dobro(2) dobro(3) })
+print(par min { dobro(3) dobro(1) dobro(2) })
+print(par max { dobro(3) dobro(1) dobro(2) })
+print(par concat { nome(1) nome(2) nome(3) })
+"""
+
+
+class TestParFor(ProgramTestCase):
+
+    def test_parse(self):
+        module, _ = analyze(PAR_FOR_PROGRAM)
+        node = module.stmts[1]
+        self.assertIsInstance(node, ast.ParFor)
+        self.assertEqual(node.var.token.value, "i")
+        self.assertEqual(node.var.type, "NUMBER")
+        self.assertIsInstance(node.end, ast.Arithmetic)
+        self.assertEqual(len(node.body), 2)
+
+    def test_syntax_errors(self):
+        for program in [
+            "par for i in 0, 2 { }",
+            "par for (i 0, 2) { }",
+            "par for (i in 0; 2) { }",
+            "par for (i in 0, 2 { }",
+        ]:
+            with self.subTest(program=program):
+                with self.assertRaises(err.SyntaxError):
+                    analyze(program)
+
+    def test_bounds_must_be_numbers(self):
+        with self.assertRaises(err.SemanticError):
+            analyze('par for (i in 0, "2") { }')
+
+    def test_run(self):
+        # com um worker as iterações executam em ordem, e as escritas do
+        # corpo não saem do laço
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                output = self.output(
+                    PAR_FOR_PROGRAM, "-engine", engine, "-par-workers", "1"
+                )
+                self.assertEqual(
+                    output.split(), ["0", "1", "2", "3", "4", "10"]
+                )
+
+
+class TestParReduce(ProgramTestCase):
+
+    def test_parse(self):
+        module, _ = analyze(REDUCE_PROGRAM)
+        reductions = [stmt.args[0] for stmt in module.stmts[2:]]
+        for node, reduction in zip(
+            reductions, ["sum", "min", "max", "concat"]
+        ):
+            self.assertIsInstance(node, ast.ParReduce)
+            self.assertEqual(node.token.value, reduction)
+            self.assertEqual(len(node.body), 3)
+        self.assertEqual(reductions[0].type, "NUMBER")
+        self.assertEqual(reductions[3].type, "STRING")
+
+    def test_unknown_reduction(self):
+        with self.assertRaises(err.SyntaxError):
+            analyze("x: number = par avg { }")
+
+    def test_semantic_errors(self):
+        for body in ["", "x: number = 1", "nome(1)"]:
+            with self.subTest(body=body):
+                with self.assertRaises(err.SemanticError):
+                    analyze(
+                        "func nome(n: number) -> string {\n"
+                        "    return to_string(n)\n}\n"
+                        f"x: number = par sum {{ {body} }}"
+                    )
+
+    def test_run(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                output = self.output(REDUCE_PROGRAM, "-engine", engine)
+                self.assertEqual(output.split(), ["12", "2", "6", "123"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from minipar.__main__ import ENGINES
+from tests.helpers import ProgramTestCase
+
+TAIL_PROGRAM = """
+func conta(n: number, acc: number) -> number {
+    if (n == 0) {
+        return acc
+    }
+    return conta(n - 1, acc + 1)
+}
+print(conta(5000, 0))
+"""
+
+DEEP_PROGRAM = """
+func soma(n: number) -> number {
+    if (n == 0) {
+        return 0
+    }
+    return n + soma(n - 1)
+}
+print(soma(5000))
+"""
+
+# motores sem uma pilha própria para as chamadas que não são de cauda
+STACK_ENGINES = {"closure", "python"}
+
+
+class TestRecursion(ProgramTestCase):
+
+    def test_tail_calls(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                self.assertEqual(
+                    self.output(TAIL_PROGRAM, "-engine", engine), "5000"
+                )
+
+    def test_deep_recursion(self):
+        for engine in sorted(set(ENGINES) - STACK_ENGINES):
+            with self.subTest(engine=engine):
+                self.assertEqual(
+                    self.output(DEEP_PROGRAM, "-engine", engine), "12502500"
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
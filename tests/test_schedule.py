@@ -0,0 +1,169 @@
+import threading
+import unittest
+
+from minipar import ast
+from minipar import error as err
+from minipar.schedule import COST_THRESHOLD, Scheduler
+from minipar.semantic import CALL_COST, LOOP_ITERATIONS
+from tests.helpers import analyze, run_program
+
+COST_PROGRAM = """
+chan c: number {1}
+func f(n: number) -> number {
+    return n + 1
+}
+func laco(n: number) -> number {
+    i: number = 0
+    while (i < n) {
+        i = i + f(i)
+    }
+    return i
+}
+func fat(n: number) -> number {
+    if (n < 2) {
+        return 1
+    }
+    return n * fat(n - 1)
+}
+func espera() -> number {
+    return c.get()
+}
+a: number = par sum { f(1) f(2) }
+b: number = par sum { f(1) laco(5) }
+d: number = par sum { fat(3) f(1) }
+e: number = par sum { espera() f(1) }
+"""
+
+
+def run_threads(branches):
+    threads = [threading.Thread(target=branch) for branch in branches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestParFor(unittest.TestCase):
+
+    def run_loop(self, scheduler: Scheduler, start, end) -> list[int]:
+        seen: list[int] = []
+        lock = threading.Lock()
+
+        def worker():
+            def iteration(index: int):
+                with lock:
+                    seen.append(index)
+
+            return iteration
+
+        scheduler.run("laço", "i", start, end, worker, run_threads)
+        return seen
+
+    def test_every_index_once(self):
+        scheduler = Scheduler(workers=4)
+        self.assertEqual(
+            sorted(self.run_loop(scheduler, 0, 100)), [*range(100)]
+        )
+
+        stats = scheduler.stats["laço"]
+        self.assertEqual(stats.runs, 1)
+        self.assertEqual(stats.iterations, 100)
+        self.assertEqual(len(stats.done), 4)
+        self.assertEqual(sum(stats.done), 100)
+
+    def test_guided_chunks(self):
+        # com um worker os blocos têm metade do restante: 50, 25, 13, ...
+        scheduler = Scheduler(workers=1)
+        self.run_loop(scheduler, 0, 100)
+        self.assertEqual(scheduler.stats["laço"].chunks, 7)
+
+        # sem blocos menores que min_chunk: 50, 40 e o restante
+        scheduler = Scheduler(workers=1, min_chunk=40)
+        self.run_loop(scheduler, 0, 100)
+        self.assertEqual(scheduler.stats["laço"].chunks, 3)
+
+    def test_bounds(self):
+        scheduler = Scheduler(workers=2)
+        self.assertEqual(self.run_loop(scheduler, 5, 5), [])
+        self.assertEqual(self.run_loop(scheduler, 5, 0), [])
+        self.assertNotIn("laço", scheduler.stats)
+        self.assertEqual(sorted(self.run_loop(scheduler, 0.0, 3.0)), [0, 1, 2])
+        with self.assertRaises(err.RunTimeError):
+            self.run_loop(scheduler, 0, 2.5)
+
+
+class TestParBlocks(unittest.TestCase):
+
+    def costs(self) -> list[float]:
+        module, _ = analyze(COST_PROGRAM)
+        return [
+            stmt.right.cost
+            for stmt in module.stmts
+            if isinstance(stmt, ast.Assign)
+            and isinstance(stmt.right, ast.ParReduce)
+        ]
+
+    def test_estimated_costs(self):
+        simple, loop, recursive, waiting = self.costs()
+        # chamada, retorno, soma e os operandos, mais o argumento
+        self.assertEqual(simple, CALL_COST + 4 + 1)
+        self.assertGreater(loop, LOOP_ITERATIONS * simple)
+        self.assertGreaterEqual(recursive, CALL_COST * LOOP_ITERATIONS)
+        self.assertEqual(waiting, float("inf"))
+
+    def run_block(self, scheduler: Scheduler, cost: float) -> set:
+        threads = set()
+
+        def branch():
+            threads.add(threading.current_thread())
+            return 1
+
+        results = scheduler.run_par(
+            "bloco", "par", cost, [branch, branch], run_threads
+        )
+        self.assertEqual(results, [1, 1])
+        return threads
+
+    def test_inline_decisions(self):
+        current = {threading.current_thread()}
+        scheduler = Scheduler(grain=1.0)
+        self.assertEqual(self.run_block(scheduler, 10), current)
+        self.assertNotEqual(
+            self.run_block(Scheduler(grain=1.0), COST_THRESHOLD), current
+        )
+        self.assertNotEqual(
+            self.run_block(Scheduler(grain=1.0), float("inf")), current
+        )
+        self.assertNotEqual(self.run_block(Scheduler(grain=0), 10), current)
+
+        # depois da primeira medição, a decisão segue os tempos medidos
+        scheduler = Scheduler(grain=0.0001)
+        self.run_block(scheduler, COST_THRESHOLD)
+        self.assertEqual(self.run_block(scheduler, COST_THRESHOLD), current)
+
+        stats = scheduler.blocks["bloco"]
+        self.assertEqual((stats.parallel, stats.inline), (1, 1))
+        self.assertEqual(stats.branches, 4)
+
+    def test_inline_errors(self):
+        def fail():
+            raise ValueError("ramo")
+
+        scheduler = Scheduler(grain=1.0)
+        with self.assertRaises(ValueError):
+            scheduler.run_par("bloco", "par", 10, [fail], run_threads)
+        self.assertEqual(scheduler.blocks["bloco"].inline, 1)
+
+    def test_par_log(self):
+        program = (
+            "func f(n: number) -> number {\n    return n + 1\n}\n"
+            "x: number = par sum { f(1) f(2) }"
+        )
+        for grain, mode in [("0.001", "inline"), ("0", "parallel")]:
+            with self.subTest(grain=grain):
+                result = run_program(program, "-par-log", "-par-grain", grain)
+                self.assertIn(f"[par] par sum {{f, f}}: {mode}", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import operator
+import unittest
+
+from minipar import ast
+from minipar.__main__ import ENGINES
+from tests.helpers import ProgramTestCase, analyze
+
+PROGRAM = """
+a: number = 7
+b: number = 2
+s: string = "x"
+t: bool = true
+print(a / b, a % b, a - b * b, s + "y", a >= b, s == "x", t != false)
+print(t && a > b, !t || s != s)
+"""
+
+
+def expression(program: str) -> ast.Expression:
+    # expressão atribuída pela última instrução
+    module, _ = analyze(program)
+    return module.stmts[-1].right
+
+
+class TestSpecialization(unittest.TestCase):
+
+    def test_arithmetic(self):
+        node = expression("a: number = 1\nx: number = a * 2")
+        self.assertIsInstance(node, ast.NumberArithmetic)
+        self.assertIs(node.op, operator.mul)
+
+        node = expression('a: string = "a"\nx: string = a + "b"')
+        self.assertIsInstance(node, ast.StringConcat)
+
+    def test_relational(self):
+        for program, op in [
+            ("a: number = 1\nx: bool = a < 2", operator.lt),
+            ('a: string = "a"\nx: bool = a == "b"', operator.eq),
+            ("a: bool = true\nx: bool = a != false", operator.ne),
+        ]:
+            with self.subTest(program=program):
+                node = expression(program)
+                self.assertIsInstance(node, ast.TypedRelational)
+                self.assertIs(node.op, op)
+
+    def test_logical(self):
+        node = expression("a: bool = true\nx: bool = a && a || !a")
+        self.assertIsInstance(node, ast.Or)
+        self.assertIsInstance(node.left, ast.And)
+
+    def test_nested(self):
+        # os operandos também são especializados
+        node = expression("a: number = 1\nx: bool = a + 1 > a * 2")
+        self.assertIsInstance(node.left, ast.NumberArithmetic)
+        self.assertIsInstance(node.right, ast.NumberArithmetic)
+
+
+class TestSpecializedPrograms(ProgramTestCase):
+
+    def test_run(self):
+        # sem o otimizador, os nós especializados chegam à execução
+        expected = self.output(PROGRAM, "-no-opt").splitlines()
+        self.assertEqual(expected, ["3.5 1 3 xy True True True", "True False"])
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                output = self.output(PROGRAM, "-engine", engine, "-no-opt")
+                self.assertEqual(output.splitlines(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
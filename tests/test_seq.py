@@ -0,0 +1,31 @@
+import unittest
+
+from minipar.__main__ import ENGINES
+from tests.helpers import run_program
+
+PROGRAM = """
+func boom(n: number) -> number {
+    return to_number("a") + n
+}
+seq {
+    x: number = boom(5)
+    y: number = 2
+    print(x + y)
+}
+print("fim")
+"""
+
+
+class TestSeq(unittest.TestCase):
+
+    def test_branch_error_stops_program(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                result = run_program(PROGRAM, "-engine", engine)
+                self.assertNotEqual(result.returncode, 0)
+                self.assertIn("ValueError", result.stderr)
+                self.assertNotIn("fim", result.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
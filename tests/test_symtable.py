@@ -0,0 +1,52 @@
+import unittest
+
+from minipar.symtable import VarTable
+
+
+def chain() -> VarTable:
+    globals_ = VarTable({"x": 1, "y": 2})
+    return VarTable({"z": 3}, globals_)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_shares_until_written(self):
+        original = chain()
+        snapshot = original.snapshot()
+        self.assertIs(snapshot.table, original.table)
+        self.assertIs(snapshot.prev.table, original.prev.table)
+        self.assertTrue(snapshot.shared and snapshot.prev.shared)
+
+        # a escrita copia apenas a tabela alterada
+        snapshot.prev.write("x", 10)
+        self.assertIsNot(snapshot.prev.table, original.prev.table)
+        self.assertIs(snapshot.table, original.table)
+        self.assertEqual(original.prev.table, {"x": 1, "y": 2})
+        self.assertEqual(snapshot.prev.table, {"x": 10, "y": 2})
+
+    def test_snapshots_are_independent(self):
+        original = chain()
+        first, second = original.snapshot(), original.snapshot()
+        first.find("x").write("x", 10)
+        second.find("x").write("x", 20)
+        first.write("z", 30)
+        self.assertEqual(first.find("x").table["x"], 10)
+        self.assertEqual(second.find("x").table["x"], 20)
+        self.assertEqual(original.find("x").table["x"], 1)
+        self.assertEqual(original.table["z"], 3)
+
+    def test_own(self):
+        original = chain()
+        snapshot = original.snapshot()
+        snapshot.own()
+        self.assertFalse(snapshot.shared or snapshot.prev.shared)
+        self.assertIsNot(snapshot.prev.table, original.prev.table)
+        self.assertEqual(snapshot.prev.table, original.prev.table)
+
+    def test_functions(self):
+        original = VarTable(functions=frozenset({"f"}))
+        self.assertEqual(original.snapshot().functions, {"f"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+from minipar.tiering import unsupported
+from tests.helpers import analyze, run_program
+
+PROGRAM = """
+func dobro(n: number) -> number {
+    return n * 2
+}
+func junta(s: string) -> string {
+    return s + "!"
+}
+total: number = 0
+i: number = 0
+while (i < 200) {
+    total = total + dobro(i)
+    i = i + 1
+}
+print(total)
+print(dobro(1.5))
+print(junta("a"))
+func soma(n: number) -> number {
+    t: number = 0
+    j: number = 0
+    while (j < n) {
+        t = t + j
+        j = j + 1
+    }
+    return t
+}
+print(soma(1000))
+"""
+
+PAR_FUNCTION = """
+func paralela(n: number) -> number {
+    par {
+        print(n)
+    }
+    return n
+}
+"""
+
+
+class TestTiering(unittest.TestCase):
+
+    def run_tiered(self, program: str) -> tuple[list[str], list[str]]:
+        result = run_program(
+            program, "-engine", "tiered", "-tier-log", "-tier-threshold", "50"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout.split(), result.stderr.splitlines()
+
+    def test_hot_functions(self):
+        output, log = self.run_tiered(PROGRAM)
+        self.assertEqual(output, ["39800", "3.0", "a!", "499500"])
+        self.assertEqual(
+            log,
+            [
+                "[tier] dobro: recompilada para (int) após 50 chamadas e "
+                "0 back-edges",
+                "[tier] dobro: guarda falhou para (float)",
+                "[tier] dobro: recompilada para (float) após 201 chamadas e "
+                "0 back-edges",
+                "[tier] soma: laço recompilado na entrada após 1 chamadas e "
+                "0 back-edges",
+            ],
+        )
+
+    def test_unsupported(self):
+        output, log = self.run_tiered(
+            PAR_FUNCTION + "k: number = 0\n"
+            "while (k < 60) {\n    k = k + paralela(1)\n}"
+        )
+        self.assertEqual(len(output), 60)
+        self.assertEqual(
+            log, ["[tier] paralela: mantida no Executor (usa par)"]
+        )
+
+        _, semantic = analyze(PAR_FUNCTION)
+        self.assertEqual(
+            unsupported(semantic.function_table["paralela"]), "usa par"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+from minipar.transpiler import Transpiler, isolate
+from tests.helpers import ProgramTestCase, analyze
+
+SHADOW_PROGRAM = """
+x: number = 1
+func muda() -> void {
+    x = x + 10
+}
+if (x > 0) {
+    x: number = 2
+    print(x)
+}
+muda()
+print(x)
+"""
+
+
+def transpile(program: str) -> str:
+    module, _ = analyze(program)
+    return Transpiler().transpile(module)
+
+
+class TestTranspiler(unittest.TestCase):
+
+    def test_source_compiles(self):
+        source = transpile(SHADOW_PROGRAM)
+        compile(source, "<minipar>", "exec")
+        self.assertTrue(source.startswith("# código gerado"))
+        self.assertIn("def f_muda():", source)
+        self.assertIn("global v_x", source)
+
+    def test_shadowed_names(self):
+        # a declaração do bloco recebe outro nome Python
+        source = transpile(SHADOW_PROGRAM)
+        self.assertIn("v_x = 1", source)
+        self.assertIn("v_x_1 = 2", source)
+        self.assertIn("b_print(v_x_1)", source)
+
+    def test_tail_calls(self):
+        source = transpile(
+            "func conta(n: number) -> number {\n"
+            "    if (n == 0) {\n        return 0\n    }\n"
+            "    return conta(n - 1)\n}"
+        )
+        self.assertIn("def t_conta(", source)
+
+
+class TestIsolate(unittest.TestCase):
+
+    def test_globals_and_cells(self):
+        namespace = {"total": 0}
+        exec(
+            "def externa():\n"
+            "    contador = 0\n"
+            "    def incrementa():\n"
+            "        global total\n"
+            "        nonlocal contador\n"
+            "        total += 1\n"
+            "        contador += 1\n"
+            "        return total, contador\n"
+            "    def le():\n"
+            "        return contador\n"
+            "    return incrementa, le\n",
+            namespace,
+        )
+        incrementa, le = namespace["externa"]()
+        branch = isolate(namespace, incrementa)
+
+        self.assertEqual(branch(), (1, 1))
+        self.assertEqual(branch(), (2, 2))
+        # o namespace e a célula originais não mudam
+        self.assertEqual(namespace["total"], 0)
+        self.assertEqual(le(), 0)
+        self.assertEqual(incrementa(), (1, 1))
+
+
+class TestPythonEngine(ProgramTestCase):
+
+    def test_run(self):
+        for options in [(), ("-no-opt",)]:
+            with self.subTest(options=options):
+                output = self.output(
+                    SHADOW_PROGRAM, "-engine", "python", *options
+                )
+                self.assertEqual(output.split(), ["2", "11"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import operator
+import unittest
+
+from minipar.bytecode import Code, Compiler, Op, disassemble
+from minipar.resolver import Resolver
+from tests.helpers import ProgramTestCase, analyze, run_program
+
+PROGRAM = """
+func soma(a: number, b: number) -> number {
+    return a + b
+}
+x: number = 0
+while (x < 3) {
+    if (x == 1) {
+        x = x + 1
+        continue
+    }
+    print(soma(x, 10))
+    x = x + 1
+}
+"""
+
+
+def compile_program(program: str) -> Code:
+    module, _ = analyze(program)
+    return Compiler(Resolver().resolve(module)).compile_module(module)
+
+
+def ops(code: Code) -> list[Op]:
+    return [op for op, _ in code.instructions]
+
+
+class TestCompiler(unittest.TestCase):
+
+    def test_function(self):
+        code = compile_program(PROGRAM)
+        (soma,) = code.children
+        self.assertEqual(soma.params, ["a", "b"])
+        self.assertEqual(soma.size, 3)
+        self.assertEqual(
+            soma.instructions[:4],
+            [
+                (Op.LOAD_FAST, 1),
+                (Op.LOAD_FAST, 2),
+                (Op.BINARY_OP, operator.add),
+                (Op.RETURN_VALUE, None),
+            ],
+        )
+
+    def test_loop_jumps(self):
+        code = compile_program(PROGRAM)
+        self.assertEqual(ops(code)[-2:], [Op.LOAD_CONST, Op.RETURN_VALUE])
+
+        # o laço testa a condição antes da primeira iteração e no fim do
+        # corpo, para onde o continue salta
+        exit_jump = ops(code).index(Op.POP_JUMP_IF_FALSE)
+        back_jump = ops(code).index(Op.POP_JUMP_IF_TRUE)
+        body = exit_jump + 1
+        self.assertEqual(code.instructions[exit_jump][1], back_jump + 1)
+        self.assertEqual(code.instructions[back_jump][1], body)
+
+        condition = back_jump - 3
+        continue_jump = ops(code).index(Op.JUMP)
+        self.assertEqual(code.instructions[continue_jump][1], condition)
+
+    def test_disassemble(self):
+        listing = disassemble(compile_program(PROGRAM))
+        self.assertIn("Disassembly of <module> (frame size 2):", listing)
+        self.assertIn("Disassembly of soma(a, b) (frame size 3):", listing)
+        self.assertIn("CALL_FUNCTION          soma (depth 0, 2 args)", listing)
+        self.assertIn("STORE_FAST             1 (x)", listing)
+        self.assertIn(">>", listing)
+
+
+class TestVirtualMachine(ProgramTestCase):
+
+    def test_run(self):
+        output = self.output(PROGRAM, "-engine", "vm")
+        self.assertEqual(output.split(), ["10", "12"])
+
+    def test_runtime_errors(self):
+        program = "x: number = 0\ny: number = 1 / x"
+        for engine in ["tree", "vm"]:
+            with self.subTest(engine=engine):
+                result = run_program(program, "-engine", engine)
+                self.assertNotEqual(result.returncode, 0)
+                self.assertIn("ZeroDivisionError", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()